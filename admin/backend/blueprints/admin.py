@@ -1,121 +1,206 @@
 from flask import Blueprint, jsonify, request
 from flasgger import swag_from  # Import swag_from for Swagger documentation
-from models import Ticket, User, db
-from datetime import datetime
+from models import TICKET_URGENCY_RANKS, Ticket, db
+from utils.auth import admin_required
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, paginate
+from datetime import datetime, timezone
 
 # Create the admin blueprint
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
-def is_admin(clerkId):
-    """Check if user has ADMIN role"""
-    admin = User.query.filter_by(clerkId=clerkId).first()
-    return admin and admin.role == "ADMIN"
+# Query parameters shared by the ticket listings
+TICKET_LIST_PARAMETERS = [
+    {
+        'name': 'clerkId',
+        'in': 'path',
+        'type': 'string',
+        'required': True,
+        'description': 'Admin clerk ID'
+    },
+    {
+        'name': 'urgency',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Comma-separated urgencies to include (high, medium, low)'
+    },
+    {
+        'name': 'created_after',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Only tickets created at or after this ISO 8601 date/time'
+    },
+    {
+        'name': 'created_before',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Only tickets created before this ISO 8601 date/time'
+    },
+    {
+        'name': 'cursor',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'next_cursor from the previous page'
+    },
+    {
+        'name': 'limit',
+        'in': 'query',
+        'type': 'integer',
+        'required': False,
+        'description': f'Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})'
+    }
+]
+
+def _split_param(name):
+    """Comma-separated query parameter as a list of lower-case values."""
+    value = request.args.get(name, '')
+    return [part.strip().lower() for part in value.split(',') if part.strip()]
+
+def _parse_datetime(value):
+    """ISO 8601 date/time as a naive UTC datetime, matching the stored columns."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _ticket_json(t):
+    return {
+        "id": t.id,
+        "title": t.title,
+        "description": t.description,
+        "status": t.status,
+        "urgency": t.urgency,
+        "created_by": t.created_by,
+        "created_at": t.created_at.isoformat()
+    }
+
+def _list_tickets(statuses):
+    """
+    One page of tickets, most urgent first and oldest first within an urgency,
+    served by the (status, urgency_rank, created_at, id) index.
+
+    Returns:
+        tuple: (body, status_code)
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return {"error": "limit must be an integer"}, 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return {"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}, 400
+
+    query = Ticket.query
+    if statuses:
+        query = query.filter(Ticket.status.in_(statuses))
+
+    urgencies = _split_param('urgency')
+    unknown = [urgency for urgency in urgencies if urgency not in TICKET_URGENCY_RANKS]
+    if unknown:
+        return {"error": f"Unknown urgency: {', '.join(unknown)}"}, 400
+    if urgencies:
+        # Filter on the indexed rank rather than the raw column
+        query = query.filter(Ticket.urgency_rank.in_([TICKET_URGENCY_RANKS[u] for u in urgencies]))
+
+    try:
+        created_after = request.args.get('created_after')
+        if created_after:
+            query = query.filter(Ticket.created_at >= _parse_datetime(created_after))
+        created_before = request.args.get('created_before')
+        if created_before:
+            query = query.filter(Ticket.created_at < _parse_datetime(created_before))
+    except ValueError:
+        return {"error": "created_after and created_before must be ISO 8601 dates"}, 400
+
+    try:
+        tickets, next_cursor = paginate(
+            query,
+            [Ticket.urgency_rank, Ticket.created_at, Ticket.id],
+            request.args.get('cursor'),
+            limit
+        )
+    except InvalidCursor as e:
+        return {"error": str(e)}, 400
+
+    return {"items": [_ticket_json(t) for t in tickets], "next_cursor": next_cursor}, 200
 
 @admin_bp.route('/<string:clerkId>/tickets/all', methods=['GET'])
 @swag_from({
     'tags': ['Admin'],
-    'parameters': [
+    'parameters': TICKET_LIST_PARAMETERS + [
         {
-            'name': 'clerkId',
-            'in': 'path',
+            'name': 'status',
+            'in': 'query',
             'type': 'string',
-            'required': True,
-            'description': 'Admin clerk ID'
+            'required': False,
+            'description': 'Comma-separated statuses to include (e.g. pending,accepted)'
         }
     ],
     'responses': {
         200: {
-            'description': 'List of all tickets',
+            'description': 'One page of tickets, most urgent and oldest first',
             'examples': {
-                'application/json': [
-                    {
-                        "id": 1,
-                        "title": "Payment Issue",
-                        "status": "open",
-                        "urgency": "high",
-                        "created_at": "2023-01-01T00:00:00Z"
-                    }
-                ]
+                'application/json': {
+                    "items": [
+                        {
+                            "id": 1,
+                            "title": "Payment Issue",
+                            "status": "open",
+                            "urgency": "high",
+                            "created_at": "2023-01-01T00:00:00Z"
+                        }
+                    ],
+                    "next_cursor": "WzAsIjIwMjMtMDEtMDFUMDA6MDA6MDAiLDFd"
+                }
             }
         },
-        403: {'description': 'Unauthorized'},
-        404: {'description': 'Admin not found'}
+        400: {'description': 'Invalid filter, limit or cursor'},
+        403: {'description': 'Unauthorized'}
     }
 })
+@admin_required
 def get_all_tickets(clerkId):
-    """Get all tickets (Admin only)
+    """Get all tickets, paginated and filterable (Admin only)
     ---
     """
-    if not is_admin(clerkId):
-        return jsonify({"error": "Unauthorized: User is not an admin"}), 403
-    
-    admin = User.query.get(clerkId)
-    if not admin:
-        return jsonify({"error": "Admin not found"}), 404
-    
-    tickets = Ticket.query.all()
-    return jsonify([{
-        "id": t.id,
-        "title": t.title,
-        "description": t.description,
-        "status": t.status,
-        "urgency": t.urgency,
-        "created_by": t.created_by,
-        "created_at": t.created_at.isoformat()
-    } for t in tickets])
+    body, status_code = _list_tickets(_split_param('status'))
+    return jsonify(body), status_code
 
 @admin_bp.route('/<string:clerkId>/tickets/pending', methods=['GET'])
 @swag_from({
     'tags': ['Admin'],
-    'parameters': [
-        {
-            'name': 'clerkId',
-            'in': 'path',
-            'type': 'string',
-            'required': True,
-            'description': 'Admin clerk ID'
-        }
-    ],
+    'parameters': TICKET_LIST_PARAMETERS,
     'responses': {
         200: {
-            'description': 'List of pending tickets',
+            'description': 'One page of pending tickets, most urgent and oldest first',
             'examples': {
-                'application/json': [
-                    {
-                        "id": 2,
-                        "title": "Technical Support",
-                        "status": "pending",
-                        "urgency": "medium",
-                        "created_at": "2023-01-02T00:00:00Z"
-                    }
-                ]
+                'application/json': {
+                    "items": [
+                        {
+                            "id": 2,
+                            "title": "Technical Support",
+                            "status": "pending",
+                            "urgency": "medium",
+                            "created_at": "2023-01-02T00:00:00Z"
+                        }
+                    ],
+                    "next_cursor": None
+                }
             }
         },
-        403: {'description': 'Unauthorized'},
-        404: {'description': 'Admin not found'}
+        400: {'description': 'Invalid filter, limit or cursor'},
+        403: {'description': 'Unauthorized'}
     }
 })
+@admin_required
 def get_pending_tickets(clerkId):
-    """Get pending tickets (Admin only)
+    """Get pending tickets, paginated and filterable (Admin only)
     ---
     """
-    if not is_admin(clerkId):
-        return jsonify({"error": "Unauthorized: User is not an admin"}), 403
-    
-    admin = User.query.get(clerkId)
-    if not admin:
-        return jsonify({"error": "Admin not found"}), 404
-    
-    pending_tickets = Ticket.query.filter_by(status='pending').all()
-    return jsonify([{
-        "id": t.id,
-        "title": t.title,
-        "description": t.description,
-        "status": t.status,
-        "urgency": t.urgency,
-        "created_by": t.created_by,
-        "created_at": t.created_at.isoformat()
-    } for t in pending_tickets])
+    body, status_code = _list_tickets(['pending'])
+    return jsonify(body), status_code
 
 @admin_bp.route('/<string:clerkId>/tickets/<int:id>/update-status', methods=['POST'])
 @swag_from({
@@ -171,6 +256,7 @@ def get_pending_tickets(clerkId):
         404: {'description': 'Admin or ticket not found'}
     }
 })
+@admin_required
 def update_ticket_status(clerkId, id):
     """Update ticket status (Admin only)"""
     # Debugging headers and content type
@@ -1,8 +1,53 @@
-from flask import Blueprint, request, jsonify
+import json
+import os
+import queue
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from sqlalchemy import func
 from models import ChatMessage, Ticket, User, db
+from services.chat_stream import CHAT_STREAM_HEARTBEAT, RESYNC, RecentIds, listener
+from services.pusher import trigger_message
 
 chat_bp = Blueprint('chat', __name__, url_prefix='/chat')
 
+# Page size limits for message history
+DEFAULT_HISTORY_SIZE = 50
+MAX_HISTORY_SIZE = 200
+
+# Ids are assigned at insert, not at commit, so a message can become visible
+# after a higher id already has. Polls re-read the ticket's last few messages
+# at or below the cursor that are younger than this many seconds.
+CHAT_LATE_COMMIT_SECONDS = float(os.getenv("CHAT_LATE_COMMIT_SECONDS", "30"))
+CHAT_LATE_COMMIT_WINDOW = int(os.getenv("CHAT_LATE_COMMIT_WINDOW", "20"))
+
+def _int_arg(name, default=None):
+    # request.args.get(type=int) would silently fall back to the default on bad input
+    value = request.args.get(name)
+    return default if value is None else int(value)
+
+def _late_commits(ticket_id, up_to_id):
+    """
+    Recent messages of a ticket with ids at or below up_to_id, oldest first.
+    Bounded to the last CHAT_LATE_COMMIT_WINDOW rows of the (ticket_id, id) index.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=CHAT_LATE_COMMIT_SECONDS)
+    recent = (
+        ChatMessage.query
+        .filter(ChatMessage.ticket_id == ticket_id, ChatMessage.id <= up_to_id)
+        .order_by(ChatMessage.id.desc())
+        .limit(CHAT_LATE_COMMIT_WINDOW)
+        .all()
+    )
+    return [msg for msg in reversed(recent) if msg.timestamp and msg.timestamp >= cutoff]
+
+def _message_json(msg):
+    return {
+        'id': msg.id,
+        'sender_id': msg.sender_id,
+        'message': msg.message,
+        'timestamp': msg.timestamp.isoformat()
+    }
+
 @chat_bp.route('/<int:ticket_id>/messages', methods=['POST'])
 def send_message(ticket_id):
     """Send a new chat message
@@ -62,17 +107,21 @@ def send_message(ticket_id):
     db.session.add(new_message)
     db.session.commit()
     
-    return jsonify({
+    message_data = {
         'id': new_message.id,
         'ticket_id': ticket_id,
         'sender_id': data['sender_id'],
         'message': data['message'],
         'timestamp': new_message.timestamp.isoformat()
-    }), 201
+    }
+    # Published only once the message is committed, from a background thread
+    trigger_message(ticket_id, message_data)
+    
+    return jsonify(message_data), 201
 
 @chat_bp.route('/<int:ticket_id>/messages', methods=['GET'])
 def get_message_history(ticket_id):
-    """Get message history for a ticket
+    """Get message history for a ticket, or only the messages around a known id
     ---
     tags:
       - Chat
@@ -82,9 +131,30 @@ def get_message_history(ticket_id):
         required: true
         schema:
           type: integer
+      - name: after_id
+        in: query
+        required: false
+        description: >
+          Only messages newer than this id, oldest first (for polling). The response
+          also repeats recent messages at or below after_id, because a message can
+          commit after one with a higher id; clients should merge by id.
+        schema:
+          type: integer
+      - name: before_id
+        in: query
+        required: false
+        description: Only the newest messages older than this id (for loading earlier history)
+        schema:
+          type: integer
+      - name: limit
+        in: query
+        required: false
+        description: Maximum number of messages (default 50, max 200)
+        schema:
+          type: integer
     responses:
       200:
-        description: List of messages
+        description: Messages in ascending id order. Without after_id, the newest ones up to limit.
         content:
           application/json:
             example:
@@ -92,18 +162,175 @@ def get_message_history(ticket_id):
                 sender_id: "user_123"
                 message: "Hello there!"
                 timestamp: "2023-01-01T00:00:00Z"
+      400:
+        description: Invalid after_id, before_id or limit
       404:
         description: Ticket not found
     """
+    try:
+        after_id = _int_arg('after_id')
+        before_id = _int_arg('before_id')
+        limit = _int_arg('limit', DEFAULT_HISTORY_SIZE)
+    except ValueError:
+        return jsonify({"error": "after_id, before_id and limit must be integers"}), 400
+    if not 1 <= limit <= MAX_HISTORY_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_HISTORY_SIZE}"}), 400
+
     ticket = Ticket.query.get(ticket_id)
     if not ticket:
         return jsonify({"error": "Ticket not found"}), 404
     
-    messages = ChatMessage.query.filter_by(ticket_id=ticket_id).order_by(ChatMessage.timestamp.asc()).all()
+    # Both cursors are range scans on the (ticket_id, id) index
+    query = ChatMessage.query.filter(ChatMessage.ticket_id == ticket_id)
+    if before_id is not None:
+        query = query.filter(ChatMessage.id < before_id)
+    if after_id is not None:
+        # Polling: the oldest messages the client hasn't seen yet, plus any
+        # recent ones below the cursor that may have committed after it was taken
+        messages = query.filter(ChatMessage.id > after_id).order_by(ChatMessage.id.asc()).limit(limit).all()
+        messages = _late_commits(ticket_id, after_id) + messages
+    else:
+        # Initial load or backfill: the newest messages, returned oldest first
+        messages = query.order_by(ChatMessage.id.desc()).limit(limit).all()
+        messages.reverse()
     
-    return jsonify([{
-        'id': msg.id,
-        'sender_id': msg.sender_id,
-        'message': msg.message,
-        'timestamp': msg.timestamp.isoformat()
-    } for msg in messages]), 200
\ No newline at end of file
+    return jsonify([_message_json(msg) for msg in messages]), 200
+
+def _messages_after(ticket_id, after_id):
+    """
+    Every message of a ticket newer than after_id, oldest first, read in pages.
+    The session is closed after each page so an open stream doesn't hold a
+    pooled connection while it waits.
+    """
+    while True:
+        page = (
+            ChatMessage.query
+            .filter(ChatMessage.ticket_id == ticket_id, ChatMessage.id > after_id)
+            .order_by(ChatMessage.id.asc())
+            .limit(MAX_HISTORY_SIZE)
+            .all()
+        )
+        db.session.close()
+        yield from page
+        if len(page) < MAX_HISTORY_SIZE:
+            return
+        after_id = page[-1].id
+
+@chat_bp.route('/<int:ticket_id>/stream', methods=['GET'])
+def stream_messages(ticket_id):
+    """Stream new messages for a ticket as Server-Sent Events
+    ---
+    tags:
+      - Chat
+    parameters:
+      - name: ticket_id
+        in: path
+        required: true
+        schema:
+          type: integer
+      - name: Last-Event-ID
+        in: header
+        required: false
+        description: Resume after this message id (sent automatically by EventSource on reconnect)
+        schema:
+          type: integer
+      - name: last_event_id
+        in: query
+        required: false
+        description: Same as Last-Event-ID, for the first connection of an EventSource
+        schema:
+          type: integer
+    responses:
+      200:
+        description: >
+          text/event-stream of message events (data is the message JSON, id the highest
+          message id sent so far). A message that commits after a higher id can arrive
+          out of order, and a resume may repeat recent messages; clients should merge by id.
+      400:
+        description: Invalid Last-Event-ID
+      404:
+        description: Ticket not found
+    """
+    try:
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be a message id"}), 400
+
+    ticket = Ticket.query.get(ticket_id)
+    if not ticket:
+        return jsonify({"error": "Ticket not found"}), 404
+
+    # Subscribe before reading the starting point so no commit falls in between
+    events = listener.subscribe(ticket_id)
+    resuming = last_id is not None
+    if last_id is None:
+        # A fresh stream starts with messages committed from now on
+        last_id = (
+            db.session.query(func.coalesce(func.max(ChatMessage.id), 0))
+            .filter(ChatMessage.ticket_id == ticket_id)
+            .scalar()
+        )
+    db.session.close()
+
+    def generate(after_id):
+        # Ids are assigned at insert but notified at commit, so a message can
+        # arrive below after_id. Notified ids below it are read by id, and
+        # after a resume or a listener reconnect (when notifications may have
+        # been missed) recent messages below it are re-read; sent drops repeats.
+        sent = RecentIds()
+        notified = set()
+        resync = resuming
+        try:
+            yield "retry: 3000\n\n"
+            pending = True
+            while True:
+                if pending:
+                    messages = {msg.id: msg for msg in _messages_after(ticket_id, after_id)}
+                    late_ids = [i for i in notified if i <= after_id and i not in sent]
+                    if late_ids:
+                        for msg in ChatMessage.query.filter(
+                            ChatMessage.ticket_id == ticket_id, ChatMessage.id.in_(late_ids)
+                        ):
+                            messages[msg.id] = msg
+                    if resync:
+                        for msg in _late_commits(ticket_id, after_id):
+                            messages.setdefault(msg.id, msg)
+                    db.session.close()
+
+                    for message_id in sorted(messages):
+                        if message_id in sent:
+                            continue
+                        sent.add(message_id)
+                        after_id = max(after_id, message_id)
+                        # The event id is the high-water mark, so a resume never skips a
+                        # message; late ones below it are covered by the resume re-read
+                        msg = messages[message_id]
+                        yield f"id: {after_id}\nevent: message\ndata: {json.dumps(_message_json(msg))}\n\n"
+                    pending = resync = False
+                    notified.clear()
+                try:
+                    item = events.get(timeout=CHAT_STREAM_HEARTBEAT)
+                except queue.Empty:
+                    # Keeps proxies from closing an idle stream; costs no query
+                    yield ": keep-alive\n\n"
+                    continue
+                # Everything that arrived meanwhile is covered by one read
+                while True:
+                    if item is RESYNC:
+                        resync = True
+                    else:
+                        notified.add(item)
+                    try:
+                        item = events.get_nowait()
+                    except queue.Empty:
+                        break
+                pending = True
+        finally:
+            listener.unsubscribe(ticket_id, events)
+
+    return Response(
+        stream_with_context(generate(last_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -1,23 +1,36 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy import TypeDecorator, JSON
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy import TypeDecorator
 from datetime import datetime
 import json
 
 db = SQLAlchemy()
 
 class JSONDict(TypeDecorator):
-    impl = JSON
+    """
+    JSONB object column. Rows written before the column became JSONB may hold
+    the object double-encoded as a JSON string; those are decoded here, so
+    callers always get a dict.
+    """
+    impl = JSONB
+    cache_ok = True
     
-    def process_bind_param(self, value, dialect):
+    @staticmethod
+    def _decode(value):
         if value is None:
             return {}
-        return value
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return {}
+        return value if isinstance(value, dict) else {}
+    
+    def process_bind_param(self, value, dialect):
+        return self._decode(value)
     
     def process_result_value(self, value, dialect):
-        if value is None:
-            return {}
-        return value
+        return self._decode(value)
 
 class User(db.Model):
     __tablename__ = "users"
@@ -65,6 +78,8 @@ class FreelancerDetails(db.Model):
     occupation = db.Column(db.String)
     skills = db.Column(ARRAY(db.String))
     averageRating = db.Column(db.Float, default=0.0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
     portfolioLinks = db.Column(ARRAY(db.String))
     
     user = db.relationship("User", back_populates="freelancer_details")
@@ -88,8 +103,6 @@ class Gig(db.Model):
     description = db.Column(db.Text)
     skills_needed = db.Column(ARRAY(db.String))
     project_deadline = db.Column(db.DateTime)
-    milestones = db.Column(ARRAY(db.String))
-    milestone_payments = db.Column(ARRAY(db.Float))
     total_payment = db.Column(db.Float)
     status = db.Column(db.String, default="OPEN")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -98,6 +111,23 @@ class Gig(db.Model):
     employer = db.relationship("User", back_populates="gigs")
     gig_requests = db.relationship("GigRequest", back_populates="gig")
     active_gigs = db.relationship("ActiveGig", back_populates="gig")
+    milestone_rows = db.relationship("Milestone", back_populates="gig", order_by="Milestone.index")
+
+# Milestone Model
+class Milestone(db.Model):
+    __tablename__ = "milestones"
+
+    id = db.Column(db.Integer, primary_key=True)
+    gig_id = db.Column(db.Integer, db.ForeignKey("gigs.id", ondelete="CASCADE"), nullable=False)
+    index = db.Column(db.Integer, nullable=False)
+    description = db.Column(db.Text)
+    amount = db.Column(db.Float)
+    status = db.Column(db.String, nullable=False, default="PENDING")
+    submitted_at = db.Column(db.DateTime, nullable=True)
+    approved_at = db.Column(db.DateTime, nullable=True)
+    active_gig_id = db.Column(db.Integer, db.ForeignKey("active_gigs.id", ondelete="SET NULL"), nullable=True)
+    
+    gig = db.relationship("Gig", back_populates="milestone_rows")
 
 # GigRequest Model
 class GigRequest(db.Model):
@@ -124,7 +154,8 @@ class ActiveGig(db.Model):
     freelancerClerkId = db.Column(db.String, db.ForeignKey("users.clerkId"), index=True)
     employerClerkId = db.Column(db.String, db.ForeignKey("users.clerkId"), index=True)
     contract_address = db.Column(db.String)
-    milestone_status = db.Column(ARRAY(db.String))
+    # Only set once the gig is terminated; see the backend ActiveGig model
+    final_milestone_status = db.Column("milestone_status", ARRAY(db.String), nullable=True)
     milestone_links = db.Column(JSONDict, default={})
     status = db.Column(db.String, default="ACTIVE")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -140,7 +171,8 @@ class Balance(db.Model):
 
     id = db.Column(db.Integer, primary_key=True, index=True)
     clerkId = db.Column(db.String, db.ForeignKey("users.clerkId"), unique=True)
-    amount = db.Column(db.Float, default=0.0)
+    # Minor units (cents); projection of the ledger owned by the main backend, read-only here
+    amount_minor = db.Column(db.BigInteger, nullable=False, default=0)
     
     user = db.relationship("User", back_populates="balance")
 
@@ -148,8 +180,9 @@ class Balance(db.Model):
 class CompanyBalance(db.Model):
     __tablename__ = "company_balance"
 
+    # One row per escrow shard; the company balance is the sum of all rows
     id = db.Column(db.Integer, primary_key=True, index=True)
-    amount = db.Column(db.Float, default=0.0)
+    amount_minor = db.Column(db.BigInteger, nullable=False, default=0)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 # Review Model
@@ -177,6 +210,9 @@ class ChatMessage(db.Model):
     ticket = db.relationship('Ticket', backref='messages')
     sender = db.relationship('User', back_populates='messages')  # Changed to User
 
+# Sort position of each ticket urgency, most urgent first (see Ticket.urgency_rank)
+TICKET_URGENCY_RANKS = {"high": 0, "medium": 1, "low": 2}
+
 class Ticket(db.Model):
     __tablename__ = "tickets"
     
@@ -187,5 +223,13 @@ class Ticket(db.Model):
     urgency = db.Column(db.String(10), default='medium')
     created_by = db.Column(db.String, db.ForeignKey('users.clerkId'))  # Changed to users.clerkId
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Maintained by Postgres; unknown urgencies sort last
+    urgency_rank = db.Column(
+        db.SmallInteger,
+        db.Computed(
+            "CASE lower(urgency) WHEN 'high' THEN 0 WHEN 'medium' THEN 1 WHEN 'low' THEN 2 ELSE 3 END",
+            persisted=True
+        )
+    )
     
     creator = db.relationship("User", back_populates="created_tickets")  # Relationship to User
\ No newline at end of file
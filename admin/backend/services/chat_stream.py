@@ -0,0 +1,151 @@
+"""
+Fan-out of new chat messages to Server-Sent Events streams.
+
+A trigger on chat_messages (see the backend migration e5c9b3f7a218) sends
+NOTIFY chat_messages with {"id", "ticket_id"} when an insert commits. One
+listener thread per process holds a dedicated LISTEN connection and wakes
+the streams subscribed to that ticket; each stream then reads the new rows
+itself. Idle tickets cost no queries at all.
+
+Whenever the listener (re)connects it wakes every stream, since
+notifications sent while it wasn't listening are lost; streams re-read
+from their last id, plus the recent messages just below it in case they
+committed late.
+
+Each open stream occupies a worker thread, so run the app under a threaded
+(or gevent) server.
+"""
+import json
+import os
+import queue
+import select
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHAT_NOTIFY_CHANNEL = "chat_messages"
+# Seconds between keep-alive comments on an idle stream
+CHAT_STREAM_HEARTBEAT = float(os.getenv("CHAT_STREAM_HEARTBEAT", "15"))
+# Longest wait before reconnecting a dropped LISTEN connection
+CHAT_LISTENER_MAX_BACKOFF = float(os.getenv("CHAT_LISTENER_MAX_BACKOFF", "30"))
+
+# Put on every subscriber queue once LISTEN is (re)established
+RESYNC = None
+
+class RecentIds:
+    """Set of the most recently added ids, bounded to maxlen entries."""
+
+    def __init__(self, maxlen: int = 1000):
+        self._order = deque(maxlen=maxlen)
+        self._ids: Set[int] = set()
+
+    def add(self, value: int):
+        if value in self._ids:
+            return
+        if len(self._order) == self._order.maxlen:
+            self._ids.discard(self._order[0])
+        self._order.append(value)
+        self._ids.add(value)
+
+    def __contains__(self, value) -> bool:
+        return value in self._ids
+
+def _listen_dsn() -> Optional[str]:
+    url = os.getenv("DATABASE_URL")
+    if url and url.startswith("postgresql+psycopg2://"):
+        url = "postgresql://" + url[len("postgresql+psycopg2://"):]
+    return url
+
+class ChatListener:
+    """Dedicated LISTEN connection dispatching notifications to per-ticket queues."""
+
+    def __init__(self, dsn: Optional[str] = None):
+        self.dsn = dsn
+        self._subscribers: Dict[int, Set[queue.Queue]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # Started on first subscription, and again in a forked worker process
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="chat-listener", daemon=True)
+            self._thread.start()
+
+    def subscribe(self, ticket_id: int) -> queue.Queue:
+        """Register a stream for a ticket; the queue receives new message ids."""
+        self._ensure_thread()
+        events = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(ticket_id, set()).add(events)
+        return events
+
+    def unsubscribe(self, ticket_id: int, events: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(ticket_id)
+            if subscribers is not None:
+                subscribers.discard(events)
+                if not subscribers:
+                    del self._subscribers[ticket_id]
+
+    def _dispatch(self, payload: str):
+        try:
+            notification = json.loads(payload)
+            ticket_id = int(notification["ticket_id"])
+            message_id = int(notification["id"])
+        except (ValueError, TypeError, KeyError):
+            print(f"Ignoring malformed chat notification: {payload}")
+            return
+        with self._lock:
+            subscribers = list(self._subscribers.get(ticket_id, ()))
+        for events in subscribers:
+            events.put(message_id)
+
+    def _resync_all(self):
+        with self._lock:
+            subscribers = [events for group in self._subscribers.values() for events in group]
+        for events in subscribers:
+            events.put(RESYNC)
+
+    def _listen(self):
+        import psycopg2
+
+        connection = psycopg2.connect(self.dsn or _listen_dsn())
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHAT_NOTIFY_CHANNEL}")
+            self._resync_all()
+
+            while True:
+                # Wake periodically so a dead connection is noticed by poll()
+                select.select([connection], [], [], 60)
+                connection.poll()
+                while connection.notifies:
+                    self._dispatch(connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+    def _run(self):
+        backoff = 1.0
+        while True:
+            started = time.monotonic()
+            try:
+                self._listen()
+            except Exception as e:
+                print(f"Chat listener disconnected: {str(e)}")
+            # Reset the backoff after a connection that stayed up for a while
+            if time.monotonic() - started > CHAT_LISTENER_MAX_BACKOFF:
+                backoff = 1.0
+            time.sleep(backoff)
+            backoff = min(backoff * 2, CHAT_LISTENER_MAX_BACKOFF)
+
+listener = ChatListener()
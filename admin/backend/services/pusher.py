@@ -1,20 +1,181 @@
-import pusher
-from dotenv import load_dotenv
+"""
+Background Pusher publisher for chat events.
+
+Request handlers call trigger_message(), which only puts the event on an
+in-process queue and returns. A daemon thread drains the queue, coalescing
+events that arrive within PUSHER_BATCH_WINDOW seconds into one trigger_batch
+call of at most PUSHER_BATCH_SIZE events (Pusher accepts up to 10 per call).
+A failed batch is retried once, then dropped: clients can always catch up
+through the chat history endpoint.
+
+PUSHER_TRANSPORT selects where events go: pusher (the default) or fake
+(in-memory, for local testing).
+"""
 import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
 
 load_dotenv()
 
-pusher_client = pusher.Pusher(
-    app_id=os.getenv('PUSHER_APP_ID'),
-    key=os.getenv('PUSHER_KEY'),
-    secret=os.getenv('PUSHER_SECRET'),
-    cluster=os.getenv('PUSHER_CLUSTER'),
-    ssl=True
-)
+PUSHER_TRANSPORT = os.getenv("PUSHER_TRANSPORT", "pusher").strip().lower()
+PUSHER_BATCH_SIZE = min(int(os.getenv("PUSHER_BATCH_SIZE", "10")), 10)
+PUSHER_BATCH_WINDOW = float(os.getenv("PUSHER_BATCH_WINDOW", "0.05"))
+# Events waiting beyond this are dropped rather than growing memory without bound
+PUSHER_QUEUE_SIZE = int(os.getenv("PUSHER_QUEUE_SIZE", "10000"))
+
+class PusherTransport:
+    """Sends batches through the Pusher HTTP API; the client is created on first use."""
+
+    def __init__(self):
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            import pusher
+
+            self._client = pusher.Pusher(
+                app_id=os.getenv('PUSHER_APP_ID'),
+                key=os.getenv('PUSHER_KEY'),
+                secret=os.getenv('PUSHER_SECRET'),
+                cluster=os.getenv('PUSHER_CLUSTER'),
+                ssl=True
+            )
+        return self._client
+
+    def trigger_batch(self, events: List[Dict]):
+        self._get_client().trigger_batch(events)
+
+class FakeTransport:
+    """Records batches in memory. Set fail_times to make the next N batches raise."""
+
+    def __init__(self, fail_times: int = 0):
+        self.batches: List[List[Dict]] = []
+        self.fail_times = fail_times
+
+    def trigger_batch(self, events: List[Dict]):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError("Fake transport failure")
+        self.batches.append(list(events))
+
+    @property
+    def events(self) -> List[Dict]:
+        return [event for batch in self.batches for event in batch]
+
+def get_transport(name: Optional[str] = None):
+    """Build the transport selected by PUSHER_TRANSPORT (or the given name)."""
+    name = (name or PUSHER_TRANSPORT).lower()
+    if name == "pusher":
+        return PusherTransport()
+    if name == "fake":
+        return FakeTransport()
+    raise ValueError(f"Unknown Pusher transport '{name}'. Use pusher or fake.")
+
+class PusherPublisher:
+    """Queue plus a worker thread that publishes events in batches."""
+
+    def __init__(self, transport=None, batch_size: int = PUSHER_BATCH_SIZE,
+                 batch_window: float = PUSHER_BATCH_WINDOW, maxsize: int = PUSHER_QUEUE_SIZE):
+        self.transport = transport
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.metrics = {"queued": 0, "dropped": 0, "published": 0, "batches": 0, "failed": 0}
+
+    def _count(self, **increments: int):
+        # Request threads and the worker both update metrics
+        with self._lock:
+            for name, n in increments.items():
+                self.metrics[name] += n
+
+    def _ensure_worker(self):
+        # Started on first publish, and again in a forked worker process,
+        # where the parent's thread doesn't exist
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self.transport is None:
+                self.transport = get_transport()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="pusher-publisher", daemon=True)
+            self._thread.start()
+
+    def publish(self, channel: str, event: str, data: Dict) -> bool:
+        """
+        Queue one event without blocking.
+
+        Returns:
+            bool: False if the queue was full and the event was dropped
+        """
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait({"channel": channel, "name": event, "data": data})
+        except queue.Full:
+            self._count(dropped=1)
+            print(f"Pusher queue full, dropped {event} on {channel}")
+            return False
+        self._count(queued=1)
+        return True
+
+    def _next_batch(self) -> List[Dict]:
+        events = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(events) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                events.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return events
+
+    def _send(self, events: List[Dict]):
+        for attempt in (1, 2):
+            try:
+                self.transport.trigger_batch(events)
+                self._count(published=len(events), batches=1)
+                return
+            except Exception as e:
+                print(f"Pusher batch of {len(events)} failed (attempt {attempt}): {str(e)}")
+        self._count(failed=len(events))
+
+    def _run(self):
+        while True:
+            events = self._next_batch()
+            try:
+                self._send(events)
+            finally:
+                for _ in events:
+                    self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every queued event has been handed to the transport.
+
+        Returns:
+            bool: False if events were still pending after timeout seconds
+        """
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+publisher = PusherPublisher()
 
 def trigger_message(ticket_id, message_data):
-    pusher_client.trigger(
-        f"ticket-{ticket_id}",
-        'new-message',
-        message_data
-    )
\ No newline at end of file
+    """Queue a new-message event for a ticket's channel; never blocks the request."""
+    return publisher.publish(f"ticket-{ticket_id}", 'new-message', message_data)
@@ -0,0 +1,92 @@
+"""
+Admin authorisation for routes that take the caller's clerkId in the path.
+
+@admin_required answers 403 unless the clerkId belongs to an ADMIN. Admins
+are remembered in a small in-process cache for ADMIN_ROLE_CACHE_TTL
+seconds; other callers are looked up on every request.
+
+Roles are assigned and users deleted by the main backend, not this app, so
+nothing here is told when they change: invalidation is TTL-only, and a
+demoted or deleted admin keeps access for at most ADMIN_ROLE_CACHE_TTL
+seconds. Set it to 0 to check the database on every request.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from dotenv import load_dotenv
+from flask import jsonify
+
+from models import User, db
+
+load_dotenv()
+
+ADMIN_ROLE = "ADMIN"
+ADMIN_ROLE_CACHE_TTL = float(os.getenv("ADMIN_ROLE_CACHE_TTL", "30"))
+# Most admins remembered at once; the least recently used are evicted first
+ADMIN_ROLE_CACHE_SIZE = int(os.getenv("ADMIN_ROLE_CACHE_SIZE", "256"))
+
+class RoleCache:
+    """
+    Thread-safe set of clerkIds known to be admins, each kept for ttl seconds
+    and bounded to maxsize entries. Non-admins are never stored, so requests
+    with arbitrary clerkIds can't grow it.
+    """
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def contains(self, clerk_id):
+        """Return True if clerk_id was cached as an admin and hasn't expired."""
+        with self._lock:
+            expires_at = self._entries.get(clerk_id)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._entries[clerk_id]
+                return False
+            self._entries.move_to_end(clerk_id)
+            return True
+
+    def add(self, clerk_id):
+        with self._lock:
+            self._entries[clerk_id] = time.monotonic() + self.ttl
+            self._entries.move_to_end(clerk_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *clerk_ids):
+        with self._lock:
+            for clerk_id in clerk_ids:
+                self._entries.pop(clerk_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+role_cache = RoleCache(ADMIN_ROLE_CACHE_TTL, ADMIN_ROLE_CACHE_SIZE)
+
+def is_admin(clerk_id):
+    """Check if the user has the ADMIN role: one primary key lookup, cached for admins."""
+    if role_cache.contains(clerk_id):
+        return True
+
+    role = db.session.query(User.role).filter(User.clerkId == clerk_id).scalar()
+    result = role == ADMIN_ROLE
+    if result:
+        role_cache.add(clerk_id)
+    return result
+
+def admin_required(view):
+    """Reject the request with 403 unless the route's clerkId is an admin."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin(kwargs.get("clerkId")):
+            return jsonify({"error": "Unauthorized: User is not an admin"}), 403
+        return view(*args, **kwargs)
+    return wrapper
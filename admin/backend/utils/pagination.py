@@ -0,0 +1,99 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import literal, tuple_
+
+# Page size limits shared by every cursor-paginated endpoint
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or was built for other sort keys."""
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key values of the last row on a page into an opaque cursor.
+
+    Args:
+        values: The key values, in the same order as the keys used to paginate
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor back into typed key values.
+
+    Args:
+        cursor: The opaque cursor string from a previous page
+        keys: The column expressions the cursor was built from
+
+    Returns:
+        list: Key values converted to the python type of each key
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or was built for other keys
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(keys):
+            raise ValueError("cursor does not match the sort keys")
+
+        values = []
+        for key, value in zip(keys, payload):
+            if key.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            values.append(value)
+        return values
+    except (ValueError, TypeError, binascii.Error, NotImplementedError):
+        raise InvalidCursor("Invalid pagination cursor")
+
+def paginate(
+    query,
+    keys: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of a Model.query using keyset pagination.
+
+    Rows are ordered by keys in ascending order; the last key must be unique
+    (normally the primary key) so that the ordering is total. No key may be
+    NULL, since NULLs never compare and would drop rows between pages.
+
+    Args:
+        query: A Model.query with filters already applied
+        keys: Column expressions to order and page by, e.g. [Ticket.created_at, Ticket.id]
+        cursor: The next_cursor returned with the previous page, if any
+        limit: Maximum number of items to return
+
+    Returns:
+        tuple: (items, next_cursor) where next_cursor is None on the last page
+
+    Raises:
+        InvalidCursor: If the cursor can't be decoded for these keys
+    """
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        query = query.filter(
+            tuple_(*keys) > tuple_(*[literal(value, key.type) for key, value in zip(keys, values)])
+        )
+
+    # Fetch one extra row to know whether another page exists
+    query = query.add_columns(*keys).order_by(*keys).limit(limit + 1)
+    rows = query.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(list(rows[-1])[1:])
+
+    return [row[0] for row in rows], next_cursor
@@ -7,11 +7,13 @@ export default function AdminControls({
   pendingTickets,
   onBanUser,
   onResolve,
+  onLoadMore,
   clerkId
 }: {
   pendingTickets: Ticket[]
   onBanUser: (userId: string) => void
   onResolve: (ticketId: number) => void
+  onLoadMore?: () => void
   clerkId: string
 }) {
   const handleResolve = async (ticketId: number) => {
@@ -56,6 +58,14 @@ export default function AdminControls({
           </div>
         ))}
         {pendingTickets.length === 0 && <p className="text-center text-gray-400">No pending tickets</p>}
+        {onLoadMore && (
+          <button
+            onClick={onLoadMore}
+            className="w-full px-3 py-2 bg-[#1a1a1a] text-gray-300 rounded hover:bg-[#252525] border border-[#333333]"
+          >
+            Load more
+          </button>
+        )}
       </div>
     </div>
   )
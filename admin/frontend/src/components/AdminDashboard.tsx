@@ -5,6 +5,8 @@ import { fetchPendingTickets, banUser, updateTicketStatus } from '../services/ap
 
 export default function AdminDashboard({ clerkId }: { clerkId: string }) {
   const [pendingTickets, setPendingTickets] = useState<Ticket[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [urgency, setUrgency] = useState('')
   const [stats, setStats] = useState({
     totalTickets: 0,
     resolvedTickets: 0,
@@ -14,15 +16,27 @@ export default function AdminDashboard({ clerkId }: { clerkId: string }) {
   useEffect(() => {
     const loadData = async () => {
       try {
-        const tickets = await fetchPendingTickets(clerkId)
-        setPendingTickets(tickets)
+        const page = await fetchPendingTickets(clerkId, null, { urgency })
+        setPendingTickets(page.items)
+        setNextCursor(page.next_cursor)
         // Add actual stats API calls here
       } catch (error) {
         console.error('Failed to load data:', error)
       }
     }
     loadData()
-  }, [clerkId])
+  }, [clerkId, urgency])
+
+  const handleLoadMore = async () => {
+    if (!nextCursor) return
+    try {
+      const page = await fetchPendingTickets(clerkId, nextCursor, { urgency })
+      setPendingTickets(prev => [...prev, ...page.items])
+      setNextCursor(page.next_cursor)
+    } catch (error) {
+      console.error('Failed to load more tickets:', error)
+    }
+  }
 
   const handleResolve = async (ticketId: number) => {
     try {
@@ -51,7 +65,7 @@ export default function AdminDashboard({ clerkId }: { clerkId: string }) {
         <div className="grid grid-cols-1 md:grid-cols-3 gap-6 mb-8">
           <div className="bg-white p-6 rounded-lg shadow">
             <h3 className="text-gray-500">Pending Tickets</h3>
-            <p className="text-2xl font-bold">{pendingTickets.length}</p>
+            <p className="text-2xl font-bold">{pendingTickets.length}{nextCursor ? '+' : ''}</p>
           </div>
           <div className="bg-white p-6 rounded-lg shadow">
             <h3 className="text-gray-500">Resolved Tickets</h3>
@@ -63,6 +77,22 @@ export default function AdminDashboard({ clerkId }: { clerkId: string }) {
           </div>
         </div>
 
+        {/* Urgency Filter */}
+        <div className="mb-4 flex items-center gap-2">
+          <label htmlFor="urgency" className="text-sm text-gray-500">Urgency</label>
+          <select
+            id="urgency"
+            value={urgency}
+            onChange={e => setUrgency(e.target.value)}
+            className="px-2 py-1 border rounded bg-white text-sm"
+          >
+            <option value="">All</option>
+            <option value="high">High</option>
+            <option value="medium">Medium</option>
+            <option value="low">Low</option>
+          </select>
+        </div>
+
         {/* Pending Tickets Table */}
         <div className="bg-white rounded-lg shadow overflow-hidden">
           <table className="min-w-full">
@@ -115,6 +145,17 @@ export default function AdminDashboard({ clerkId }: { clerkId: string }) {
               No pending tickets found
             </div>
           )}
+
+          {nextCursor && (
+            <div className="p-4 text-center">
+              <button
+                onClick={handleLoadMore}
+                className="px-4 py-2 bg-gray-100 text-gray-800 rounded hover:bg-gray-200"
+              >
+                Load more
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </div>
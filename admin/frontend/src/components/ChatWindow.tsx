@@ -8,22 +8,36 @@ import { pusher } from "../services/pusher"
 import { chatApi } from "../services/api"
 import type { ChatMessage } from "../services/types"
 
+// Matches the history endpoint's default page size
+const HISTORY_PAGE_SIZE = 50
+
+// Pusher events can repeat or arrive before the history request returns,
+// so every update merges by id and keeps the list in id order
+const mergeMessages = (current: ChatMessage[], incoming: ChatMessage[]) => {
+  const byId = new Map(current.map((msg) => [msg.id, msg]))
+  incoming.forEach((msg) => byId.set(msg.id, msg))
+  return Array.from(byId.values()).sort((a, b) => a.id - b.id)
+}
+
 export default function ChatWindow() {
   const { ticketId, clerkId } = useParams<{
     ticketId?: string
     clerkId?: string
   }>()
   const [messages, setMessages] = useState<ChatMessage[]>([])
+  const [hasEarlier, setHasEarlier] = useState(false)
   const [newMessage, setNewMessage] = useState("")
   const [error, setError] = useState("")
 
   useEffect(() => {
     if (!ticketId) return
+    setMessages([])
 
     const loadMessages = async () => {
       try {
-        const data = await chatApi.getMessages(Number.parseInt(ticketId))
-        setMessages(data)
+        const data = await chatApi.getMessages(Number.parseInt(ticketId), { limit: HISTORY_PAGE_SIZE })
+        setMessages((prev) => mergeMessages(prev, data))
+        setHasEarlier(data.length === HISTORY_PAGE_SIZE)
       } catch (err) {
         setError("Failed to load messages")
       }
@@ -33,7 +47,7 @@ export default function ChatWindow() {
 
     const channel = pusher.subscribe(`ticket-${ticketId}`)
     channel.bind("new-message", (data: ChatMessage) => {
-      setMessages((prev) => [...prev, data])
+      setMessages((prev) => mergeMessages(prev, [data]))
     })
 
     return () => {
@@ -42,6 +56,21 @@ export default function ChatWindow() {
     }
   }, [ticketId])
 
+  const handleLoadEarlier = async () => {
+    if (!ticketId || messages.length === 0) return
+
+    try {
+      const earlier = await chatApi.getMessages(Number.parseInt(ticketId), {
+        before_id: messages[0].id,
+        limit: HISTORY_PAGE_SIZE,
+      })
+      setMessages((prev) => mergeMessages(prev, earlier))
+      setHasEarlier(earlier.length === HISTORY_PAGE_SIZE)
+    } catch (err) {
+      setError("Failed to load earlier messages")
+    }
+  }
+
   const handleSend = async (e: React.FormEvent) => {
     e.preventDefault()
     if (!newMessage.trim() || !ticketId || !clerkId) return
@@ -63,6 +92,14 @@ export default function ChatWindow() {
   return (
     <div className="h-screen flex flex-col bg-[#121212] p-4">
       <div className="flex-1 bg-[#1e1e1e] rounded-lg shadow-inner p-4 mb-4 overflow-y-auto border border-[#333333]">
+        {hasEarlier && (
+          <button
+            onClick={handleLoadEarlier}
+            className="w-full mb-4 px-3 py-1 text-sm text-gray-300 bg-[#252525] rounded-lg border border-[#333333] hover:border-[#ff3333]"
+          >
+            Load earlier messages
+          </button>
+        )}
         {messages.map((msg) => (
           <div key={msg.id} className="mb-4">
             <div className="flex items-center gap-2 mb-1">
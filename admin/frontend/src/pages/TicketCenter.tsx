@@ -13,6 +13,7 @@ export default function TicketCenter() {
   const [user, setUser] = useState<User | null>(null)
   const [tickets, setTickets] = useState<Ticket[]>([])
   const [pendingTickets, setPendingTickets] = useState<Ticket[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
 
@@ -28,8 +29,9 @@ export default function TicketCenter() {
         setUser(userData)
 
         if (userData.role === "admin") {
-          const pending = await fetchPendingTickets(clerkId)
-          setPendingTickets(pending)
+          const page = await fetchPendingTickets(clerkId)
+          setPendingTickets(page.items)
+          setNextCursor(page.next_cursor)
         } else {
           const userTickets = await fetchTickets(clerkId)
           setTickets(userTickets)
@@ -69,6 +71,18 @@ export default function TicketCenter() {
     }
   }
 
+  const handleLoadMore = async () => {
+    if (!clerkId || !nextCursor) return
+
+    try {
+      const page = await fetchPendingTickets(clerkId, nextCursor)
+      setPendingTickets((prev) => [...prev, ...page.items])
+      setNextCursor(page.next_cursor)
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Failed to load more tickets")
+    }
+  }
+
   const handleResolveTicket = (ticketId: number) => {
     setPendingTickets(prev => prev.filter(t => t.id !== ticketId))
   }
@@ -87,6 +101,7 @@ export default function TicketCenter() {
             pendingTickets={pendingTickets}
             onBanUser={handleBanUser}
             onResolve={handleResolveTicket}
+            onLoadMore={nextCursor ? handleLoadMore : undefined}
             clerkId={clerkId}
           />
         ) : (
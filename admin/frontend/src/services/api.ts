@@ -1,3 +1,5 @@
+import type { ChatMessage, Page, Ticket, TicketFilters, User } from './types';
+
 const API_BASE = import.meta.env.VITE_FLASK_API_URL;
 
 export interface ApiError {
@@ -19,8 +21,19 @@ export const fetchTickets = async (clerkId: string): Promise<Ticket[]> => {
   return response.json();
 };
 
-export const fetchPendingTickets = async (clerkId: string): Promise<Ticket[]> => {
-  const response = await fetch(`${API_BASE}/admin/${clerkId}/tickets/pending`);
+// One page of pending tickets, most urgent and oldest first; pass next_cursor to get the next page
+export const fetchPendingTickets = async (
+  clerkId: string,
+  cursor: string | null = null,
+  filters: TicketFilters = {}
+): Promise<Page<Ticket>> => {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([key, value]) => {
+    if (value) params.set(key, value);
+  });
+  if (cursor) params.set('cursor', cursor);
+  const query = params.toString() ? `?${params}` : '';
+  const response = await fetch(`${API_BASE}/admin/${clerkId}/tickets/pending${query}`);
   if (!response.ok) throw new Error('Failed to fetch pending tickets');
   return response.json();
 };
@@ -55,8 +68,17 @@ export const banUser = async (clerkId: string): Promise<void> => {
 
 // Chat Operations
 export const chatApi = {
-  getMessages: async (ticketId: number): Promise<ChatMessage[]> => {
-    const response = await fetch(`${API_BASE}/chat/${ticketId}/messages`);
+  // after_id fetches only newer messages; before_id pages back through older history
+  getMessages: async (
+    ticketId: number,
+    cursor: { after_id?: number; before_id?: number; limit?: number } = {}
+  ): Promise<ChatMessage[]> => {
+    const params = new URLSearchParams();
+    Object.entries(cursor).forEach(([key, value]) => {
+      if (value !== undefined) params.set(key, String(value));
+    });
+    const query = params.toString() ? `?${params}` : '';
+    const response = await fetch(`${API_BASE}/chat/${ticketId}/messages${query}`);
     if (!response.ok) throw new Error('Failed to fetch messages');
     return response.json();
   },
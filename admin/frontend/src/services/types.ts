@@ -18,6 +18,17 @@ export interface Ticket {
   created_at: string;
 }
 
+export interface TicketFilters {
+  urgency?: string;
+  created_after?: string;
+  created_before?: string;
+}
+
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 export interface ChatMessage {
   id: number;
   ticket_id: number;
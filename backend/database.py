@@ -1,7 +1,9 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 import os
+from uuid import uuid4
 from dotenv import load_dotenv
 from urllib.parse import urlparse, parse_qs
 
@@ -10,6 +12,29 @@ load_dotenv()
 # Get database URL from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Each warm Lambda container keeps its own pool, so default to a tiny one there
+IS_LAMBDA = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+# Pool configuration
+# DB_POOL_MODE:
+#   queue     - regular in-process connection pool (default)
+#   null      - no pooling, open a connection per checkout (e.g. behind RDS Proxy)
+#   pgbouncer - no pooling and no prepared statements, for pgbouncer in transaction mode
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").strip().lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "1" if IS_LAMBDA else "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "2" if IS_LAMBDA else "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300" if IS_LAMBDA else "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_ECHO = _env_bool("DB_ECHO", False)
+
+if DB_POOL_MODE not in ("queue", "null", "pgbouncer"):
+    raise ValueError(f"Invalid DB_POOL_MODE '{DB_POOL_MODE}'. Use queue, null or pgbouncer.")
+
 # Parse the URL to handle SSL mode properly
 parsed_url = urlparse(DATABASE_URL)
 query_params = parse_qs(parsed_url.query)
@@ -18,6 +43,10 @@ query_params = parse_qs(parsed_url.query)
 if 'sslmode' in query_params:
     del query_params['sslmode']
 
+# pgbouncer in transaction mode cannot keep prepared statements across transactions
+statement_cache_size = 0 if DB_POOL_MODE == "pgbouncer" else DB_STATEMENT_CACHE_SIZE
+query_params['prepared_statement_cache_size'] = [str(statement_cache_size)]
+
 # Reconstruct the URL without sslmode
 clean_url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
 if query_params:
@@ -26,13 +55,32 @@ if query_params:
 # For FastAPI (async)
 ASYNC_DATABASE_URL = clean_url.replace("postgresql://", "postgresql+asyncpg://")
 
+connect_args = {
+    "ssl": True
+} if parsed_url.query and 'sslmode' in parse_qs(parsed_url.query) else {}
+connect_args["statement_cache_size"] = statement_cache_size
+
+if DB_POOL_MODE == "pgbouncer":
+    # Unique names so statements never collide on a shared server connection
+    connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+
+if DB_POOL_MODE == "queue":
+    pool_args = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+else:
+    pool_args = {"poolclass": NullPool}
+
 # Create async SQLAlchemy engine with SSL configuration
 async_engine = create_async_engine(
     ASYNC_DATABASE_URL,
-    echo=True,
-    connect_args={
-        "ssl": True
-    } if parsed_url.query and 'sslmode' in parse_qs(parsed_url.query) else {}
+    echo=DB_ECHO,
+    connect_args=connect_args,
+    **pool_args
 )
 
 # Create AsyncSessionLocal class
@@ -51,4 +99,8 @@ async def get_db():
     try:
         yield async_session
     finally:
-        await async_session.close() 
\ No newline at end of file
+        await async_session.close()
+
+async def dispose_engine():
+    """Close all pooled connections (called on application shutdown)."""
+    await async_engine.dispose()
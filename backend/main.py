@@ -8,9 +8,21 @@ from routers.gigs.gigs import router as gigs_router
 from routers.balance import router as balance_router
 from routers.reviews.reviews import router as reviews_router
 from mangum import Mangum
+from database import dispose_engine, IS_LAMBDA
+from utils.outbox import run_dispatcher
+from utils.idempotency import IdempotentReplay, idempotent_replay_handler
+from utils.cache import cache
+import asyncio
+import os
 
 load_dotenv()
 
+# Deliver queued SMS from this process; on Lambda the scheduled
+# OutboxDispatcherFunction does it instead
+OUTBOX_DISPATCHER_ENABLED = os.getenv(
+    "OUTBOX_DISPATCHER_ENABLED", "false" if IS_LAMBDA else "true"
+).strip().lower() in ("1", "true", "yes", "on")
+
 app = FastAPI(
     title="Workly API",
     description="Backend API for the Workly platform",
@@ -28,18 +40,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the validator for conditional GETs
+    expose_headers=["ETag"],
 )
 
+# Replays of requests sent with an already used Idempotency-Key
+app.add_exception_handler(IdempotentReplay, idempotent_replay_handler)
+
 app.include_router(user_router, prefix="/users", tags=["users"])
 app.include_router(user_details_router, prefix="/user-details", tags=["user-details"])
 app.include_router(gigs_router, prefix="/gigs", tags=["gigs"])
 app.include_router(balance_router, prefix="/balance", tags=["balance"])
 app.include_router(reviews_router, prefix="/reviews", tags=["reviews"])
 
+_outbox_task = None
+
+@app.on_event("startup")
+async def startup():
+    global _outbox_task
+    if OUTBOX_DISPATCHER_ENABLED:
+        _outbox_task = asyncio.create_task(run_dispatcher())
+
+@app.on_event("shutdown")
+async def shutdown():
+    if _outbox_task is not None:
+        _outbox_task.cancel()
+        try:
+            await _outbox_task
+        except asyncio.CancelledError:
+            pass
+    # Release pooled connections so Postgres doesn't wait for them to time out
+    await dispose_engine()
+
 @app.get("/", tags=["root"])
 async def read_root():
     return {"message": "Welcome to the Workly API"}
 
+@app.get("/cache/stats", tags=["root"])
+async def read_cache_stats():
+    """Hit/miss counters of the read-through cache in this process."""
+    return cache.stats()
+
 # Lambda handler
 handler = Mangum(app)
 
@@ -0,0 +1,48 @@
+"""added updated_at columns for etags
+
+Revision ID: 0b7d3e9f4a51
+Revises: f1a6d8e2c437
+Create Date: 2026-10-18 13:41:09.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7d3e9f4a51'
+down_revision: Union[str, None] = 'f1a6d8e2c437'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('gigs', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('user_details', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('freelancer_details', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('employer_details', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # Existing rows start at their creation time (gigs) or now (profiles)
+    op.execute("UPDATE gigs SET updated_at = coalesce(created_at, timezone('utc', now()))")
+    op.execute("UPDATE user_details SET updated_at = timezone('utc', now())")
+    op.execute("UPDATE freelancer_details SET updated_at = timezone('utc', now())")
+    op.execute("UPDATE employer_details SET updated_at = timezone('utc', now())")
+    op.execute("UPDATE active_gigs SET updated_at = coalesce(created_at, timezone('utc', now())) WHERE updated_at IS NULL")
+
+    op.create_index('ix_gigs_updated_at', 'gigs', ['updated_at'], unique=False)
+    op.create_index('ix_gigs_employer_updated_at', 'gigs', ['employerClerkId', 'updated_at'], unique=False)
+    op.create_index('ix_active_gigs_employer_updated_at', 'active_gigs', ['employerClerkId', 'updated_at'], unique=False)
+    op.create_index('ix_active_gigs_freelancer_updated_at', 'active_gigs', ['freelancerClerkId', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_active_gigs_freelancer_updated_at', table_name='active_gigs')
+    op.drop_index('ix_active_gigs_employer_updated_at', table_name='active_gigs')
+    op.drop_index('ix_gigs_employer_updated_at', table_name='gigs')
+    op.drop_index('ix_gigs_updated_at', table_name='gigs')
+    op.drop_column('employer_details', 'updated_at')
+    op.drop_column('freelancer_details', 'updated_at')
+    op.drop_column('user_details', 'updated_at')
+    op.drop_column('gigs', 'updated_at')
@@ -0,0 +1,45 @@
+"""added full-text and trigram search indexes on gigs
+
+Revision ID: 3c1f8a2d9e47
+Revises: 50381bb2bed7
+Create Date: 2026-10-18 09:12:31.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f8a2d9e47'
+down_revision: Union[str, None] = '50381bb2bed7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('gigs', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True
+        ),
+        nullable=True
+    ))
+    op.create_index('ix_gigs_search_vector', 'gigs', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_gigs_title_trgm', 'gigs', ['title'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_gigs_description_trgm', 'gigs', ['description'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_gigs_description_trgm', table_name='gigs')
+    op.drop_index('ix_gigs_title_trgm', table_name='gigs')
+    op.drop_index('ix_gigs_search_vector', table_name='gigs')
+    op.drop_column('gigs', 'search_vector')
@@ -0,0 +1,43 @@
+"""added freelancer rating aggregate
+
+Revision ID: 4e9a2c7b1d83
+Revises: 0b7d3e9f4a51
+Create Date: 2026-10-18 14:06:52.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e9a2c7b1d83'
+down_revision: Union[str, None] = '0b7d3e9f4a51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('freelancer_details', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('freelancer_details', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Seed the totals from existing reviews (scripts/backfill_ratings.py does the same later)
+    op.execute("""
+        UPDATE freelancer_details AS fd
+        SET rating_sum = totals.rating_sum,
+            rating_count = totals.rating_count,
+            "averageRating" = round(totals.rating_sum::numeric / totals.rating_count, 1)
+        FROM (
+            SELECT freelancer_clerk_id, sum(rating) AS rating_sum, count(rating) AS rating_count
+            FROM reviews
+            GROUP BY freelancer_clerk_id
+            HAVING count(rating) > 0
+        ) AS totals
+        WHERE fd."clerkId" = totals.freelancer_clerk_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('freelancer_details', 'rating_count')
+    op.drop_column('freelancer_details', 'rating_sum')
@@ -0,0 +1,57 @@
+"""added review indexes and rating counts
+
+Revision ID: 6c3f8d1a5e92
+Revises: 4e9a2c7b1d83
+Create Date: 2026-10-18 14:32:17.480365
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c3f8d1a5e92'
+down_revision: Union[str, None] = '4e9a2c7b1d83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reviews_freelancer_created_at_id', 'reviews', ['freelancer_clerk_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_reviews_employer_created_at_id', 'reviews', ['employer_clerk_id', 'created_at', 'id'], unique=False)
+
+    op.create_table('freelancer_rating_counts',
+    sa.Column('freelancer_clerk_id', sa.String(), nullable=False),
+    sa.Column('stars_1', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('stars_2', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('stars_3', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('stars_4', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('stars_5', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['freelancer_clerk_id'], ['users.clerkId'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('freelancer_clerk_id')
+    )
+
+    # Seed the histograms from existing reviews
+    op.execute("""
+        INSERT INTO freelancer_rating_counts
+            (freelancer_clerk_id, stars_1, stars_2, stars_3, stars_4, stars_5, updated_at)
+        SELECT freelancer_clerk_id,
+               count(*) FILTER (WHERE rating = 1),
+               count(*) FILTER (WHERE rating = 2),
+               count(*) FILTER (WHERE rating = 3),
+               count(*) FILTER (WHERE rating = 4),
+               count(*) FILTER (WHERE rating = 5),
+               timezone('utc', now())
+        FROM reviews
+        WHERE freelancer_clerk_id IS NOT NULL
+        GROUP BY freelancer_clerk_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('freelancer_rating_counts')
+    op.drop_index('ix_reviews_employer_created_at_id', table_name='reviews')
+    op.drop_index('ix_reviews_freelancer_created_at_id', table_name='reviews')
@@ -0,0 +1,38 @@
+"""added keyset pagination indexes
+
+Revision ID: 7b2e4f9c1a63
+Revises: 3c1f8a2d9e47
+Create Date: 2026-10-18 10:03:47.215630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4f9c1a63'
+down_revision: Union[str, None] = '3c1f8a2d9e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_gigs_status_created_at_id', 'gigs', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_gigs_employer_created_at_id', 'gigs', ['employerClerkId', 'created_at', 'id'], unique=False)
+    op.create_index('ix_gig_requests_gig_created_at_id', 'gig_requests', ['gig_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_gig_requests_freelancer_created_at_id', 'gig_requests', ['freelancerClerkId', 'created_at', 'id'], unique=False)
+    op.create_index('ix_gig_requests_employer_status_created_at_id', 'gig_requests', ['employerClerkId', 'status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_active_gigs_employer_created_at_id', 'active_gigs', ['employerClerkId', 'created_at', 'id'], unique=False)
+    op.create_index('ix_active_gigs_freelancer_created_at_id', 'active_gigs', ['freelancerClerkId', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_active_gigs_freelancer_created_at_id', table_name='active_gigs')
+    op.drop_index('ix_active_gigs_employer_created_at_id', table_name='active_gigs')
+    op.drop_index('ix_gig_requests_employer_status_created_at_id', table_name='gig_requests')
+    op.drop_index('ix_gig_requests_freelancer_created_at_id', table_name='gig_requests')
+    op.drop_index('ix_gig_requests_gig_created_at_id', table_name='gig_requests')
+    op.drop_index('ix_gigs_employer_created_at_id', table_name='gigs')
+    op.drop_index('ix_gigs_status_created_at_id', table_name='gigs')
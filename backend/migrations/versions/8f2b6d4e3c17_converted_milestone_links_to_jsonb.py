@@ -0,0 +1,47 @@
+"""converted milestone links to jsonb
+
+Revision ID: 8f2b6d4e3c17
+Revises: 6c3f8d1a5e92
+Create Date: 2026-10-18 14:58:40.127593
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2b6d4e3c17'
+down_revision: Union[str, None] = '6c3f8d1a5e92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Older submissions stored the links dict double-encoded as a JSON string;
+    # unwrap those while converting so every row holds a real object
+    op.alter_column('active_gigs', 'milestone_links',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(astext_type=sa.Text()),
+               existing_nullable=True,
+               postgresql_using="""
+                   CASE
+                       WHEN json_typeof(milestone_links) = 'string' THEN (milestone_links #>> '{}')::jsonb
+                       ELSE milestone_links::jsonb
+                   END
+               """)
+    op.execute("""
+        UPDATE active_gigs
+        SET milestone_links = '{}'::jsonb
+        WHERE milestone_links IS NULL OR jsonb_typeof(milestone_links) <> 'object'
+    """)
+
+
+def downgrade() -> None:
+    op.alter_column('active_gigs', 'milestone_links',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               type_=sa.JSON(),
+               existing_nullable=True,
+               postgresql_using='milestone_links::json')
@@ -0,0 +1,28 @@
+"""added GIN indexes on skill arrays
+
+Revision ID: 9d4a6c2e8f15
+Revises: 7b2e4f9c1a63
+Create Date: 2026-10-18 10:41:09.837254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4a6c2e8f15'
+down_revision: Union[str, None] = '7b2e4f9c1a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_gigs_skills_needed', 'gigs', ['skills_needed'], unique=False, postgresql_using='gin')
+    op.create_index('ix_freelancer_details_skills', 'freelancer_details', ['skills'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_freelancer_details_skills', table_name='freelancer_details')
+    op.drop_index('ix_gigs_skills_needed', table_name='gigs')
@@ -0,0 +1,101 @@
+"""added milestones table
+
+Revision ID: a3d5f7b9c2e4
+Revises: 8f2b6d4e3c17
+Create Date: 2026-10-18 15:27:03.915482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d5f7b9c2e4'
+down_revision: Union[str, None] = '8f2b6d4e3c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('milestones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('gig_id', sa.Integer(), nullable=False),
+    sa.Column('index', sa.Integer(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('status', sa.String(), server_default='PENDING', nullable=False),
+    sa.Column('submitted_at', sa.DateTime(), nullable=True),
+    sa.Column('approved_at', sa.DateTime(), nullable=True),
+    sa.Column('active_gig_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['active_gig_id'], ['active_gigs.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['gig_id'], ['gigs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('gig_id', 'index', name='uq_milestones_gig_index')
+    )
+    op.create_index('ix_milestones_active_gig_id', 'milestones', ['active_gig_id'], unique=False)
+
+    # One row per array element. State comes from the gig's newest active gig
+    # that wasn't terminated; the exact submit/approve times weren't recorded,
+    # so the active gig's updated_at stands in for them.
+    op.execute("""
+        INSERT INTO milestones (gig_id, index, description, amount, status, submitted_at, approved_at, active_gig_id)
+        SELECT g.id,
+               m.ordinality - 1,
+               m.description,
+               g.milestone_payments[m.ordinality],
+               coalesce(ag.milestone_status[m.ordinality], 'PENDING'),
+               CASE WHEN ag.milestone_links ? (m.ordinality - 1)::text THEN ag.updated_at END,
+               CASE WHEN ag.milestone_status[m.ordinality] = 'APPROVED' THEN ag.updated_at END,
+               ag.id
+        FROM gigs AS g
+        CROSS JOIN LATERAL unnest(g.milestones) WITH ORDINALITY AS m(description, ordinality)
+        LEFT JOIN LATERAL (
+            SELECT id, milestone_status, milestone_links, updated_at
+            FROM active_gigs
+            WHERE active_gigs.gig_id = g.id AND coalesce(active_gigs.status, 'ACTIVE') <> 'TERMINATED'
+            ORDER BY id DESC
+            LIMIT 1
+        ) AS ag ON true
+    """)
+
+    # active_gigs.milestone_status now only holds the frozen statuses of
+    # active gigs whose milestones are no longer theirs
+    op.execute("""
+        UPDATE active_gigs
+        SET milestone_status = NULL
+        WHERE id IN (SELECT active_gig_id FROM milestones WHERE active_gig_id IS NOT NULL)
+    """)
+
+    op.drop_column('gigs', 'milestone_payments')
+    op.drop_column('gigs', 'milestones')
+
+
+def downgrade() -> None:
+    op.add_column('gigs', sa.Column('milestones', postgresql.ARRAY(sa.String()), nullable=True))
+    op.add_column('gigs', sa.Column('milestone_payments', postgresql.ARRAY(sa.Float()), nullable=True))
+    op.execute("""
+        UPDATE gigs
+        SET milestones = agg.descriptions, milestone_payments = agg.amounts
+        FROM (
+            SELECT gig_id, array_agg(description ORDER BY index) AS descriptions, array_agg(amount ORDER BY index) AS amounts
+            FROM milestones
+            GROUP BY gig_id
+        ) AS agg
+        WHERE gigs.id = agg.gig_id
+    """)
+    op.execute("""
+        UPDATE active_gigs
+        SET milestone_status = agg.statuses
+        FROM (
+            SELECT active_gig_id, array_agg(status ORDER BY index) AS statuses
+            FROM milestones
+            WHERE active_gig_id IS NOT NULL
+            GROUP BY active_gig_id
+        ) AS agg
+        WHERE active_gigs.id = agg.active_gig_id AND active_gigs.milestone_status IS NULL
+    """)
+    op.drop_index('ix_milestones_active_gig_id', table_name='milestones')
+    op.drop_table('milestones')
@@ -0,0 +1,39 @@
+"""added gig recommendations table
+
+Revision ID: a5e81b3f7c20
+Revises: 9d4a6c2e8f15
+Create Date: 2026-10-18 11:26:54.190482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5e81b3f7c20'
+down_revision: Union[str, None] = '9d4a6c2e8f15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('gig_recommendations',
+    sa.Column('freelancer_clerk_id', sa.String(), nullable=False),
+    sa.Column('gig_id', sa.Integer(), nullable=False),
+    sa.Column('skill_score', sa.Float(), nullable=True),
+    sa.Column('payment_score', sa.Float(), nullable=True),
+    sa.Column('recency_score', sa.Float(), nullable=True),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['freelancer_clerk_id'], ['users.clerkId'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['gig_id'], ['gigs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('freelancer_clerk_id', 'gig_id')
+    )
+    op.create_index('ix_gig_recommendations_freelancer_score', 'gig_recommendations', ['freelancer_clerk_id', 'score', 'gig_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_gig_recommendations_freelancer_score', table_name='gig_recommendations')
+    op.drop_table('gig_recommendations')
@@ -0,0 +1,30 @@
+"""rekeyed milestone review queue index
+
+Revision ID: a9e4c2f6b810
+Revises: f7d1a4c9e385
+Create Date: 2026-10-18 19:12:47.508163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e4c2f6b810'
+down_revision: Union[str, None] = 'f7d1a4c9e385'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_milestones_awaiting_review', table_name='milestones', postgresql_where=sa.text('submitted_at IS NOT NULL AND approved_at IS NULL'))
+    op.create_index('ix_milestones_awaiting_review', 'milestones', ['submitted_at', 'id'], unique=False, postgresql_include=['active_gig_id'], postgresql_where=sa.text('submitted_at IS NOT NULL AND approved_at IS NULL'))
+    op.create_index('ix_active_gigs_employer_status', 'active_gigs', ['employerClerkId', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_active_gigs_employer_status', table_name='active_gigs')
+    op.drop_index('ix_milestones_awaiting_review', table_name='milestones', postgresql_where=sa.text('submitted_at IS NOT NULL AND approved_at IS NULL'))
+    op.create_index('ix_milestones_awaiting_review', 'milestones', ['active_gig_id', 'submitted_at', 'id'], unique=False, postgresql_where=sa.text('submitted_at IS NOT NULL AND approved_at IS NULL'))
@@ -0,0 +1,26 @@
+"""added milestone review queue index
+
+Revision ID: b6e1c4a8d053
+Revises: a3d5f7b9c2e4
+Create Date: 2026-10-18 15:49:26.338710
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1c4a8d053'
+down_revision: Union[str, None] = 'a3d5f7b9c2e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_milestones_awaiting_review', 'milestones', ['active_gig_id', 'submitted_at', 'id'], unique=False, postgresql_where=sa.text('submitted_at IS NOT NULL AND approved_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_milestones_awaiting_review', table_name='milestones', postgresql_where=sa.text('submitted_at IS NOT NULL AND approved_at IS NULL'))
@@ -0,0 +1,42 @@
+"""added notification outbox table
+
+Revision ID: c2d7e9a4b816
+Revises: a5e81b3f7c20
+Create Date: 2026-10-18 12:04:37.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d7e9a4b816'
+down_revision: Union[str, None] = 'a5e81b3f7c20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('notification_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('channel', sa.String(), nullable=True),
+    sa.Column('recipient', sa.String(), nullable=True),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_notification_outbox_id'), 'notification_outbox', ['id'], unique=False)
+    op.create_index('ix_notification_outbox_pending', 'notification_outbox', ['next_attempt_at', 'id'], unique=False, postgresql_where=sa.text("status = 'PENDING'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_outbox_pending', table_name='notification_outbox', postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_index(op.f('ix_notification_outbox_id'), table_name='notification_outbox')
+    op.drop_table('notification_outbox')
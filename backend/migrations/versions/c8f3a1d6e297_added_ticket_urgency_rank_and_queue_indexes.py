@@ -0,0 +1,38 @@
+"""added ticket urgency rank and queue indexes
+
+Revision ID: c8f3a1d6e297
+Revises: b6e1c4a8d053
+Create Date: 2026-10-18 16:12:04.518233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f3a1d6e297'
+down_revision: Union[str, None] = 'b6e1c4a8d053'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tickets', sa.Column(
+        'urgency_rank',
+        sa.SmallInteger(),
+        sa.Computed(
+            "CASE lower(urgency) WHEN 'high' THEN 0 WHEN 'medium' THEN 1 WHEN 'low' THEN 2 ELSE 3 END",
+            persisted=True
+        ),
+        nullable=True
+    ))
+    op.create_index('ix_tickets_status_urgency_rank_created_at_id', 'tickets', ['status', 'urgency_rank', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_urgency_rank_created_at_id', 'tickets', ['urgency_rank', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tickets_urgency_rank_created_at_id', table_name='tickets')
+    op.drop_index('ix_tickets_status_urgency_rank_created_at_id', table_name='tickets')
+    op.drop_column('tickets', 'urgency_rank')
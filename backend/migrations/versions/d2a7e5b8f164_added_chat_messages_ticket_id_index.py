@@ -0,0 +1,26 @@
+"""added chat messages ticket id index
+
+Revision ID: d2a7e5b8f164
+Revises: c8f3a1d6e297
+Create Date: 2026-10-18 16:31:47.092615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7e5b8f164'
+down_revision: Union[str, None] = 'c8f3a1d6e297'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_chat_messages_ticket_id_id', 'chat_messages', ['ticket_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_messages_ticket_id_id', table_name='chat_messages')
@@ -0,0 +1,45 @@
+"""added chat message notify trigger
+
+Revision ID: e5c9b3f7a218
+Revises: d2a7e5b8f164
+Create Date: 2026-10-18 16:54:12.730448
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c9b3f7a218'
+down_revision: Union[str, None] = 'd2a7e5b8f164'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Notify listeners of every new chat message when its transaction commits.
+    # The payload carries only ids (NOTIFY payloads are capped at 8000 bytes);
+    # listeners read the row itself.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_chat_message() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify(
+                'chat_messages',
+                json_build_object('id', NEW.id, 'ticket_id', NEW.ticket_id)::text
+            );
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER chat_messages_notify
+        AFTER INSERT ON chat_messages
+        FOR EACH ROW EXECUTE FUNCTION notify_chat_message()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS chat_messages_notify ON chat_messages")
+    op.execute("DROP FUNCTION IF EXISTS notify_chat_message()")
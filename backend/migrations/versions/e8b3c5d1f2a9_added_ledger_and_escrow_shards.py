@@ -0,0 +1,102 @@
+"""added ledger entries and escrow shards
+
+Revision ID: e8b3c5d1f2a9
+Revises: c2d7e9a4b816
+Create Date: 2026-10-18 12:41:09.306512
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3c5d1f2a9'
+down_revision: Union[str, None] = 'c2d7e9a4b816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ESCROW_SHARDS = int(os.getenv("ESCROW_SHARDS", "8"))
+
+
+def upgrade() -> None:
+    op.create_table('ledger_entries',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('transaction_key', sa.String(), nullable=False),
+    sa.Column('account', sa.String(), nullable=False),
+    sa.Column('amount_minor', sa.BigInteger(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('transaction_key', 'account', name='uq_ledger_entries_transaction_account')
+    )
+    op.create_index(op.f('ix_ledger_entries_id'), 'ledger_entries', ['id'], unique=False)
+    op.create_index('ix_ledger_entries_account_id', 'ledger_entries', ['account', 'id'], unique=False)
+
+    # Balances move from float amounts to integer minor units
+    op.add_column('balances', sa.Column('amount_minor', sa.BigInteger(), server_default='0', nullable=False))
+    op.execute("UPDATE balances SET amount_minor = round(coalesce(amount, 0) * 100)")
+    op.drop_column('balances', 'amount')
+
+    # Fold the single company balance row into shard 1 and create the other shards
+    op.add_column('company_balance', sa.Column('amount_minor', sa.BigInteger(), server_default='0', nullable=False))
+    conn = op.get_bind()
+    company_total = conn.execute(
+        sa.text("SELECT coalesce(sum(round(coalesce(amount, 0) * 100)), 0) FROM company_balance")
+    ).scalar()
+    op.execute("DELETE FROM company_balance")
+    op.drop_column('company_balance', 'amount')
+    conn.execute(
+        sa.text("""
+            INSERT INTO company_balance (id, amount_minor, last_updated)
+            SELECT shard, CASE WHEN shard = 1 THEN :total ELSE 0 END, timezone('utc', now())
+            FROM generate_series(1, :shards) AS shard
+        """),
+        {"total": int(company_total), "shards": ESCROW_SHARDS}
+    )
+
+    # Opening entries so the ledger sums to the migrated balances
+    op.execute("""
+        INSERT INTO ledger_entries (transaction_key, account, amount_minor, description, created_at)
+        SELECT 'opening-balance', account, amount_minor, 'Opening balance', timezone('utc', now())
+        FROM (
+            SELECT 'user:' || "clerkId" AS account, amount_minor FROM balances WHERE amount_minor <> 0
+            UNION ALL
+            SELECT 'escrow:' || id, amount_minor FROM company_balance WHERE amount_minor <> 0
+        ) AS opening
+    """)
+    op.execute("""
+        INSERT INTO ledger_entries (transaction_key, account, amount_minor, description, created_at)
+        SELECT 'opening-balance', 'external', -sum(amount_minor), 'Opening balance', timezone('utc', now())
+        FROM ledger_entries
+        WHERE transaction_key = 'opening-balance'
+        HAVING sum(amount_minor) <> 0
+    """)
+
+
+def downgrade() -> None:
+    op.add_column('company_balance', sa.Column('amount', sa.Float(), nullable=True))
+    conn = op.get_bind()
+    company_total = conn.execute(
+        sa.text("SELECT coalesce(sum(amount_minor), 0) FROM company_balance")
+    ).scalar()
+    op.execute("DELETE FROM company_balance WHERE id <> 1")
+    conn.execute(
+        sa.text("""
+            INSERT INTO company_balance (id, amount, amount_minor, last_updated)
+            VALUES (1, :total / 100.0, 0, timezone('utc', now()))
+            ON CONFLICT (id) DO UPDATE SET amount = EXCLUDED.amount
+        """),
+        {"total": int(company_total)}
+    )
+    op.drop_column('company_balance', 'amount_minor')
+
+    op.add_column('balances', sa.Column('amount', sa.Float(), nullable=True))
+    op.execute("UPDATE balances SET amount = amount_minor / 100.0")
+    op.drop_column('balances', 'amount_minor')
+
+    op.drop_index('ix_ledger_entries_account_id', table_name='ledger_entries')
+    op.drop_index(op.f('ix_ledger_entries_id'), table_name='ledger_entries')
+    op.drop_table('ledger_entries')
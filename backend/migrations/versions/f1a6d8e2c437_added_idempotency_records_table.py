@@ -0,0 +1,37 @@
+"""added idempotency records table
+
+Revision ID: f1a6d8e2c437
+Revises: e8b3c5d1f2a9
+Create Date: 2026-10-18 13:02:45.771904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a6d8e2c437'
+down_revision: Union[str, None] = 'e8b3c5d1f2a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('idempotency_records',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('request_hash', sa.String(), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key', 'scope')
+    )
+    op.create_index('ix_idempotency_records_expires_at', 'idempotency_records', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_idempotency_records_expires_at', table_name='idempotency_records')
+    op.drop_table('idempotency_records')
@@ -0,0 +1,30 @@
+"""added notification outbox claim lease
+
+Revision ID: f7d1a4c9e385
+Revises: e5c9b3f7a218
+Create Date: 2026-10-18 17:20:41.663108
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7d1a4c9e385'
+down_revision: Union[str, None] = 'e5c9b3f7a218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notification_outbox', sa.Column('locked_until', sa.DateTime(), nullable=True))
+    op.create_index('ix_notification_outbox_sending', 'notification_outbox', ['locked_until'], unique=False, postgresql_where=sa.text("status = 'SENDING'"))
+
+
+def downgrade() -> None:
+    # Rows claimed by a dispatcher go back to the queue
+    op.execute("UPDATE notification_outbox SET status = 'PENDING' WHERE status = 'SENDING'")
+    op.drop_index('ix_notification_outbox_sending', table_name='notification_outbox', postgresql_where=sa.text("status = 'SENDING'"))
+    op.drop_column('notification_outbox', 'locked_until')
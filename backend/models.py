@@ -1,4 +1,5 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Float, Table, ARRAY, Text, JSON, Boolean
+from sqlalchemy import Column, ForeignKey, Integer, BigInteger, SmallInteger, String, DateTime, Float, Table, Text, JSON, Boolean, Computed, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -7,17 +8,30 @@ from sqlalchemy.types import TypeDecorator
 
 # Custom JSON type to ensure proper serialization/deserialization
 class JSONDict(TypeDecorator):
-    impl = JSON
+    """
+    JSONB object column. Rows written before the column became JSONB may hold
+    the object double-encoded as a JSON string; those are decoded here, so
+    callers always get a dict.
+    """
+    impl = JSONB
+    cache_ok = True
     
-    def process_bind_param(self, value, dialect):
+    @staticmethod
+    def _decode(value):
         if value is None:
             return {}
-        return value
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return {}
+        return value if isinstance(value, dict) else {}
+    
+    def process_bind_param(self, value, dialect):
+        return self._decode(value)
     
     def process_result_value(self, value, dialect):
-        if value is None:
-            return {}
-        return value
+        return self._decode(value)
 
 # SQLAlchemy Base
 Base = declarative_base()
@@ -56,6 +70,8 @@ class UserDetails(Base):
     address = Column(String, nullable=True)
     bio = Column(String, nullable=True)
     profilePicture = Column(String, nullable=True)
+    # Version of the profile, used for its ETag
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship
     user = relationship("User", back_populates="user_details")
@@ -68,12 +84,22 @@ class FreelancerDetails(Base):
     clerkId = Column(String, ForeignKey("users.clerkId"), unique=True)
     occupation = Column(String)
     skills = Column(ARRAY(String))  # List of skills
-    averageRating = Column(Float, default=0.0)
+    averageRating = Column(Float, default=0.0)  # Derived from rating_sum / rating_count
+    # Running totals over the freelancer's reviews, updated per review (see utils/ratings.py)
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
     portfolioLinks = Column(ARRAY(String))  # List of portfolio links
+    # Version of the profile, used for its ETag
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship
     user = relationship("User", back_populates="freelancer_details")
 
+    __table_args__ = (
+        # Array containment/overlap lookups for skill matching
+        Index("ix_freelancer_details_skills", "skills", postgresql_using="gin"),
+    )
+
 # EmployerDetails Model
 class EmployerDetails(Base):
     __tablename__ = "employer_details"
@@ -81,6 +107,8 @@ class EmployerDetails(Base):
     id = Column(Integer, primary_key=True, index=True)
     clerkId = Column(String, ForeignKey("users.clerkId"), unique=True)
     worksNeeded = Column(ARRAY(String))  # List of works/skills needed
+    # Version of the profile, used for its ETag
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship
     user = relationship("User", back_populates="employer_details")
@@ -94,17 +122,90 @@ class Gig(Base):
     description = Column(Text)
     skills_needed = Column(ARRAY(String))  # List of skills as tags
     project_deadline = Column(DateTime)
-    milestones = Column(ARRAY(String))  # List of milestone descriptions
-    milestone_payments = Column(ARRAY(Float))  # List of payments for each milestone
     total_payment = Column(Float)
     status = Column(String, default="OPEN")  # OPEN, CLOSED
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     employerClerkId = Column(String, ForeignKey("users.clerkId"))
+    # Weighted full-text document (title ranks above description), maintained by Postgres
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True
+        )
+    )
     
     # Relationships
     employer = relationship("User", back_populates="gigs")
     gig_requests = relationship("GigRequest", back_populates="gig")
     active_gigs = relationship("ActiveGig", back_populates="gig")
+    # Loaded with every gig query so the list properties below need no extra await
+    milestone_rows = relationship(
+        "Milestone",
+        back_populates="gig",
+        order_by="Milestone.index",
+        lazy="selectin",
+        cascade="all, delete-orphan"
+    )
+
+    @property
+    def milestones(self):
+        """List of milestone descriptions, in order"""
+        return [milestone.description for milestone in self.milestone_rows]
+
+    @property
+    def milestone_payments(self):
+        """List of payments for each milestone, in order"""
+        return [milestone.amount for milestone in self.milestone_rows]
+
+    __table_args__ = (
+        Index("ix_gigs_search_vector", "search_vector", postgresql_using="gin"),
+        # Array containment/overlap lookups for skill matching
+        Index("ix_gigs_skills_needed", "skills_needed", postgresql_using="gin"),
+        Index("ix_gigs_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_gigs_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+        # Keyset pagination on (created_at, id)
+        Index("ix_gigs_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_gigs_employer_created_at_id", "employerClerkId", "created_at", "id"),
+        # Newest change for the Last-Modified of gig lists
+        Index("ix_gigs_updated_at", "updated_at"),
+        Index("ix_gigs_employer_updated_at", "employerClerkId", "updated_at"),
+    )
+
+# Milestone Model
+class Milestone(Base):
+    __tablename__ = "milestones"
+
+    id = Column(Integer, primary_key=True)
+    gig_id = Column(Integer, ForeignKey("gigs.id", ondelete="CASCADE"), nullable=False)
+    index = Column(Integer, nullable=False)  # 0-based position within the gig
+    description = Column(Text)
+    amount = Column(Float)
+    # State for the active gig currently working on the gig (active_gig_id)
+    status = Column(String, nullable=False, default="PENDING", server_default="PENDING")  # PENDING, APPROVED
+    submitted_at = Column(DateTime, nullable=True)
+    approved_at = Column(DateTime, nullable=True)
+    active_gig_id = Column(Integer, ForeignKey("active_gigs.id", ondelete="SET NULL"), nullable=True)
+
+    # Relationships
+    gig = relationship("Gig", back_populates="milestone_rows")
+    active_gig = relationship("ActiveGig")
+
+    __table_args__ = (
+        UniqueConstraint("gig_id", "index", name="uq_milestones_gig_index"),
+        Index("ix_milestones_active_gig_id", "active_gig_id"),
+        # Only submissions awaiting approval are indexed, for the employer review queue:
+        # read in (submitted_at, id) order and matched against the employer's
+        # active gigs (ix_active_gigs_employer_status) without visiting the table
+        Index(
+            "ix_milestones_awaiting_review",
+            "submitted_at", "id",
+            postgresql_include=["active_gig_id"],
+            postgresql_where=text("submitted_at IS NOT NULL AND approved_at IS NULL")
+        ),
+    )
 
 # GigRequest Model
 class GigRequest(Base):
@@ -123,6 +224,13 @@ class GigRequest(Base):
     freelancer = relationship("User", back_populates="gig_requests", foreign_keys=[freelancerClerkId])
     employer = relationship("User", back_populates="employer_requests", foreign_keys=[employerClerkId])
 
+    __table_args__ = (
+        # Keyset pagination on (created_at, id)
+        Index("ix_gig_requests_gig_created_at_id", "gig_id", "created_at", "id"),
+        Index("ix_gig_requests_freelancer_created_at_id", "freelancerClerkId", "created_at", "id"),
+        Index("ix_gig_requests_employer_status_created_at_id", "employerClerkId", "status", "created_at", "id"),
+    )
+
 # ActiveGig Model
 class ActiveGig(Base):
     __tablename__ = "active_gigs"
@@ -132,7 +240,9 @@ class ActiveGig(Base):
     freelancerClerkId = Column(String, ForeignKey("users.clerkId"), index=True)
     employerClerkId = Column(String, ForeignKey("users.clerkId"), index=True)
     contract_address = Column(String, index=True)
-    milestone_status = Column(ARRAY(String))  # List of statuses for each milestone: PENDING, APPROVED
+    # Statuses frozen when the gig is terminated, since its milestones are
+    # reused if the gig is accepted again; NULL while the gig's milestone rows apply
+    final_milestone_status = Column("milestone_status", ARRAY(String), nullable=True)
     milestone_links = Column(JSONDict, default={})  # Dictionary of links for each milestone submission
     status = Column(String, default="ACTIVE")  # ACTIVE, TERMINATED, COMPLETED
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -142,6 +252,35 @@ class ActiveGig(Base):
     gig = relationship("Gig", back_populates="active_gigs")
     freelancer = relationship("User", back_populates="active_gigs_freelancer", foreign_keys=[freelancerClerkId])
     employer = relationship("User", back_populates="active_gigs_employer", foreign_keys=[employerClerkId])
+    # The gig's milestones, loaded with every active gig query
+    milestone_rows = relationship(
+        "Milestone",
+        primaryjoin="ActiveGig.gig_id == foreign(Milestone.gig_id)",
+        order_by="Milestone.index",
+        lazy="selectin",
+        viewonly=True
+    )
+
+    @property
+    def milestone_status(self):
+        """List of statuses for each milestone: PENDING, APPROVED"""
+        if self.final_milestone_status is not None:
+            return list(self.final_milestone_status)
+        return [
+            milestone.status if milestone.active_gig_id == self.id else "PENDING"
+            for milestone in self.milestone_rows
+        ]
+
+    __table_args__ = (
+        # Keyset pagination on (created_at, id)
+        Index("ix_active_gigs_employer_created_at_id", "employerClerkId", "created_at", "id"),
+        Index("ix_active_gigs_freelancer_created_at_id", "freelancerClerkId", "created_at", "id"),
+        # Newest change for the Last-Modified of active gig lists
+        Index("ix_active_gigs_employer_updated_at", "employerClerkId", "updated_at"),
+        Index("ix_active_gigs_freelancer_updated_at", "freelancerClerkId", "updated_at"),
+        # An employer's active gigs, for the milestone review queue
+        Index("ix_active_gigs_employer_status", "employerClerkId", "status"),
+    )
 
 # Balance Model
 class Balance(Base):
@@ -149,19 +288,112 @@ class Balance(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     clerkId = Column(String, ForeignKey("users.clerkId"), unique=True)
-    amount = Column(Float, default=0.0)
+    # Cached running sum of the user's ledger entries, in minor units (cents).
+    # Only written through utils/ledger.py; rebuild with scripts/rebuild_balances.py
+    amount_minor = Column(BigInteger, nullable=False, default=0, server_default="0")
     
     # Relationship
     user = relationship("User", back_populates="balance")
 
+    @property
+    def amount(self):
+        return (self.amount_minor or 0) / 100
+
 # CompanyBalance Model
 class CompanyBalance(Base):
     __tablename__ = "company_balance"
 
+    # Each row is one shard (1..ESCROW_SHARDS) of the platform escrow account,
+    # so concurrent payments for different gigs don't contend on a single row.
+    # The company balance is the sum of all shards.
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, default=0.0)
+    amount_minor = Column(BigInteger, nullable=False, default=0, server_default="0")
     last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    @property
+    def amount(self):
+        return (self.amount_minor or 0) / 100
+
+# LedgerEntry Model
+class LedgerEntry(Base):
+    __tablename__ = "ledger_entries"
+
+    # Append-only. Every money movement is a transaction of two or more entries
+    # that sum to zero; amounts are in minor units (cents), positive = credit
+    id = Column(BigInteger, primary_key=True, index=True)
+    transaction_key = Column(String, nullable=False)  # Idempotency key shared by a transaction's entries
+    account = Column(String, nullable=False)  # user:<clerkId>, escrow:<shard> or external
+    amount_minor = Column(BigInteger, nullable=False)
+    description = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Posting the same transaction twice is a no-op
+        UniqueConstraint("transaction_key", "account", name="uq_ledger_entries_transaction_account"),
+        Index("ix_ledger_entries_account_id", "account", "id"),
+    )
+
+# GigRecommendation Model
+class GigRecommendation(Base):
+    __tablename__ = "gig_recommendations"
+
+    freelancer_clerk_id = Column(String, ForeignKey("users.clerkId", ondelete="CASCADE"), primary_key=True)
+    gig_id = Column(Integer, ForeignKey("gigs.id", ondelete="CASCADE"), primary_key=True)
+    skill_score = Column(Float, default=0.0)  # Share of the gig's skills the freelancer has
+    payment_score = Column(Float, default=0.0)  # Log-scaled total payment, 0-1
+    recency_score = Column(Float, default=0.0)  # Exponential decay on gig age, 0-1
+    score = Column(Float, default=0.0)  # Weighted combination used for ordering
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship
+    gig = relationship("Gig")
+
+    __table_args__ = (
+        Index("ix_gig_recommendations_freelancer_score", "freelancer_clerk_id", "score", "gig_id"),
+    )
+
+# NotificationOutbox Model
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel = Column(String, default="SMS")
+    recipient = Column(String)
+    message = Column(Text)
+    status = Column(String, default="PENDING")  # PENDING, SENDING, SENT, FAILED
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    # End of a dispatcher's claim on a SENDING row; expired claims become PENDING again
+    locked_until = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Only undelivered rows are indexed, so the dispatcher's poll stays cheap
+        Index("ix_notification_outbox_pending", "next_attempt_at", "id", postgresql_where=text("status = 'PENDING'")),
+        Index("ix_notification_outbox_sending", "locked_until", postgresql_where=text("status = 'SENDING'")),
+    )
+
+# IdempotencyRecord Model
+class IdempotencyRecord(Base):
+    __tablename__ = "idempotency_records"
+
+    # Inserted at the start of the request's transaction and filled with the
+    # response before it commits, so a retry either waits for the original
+    # request or replays its stored response
+    key = Column(String, primary_key=True)  # Idempotency-Key header sent by the client
+    scope = Column(String, primary_key=True)  # Endpoint the key was used with
+    request_hash = Column(String, nullable=False)  # SHA-256 of method, path, query and body
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_idempotency_records_expires_at", "expires_at"),
+    )
+
 # Review Model
 class Review(Base):
     __tablename__ = "reviews"
@@ -178,6 +410,25 @@ class Review(Base):
     employer = relationship("User", foreign_keys=[employer_clerk_id], backref="reviews_given")
     freelancer = relationship("User", foreign_keys=[freelancer_clerk_id], backref="reviews_received") 
 
+    __table_args__ = (
+        # Keyset pagination on (created_at, id)
+        Index("ix_reviews_freelancer_created_at_id", "freelancer_clerk_id", "created_at", "id"),
+        Index("ix_reviews_employer_created_at_id", "employer_clerk_id", "created_at", "id"),
+    )
+
+# FreelancerRatingCounts Model
+class FreelancerRatingCounts(Base):
+    __tablename__ = "freelancer_rating_counts"
+
+    # Star histogram per freelancer, incremented with each review (see utils/ratings.py)
+    freelancer_clerk_id = Column(String, ForeignKey("users.clerkId", ondelete="CASCADE"), primary_key=True)
+    stars_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_5 = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
@@ -191,6 +442,11 @@ class ChatMessage(Base):
     ticket = relationship('Ticket', backref='messages')
     sender = relationship('User', back_populates='messages')
 
+    __table_args__ = (
+        # Chat history cursors (after_id / before_id) within a ticket
+        Index("ix_chat_messages_ticket_id_id", "ticket_id", "id"),
+    )
+
 class Ticket(Base):
     __tablename__ = "tickets"
     
@@ -201,5 +457,19 @@ class Ticket(Base):
     urgency = Column(String(10), default='medium')
     created_by = Column(String, ForeignKey('users.clerkId'))
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Sort position of urgency (high first), maintained by Postgres
+    urgency_rank = Column(
+        SmallInteger,
+        Computed(
+            "CASE lower(urgency) WHEN 'high' THEN 0 WHEN 'medium' THEN 1 WHEN 'low' THEN 2 ELSE 3 END",
+            persisted=True
+        )
+    )
     
-    creator = relationship("User", back_populates="created_tickets")
\ No newline at end of file
+    creator = relationship("User", back_populates="created_tickets")
+
+    __table_args__ = (
+        # Admin ticket queue: keyset pagination on (urgency_rank, created_at, id)
+        Index("ix_tickets_status_urgency_rank_created_at_id", "status", "urgency_rank", "created_at", "id"),
+        Index("ix_tickets_urgency_rank_created_at_id", "urgency_rank", "created_at", "id"),
+    )
\ No newline at end of file
@@ -1,51 +1,77 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import update, func
 from typing import List, Optional
+from uuid import uuid4
 import json
 
 from database import get_db
 from models import Balance, CompanyBalance, User
 from schemas import BalanceResponse, CompanyBalanceResponse
+from utils.idempotency import Idempotency, idempotent
+from utils.cache import cache, serialize, balance_key
+from utils.ledger import (
+    transfer,
+    InsufficientFunds,
+    get_escrow_total,
+    user_account,
+    to_minor,
+    from_minor,
+    EXTERNAL_ACCOUNT
+)
 
 router = APIRouter()
 
+async def _get_balance(db: AsyncSession, clerk_id: str, for_update: bool = False) -> Optional[Balance]:
+    # populate_existing: the ledger updates the row with core statements,
+    # so an instance already in the session would be stale
+    query = select(Balance).filter(Balance.clerkId == clerk_id).execution_options(populate_existing=True)
+    if for_update:
+        query = query.with_for_update()
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
 # Get user balance by clerk ID
 @router.get("/user/{clerk_id}", response_model=BalanceResponse)
 async def get_user_balance(clerk_id: str, db: AsyncSession = Depends(get_db)):
     """
     Get a user's balance by their clerk ID.
     Creates a balance with 0 amount if it doesn't exist yet.
+    Served from the read-through cache; write paths invalidate it.
     """
-    # First check if the user exists
-    result = await db.execute(select(User).filter(User.clerkId == clerk_id))
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"User with clerkId {clerk_id} not found"
-        )
-    
-    # Get the user's balance
-    result = await db.execute(select(Balance).filter(Balance.clerkId == clerk_id))
-    balance = result.scalar_one_or_none()
-    
-    # If balance doesn't exist, create one with 0 amount
-    if not balance:
-        balance = Balance(clerkId=clerk_id, amount=0.0)
-        db.add(balance)
-        await db.commit()
-        await db.refresh(balance)
-    
-    return balance
+    async def load():
+        # First check if the user exists
+        result = await db.execute(select(User).filter(User.clerkId == clerk_id))
+        user = result.scalar_one_or_none()
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with clerkId {clerk_id} not found"
+            )
+        
+        # Get the user's balance
+        result = await db.execute(select(Balance).filter(Balance.clerkId == clerk_id))
+        balance = result.scalar_one_or_none()
+        
+        # If balance doesn't exist, create one with 0 amount
+        if not balance:
+            balance = Balance(clerkId=clerk_id, amount_minor=0)
+            db.add(balance)
+            await db.commit()
+            await db.refresh(balance)
+        
+        return serialize(BalanceResponse, balance)
+    
+    return await cache.get_or_load(balance_key(clerk_id), load)
 
 # Update user balance (for admin or testing)
 @router.put("/user/{clerk_id}", response_model=BalanceResponse)
 async def update_user_balance(clerk_id: str, amount: float, db: AsyncSession = Depends(get_db)):
     """
     Update a user's balance. This endpoint is primarily for admin use or testing.
+    The difference is posted to the ledger as an adjustment.
     """
     # First check if the user exists
     result = await db.execute(select(User).filter(User.clerkId == clerk_id))
@@ -57,28 +83,47 @@ async def update_user_balance(clerk_id: str, amount: float, db: AsyncSession = D
             detail=f"User with clerkId {clerk_id} not found"
         )
     
-    # Get the user's balance
-    result = await db.execute(select(Balance).filter(Balance.clerkId == clerk_id))
-    balance = result.scalar_one_or_none()
+    if amount < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Amount cannot be negative"
+        )
     
-    # If balance doesn't exist, create one
-    if not balance:
-        balance = Balance(clerkId=clerk_id, amount=amount)
+    # Lock the current balance so the difference can't be computed from a stale value
+    balance = await _get_balance(db, clerk_id, for_update=True)
+    current_minor = balance.amount_minor if balance else 0
+    
+    # Post the difference between the requested and the current balance
+    delta = to_minor(amount) - current_minor
+    if delta > 0:
+        await transfer(db, f"adjustment:{uuid4().hex}", EXTERNAL_ACCOUNT, user_account(clerk_id), delta, description="Balance adjustment")
+    elif delta < 0:
+        await transfer(db, f"adjustment:{uuid4().hex}", user_account(clerk_id), EXTERNAL_ACCOUNT, -delta, description="Balance adjustment")
+    
+    if delta:
+        balance = await _get_balance(db, clerk_id)
+    elif not balance:
+        # Make sure a balance row exists even when nothing changed
+        balance = Balance(clerkId=clerk_id, amount_minor=0)
         db.add(balance)
-    else:
-        # Update the balance
-        balance.amount = amount
     
     await db.commit()
-    await db.refresh(balance)
+    await cache.invalidate(balance_key(clerk_id))
     
     return balance
 
 # Add funds to user balance
 @router.post("/user/{clerk_id}/add", response_model=BalanceResponse)
-async def add_funds_to_balance(clerk_id: str, amount: float, db: AsyncSession = Depends(get_db)):
+async def add_funds_to_balance(
+    clerk_id: str,
+    amount: float,
+    db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(idempotent("balance.add_funds"))
+):
     """
     Add funds to a user's balance.
+    Send an Idempotency-Key header to make retries safe: a repeated key
+    returns the original response without adding the funds again.
     """
     if amount <= 0:
         raise HTTPException(
@@ -96,20 +141,13 @@ async def add_funds_to_balance(clerk_id: str, amount: float, db: AsyncSession =
             detail=f"User with clerkId {clerk_id} not found"
         )
     
-    # Get the user's balance
-    result = await db.execute(select(Balance).filter(Balance.clerkId == clerk_id))
-    balance = result.scalar_one_or_none()
-    
-    # If balance doesn't exist, create one
-    if not balance:
-        balance = Balance(clerkId=clerk_id, amount=amount)
-        db.add(balance)
-    else:
-        # Add to the balance
-        balance.amount += amount
+    # Record the deposit; the balance row is created if it doesn't exist
+    await transfer(db, f"deposit:{uuid4().hex}", EXTERNAL_ACCOUNT, user_account(clerk_id), to_minor(amount), description="Deposit")
+    balance = await _get_balance(db, clerk_id)
     
+    await idempotency.save(BalanceResponse, balance)
     await db.commit()
-    await db.refresh(balance)
+    await cache.invalidate(balance_key(clerk_id))
     
     return balance
 
@@ -136,8 +174,7 @@ async def withdraw_funds_from_balance(clerk_id: str, amount: float, db: AsyncSes
         )
     
     # Get the user's balance
-    result = await db.execute(select(Balance).filter(Balance.clerkId == clerk_id))
-    balance = result.scalar_one_or_none()
+    balance = await _get_balance(db, clerk_id)
     
     # Check if balance exists and has sufficient funds
     if not balance:
@@ -146,17 +183,18 @@ async def withdraw_funds_from_balance(clerk_id: str, amount: float, db: AsyncSes
             detail=f"Balance for user with clerkId {clerk_id} not found"
         )
     
-    if balance.amount < amount:
+    # Record the withdrawal; the conditional debit fails if funds ran out meanwhile
+    try:
+        await transfer(db, f"withdrawal:{uuid4().hex}", user_account(clerk_id), EXTERNAL_ACCOUNT, to_minor(amount), description="Withdrawal")
+    except InsufficientFunds:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Insufficient funds. Current balance: ${balance.amount}, Requested withdrawal: ${amount}"
         )
-    
-    # Subtract from the balance
-    balance.amount -= amount
+    balance = await _get_balance(db, clerk_id)
     
     await db.commit()
-    await db.refresh(balance)
+    await cache.invalidate(balance_key(clerk_id))
     
     return balance
 
@@ -164,18 +202,14 @@ async def withdraw_funds_from_balance(clerk_id: str, amount: float, db: AsyncSes
 @router.get("/company", response_model=CompanyBalanceResponse)
 async def get_company_balance(db: AsyncSession = Depends(get_db)):
     """
-    Get the company's balance.
-    Creates a balance with 0 amount if it doesn't exist yet.
+    Get the company's balance: the total held in escrow across all shards.
     """
-    # Get the company balance
-    result = await db.execute(select(CompanyBalance))
-    company_balance = result.scalar_one_or_none()
-    
-    # If company balance doesn't exist, create one with 0 amount
-    if not company_balance:
-        company_balance = CompanyBalance(amount=0.0)
-        db.add(company_balance)
-        await db.commit()
-        await db.refresh(company_balance)
-    
-    return company_balance 
\ No newline at end of file
+    amount_minor, last_updated = await get_escrow_total(db)
+    
+    result = await db.execute(select(func.count(CompanyBalance.id)))
+    
+    return {
+        "amount": from_minor(amount_minor),
+        "last_updated": last_updated,
+        "shard_count": result.scalar_one()
+    } 
\ No newline at end of file
@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, or_, func, any_, text, update
+from sqlalchemy.orm import contains_eager, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy import and_, or_, func, any_, text, update, literal, case, Float, Text
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import json
 
 from database import get_db
-from models import Gig, User, GigRequest, ActiveGig, Balance, CompanyBalance
+from models import Gig, User, GigRequest, ActiveGig, Milestone, FreelancerDetails, GigRecommendation
 from schemas import (
     GigCreate, 
     GigResponse, 
     GigFilter, 
+    RecommendedGigResponse,
     GigRequestCreate, 
     GigRequestResponse, 
     ActiveGigCreate, 
@@ -23,7 +27,12 @@ from schemas import (
     StatusResponse,
     MilestoneLinksResponse,
     MilestoneSubmitResponse,
-    MilestoneApproveResponse
+    MilestoneApproveResponse,
+    MilestoneUploadUrlsRequest,
+    MilestoneUploadUrlsResponse,
+    MilestoneUploadConfirm,
+    PendingReviewMilestone,
+    Page
 )
 from utils.twilio import (
     notify_employer_new_gig_request,
@@ -35,10 +44,56 @@ from utils.twilio import (
     notify_freelancer_gig_completed,
     notify_employer_gig_completed
 )
-from utils.aws import upload_image_to_s3, is_url
+from utils.aws import (
+    upload_images_to_s3,
+    create_presigned_upload,
+    head_objects,
+    get_object_url,
+    S3_PRESIGNED_URL_EXPIRES,
+    S3_MAX_UPLOAD_MB,
+    MB,
+    is_url
+)
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.recommendations import refresh_for_gig
+from utils.loaders import BatchLoader, get_loader
+from utils.idempotency import Idempotency, idempotent
+from utils.cache import cache, serialize, gig_key, balance_key
+from utils.conditional import conditional, weak_etag
+from utils.ledger import (
+    transfer,
+    InsufficientFunds,
+    DuplicateTransaction,
+    escrow_shard_for_gig,
+    escrow_account,
+    user_account,
+    to_minor
+)
 
 router = APIRouter()
 
+async def _list_not_modified(request: Request, response: Response, db: AsyncSession, column, *criteria) -> Optional[Response]:
+    """
+    Set the ETag and Last-Modified of a list from the newest updated_at among
+    the rows it can contain (one index-only aggregate), and return a 304
+    Response if the client's copy is still current.
+    """
+    result = await db.execute(select(func.max(column)).filter(*criteria))
+    last_modified = result.scalar_one_or_none()
+    return conditional(request, response, weak_etag(column.table.name, last_modified), last_modified)
+
+def _with_milestone_links(milestone_index: int, links: List[str]):
+    """
+    SQL expression for milestone_links with one milestone's entry replaced in
+    place (jsonb_set), so an UPDATE never rewrites the other milestones' links.
+    """
+    return func.jsonb_set(
+        func.coalesce(ActiveGig.milestone_links, literal({}, JSONB)),
+        literal([str(milestone_index)], ARRAY(Text)),
+        literal(links, JSONB),
+        True
+    )
+
 # Create a gig (employer only)
 @router.post("/", response_model=GigResponse, status_code=status.HTTP_201_CREATED)
 async def create_gig(gig_data: GigCreate, db: AsyncSession = Depends(get_db)):
@@ -88,43 +143,81 @@ async def create_gig(gig_data: GigCreate, db: AsyncSession = Depends(get_db)):
         description=gig_data.description,
         skills_needed=gig_data.skills_needed,
         project_deadline=gig_data.project_deadline.replace(tzinfo=None) if gig_data.project_deadline.tzinfo else gig_data.project_deadline,
-        milestones=gig_data.milestones,
-        milestone_payments=gig_data.milestone_payments,
+        milestone_rows=[
+            Milestone(index=index, description=description, amount=amount)
+            for index, (description, amount) in enumerate(zip(gig_data.milestones, gig_data.milestone_payments))
+        ],
         total_payment=gig_data.total_payment,
         employerClerkId=gig_data.employerClerkId
     )
     
     db.add(new_gig)
+    await db.flush()
+    
+    # Score the new gig for matching freelancers in the same transaction
+    await refresh_for_gig(db, new_gig.id)
+    
     await db.commit()
     await db.refresh(new_gig)
     
     return new_gig
 
 # Get all gigs with optional filtering
-@router.get("/", response_model=List[GigResponse])
+@router.get("/", response_model=Page[GigResponse])
 async def get_gigs(
+    request: Request,
+    response: Response,
     title: Optional[str] = None,
+    q: Optional[str] = None,
     skills: Optional[List[str]] = Query(None),
+    match: str = Query("all", pattern="^(any|all)$"),
     min_payment: Optional[float] = None,
     max_payment: Optional[float] = None,
     status: Optional[str] = "OPEN",
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get all available gigs with optional filtering.
+    Get all available gigs with optional filtering, newest first.
+    
+    If q is provided, gigs are matched against both title and description
+    (full-text plus trigram fuzzy matching) and returned ordered by relevance.
+    With match=all a gig must need every listed skill; with match=any it must
+    need at least one, and gigs matching more of the skills are returned first.
+    Pass the returned next_cursor back as cursor to fetch the next page.
+    Supports If-None-Match / If-Modified-Since; any gig change invalidates
+    every gig listing, since a status change can move a gig between them.
     """
+    not_modified = await _list_not_modified(request, response, db, Gig.updated_at)
+    if not_modified:
+        return not_modified
+    
     query = select(Gig)
     
     # Apply filters if provided
     if title:
+        # Served by the trigram index on title
         query = query.filter(Gig.title.ilike(f"%{title}%"))
     
+    if q:
+        ts_query = func.websearch_to_tsquery("english", q)
+        query = query.filter(
+            or_(
+                Gig.search_vector.op("@@")(ts_query),
+                Gig.title.op("%")(q),
+                literal(q).op("<%")(Gig.description)
+            )
+        )
+    
     if skills:
-        # For PostgreSQL ARRAY type, we need to use the any operator
-        # to check if any element of the skills_needed array matches any of our skills
-        for skill in skills:
-            # Use PostgreSQL's ANY operator for array element matching
-            query = query.filter(skill == any_(Gig.skills_needed))
+        skills = list(dict.fromkeys(skills))
+        # Array operators are served by the GIN index on skills_needed:
+        # @> (contains) for match=all, && (overlap) for match=any
+        if match == "any":
+            query = query.filter(Gig.skills_needed.overlap(skills))
+        else:
+            query = query.filter(Gig.skills_needed.contains(skills))
     
     if min_payment is not None:
         query = query.filter(Gig.total_payment >= min_payment)
@@ -135,48 +228,130 @@ async def get_gigs(
     if status:
         query = query.filter(Gig.status == status)
     
-    result = await db.execute(query)
-    gigs = result.scalars().all()
+    if q:
+        # Full-text rank plus the best fuzzy similarity so typos still rank sensibly
+        rank = func.ts_rank_cd(Gig.search_vector, ts_query, type_=Float) + func.greatest(
+            func.similarity(Gig.title, q, type_=Float),
+            func.word_similarity(q, Gig.description, type_=Float),
+            type_=Float
+        )
+        keys = [rank, Gig.id]
+    elif skills and match == "any":
+        # Rank by how many of the requested skills each gig needs
+        matched_count = literal(0)
+        for skill in skills:
+            matched_count = matched_count + case((literal(skill) == any_(Gig.skills_needed), 1), else_=0)
+        keys = [matched_count, Gig.created_at, Gig.id]
+    else:
+        keys = [Gig.created_at, Gig.id]
+    
+    gigs, next_cursor = await paginate(db, query, keys, cursor, limit)
+    
+    return {"items": gigs, "next_cursor": next_cursor}
+
+# Get recommended gigs for a freelancer
+@router.get("/recommended/{clerk_id}", response_model=Page[RecommendedGigResponse])
+async def get_recommended_gigs(
+    clerk_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get open gigs that fit a freelancer, best match first.
+    
+    Served from the precomputed gig_recommendations table, which combines
+    skill overlap, payment and recency. Scores are refreshed when gigs or
+    freelancer skills change.
+    """
+    result = await db.execute(select(FreelancerDetails.id).filter(FreelancerDetails.clerkId == clerk_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Freelancer details for clerkId {clerk_id} not found"
+        )
     
-    return gigs
+    query = (
+        select(GigRecommendation)
+        .join(Gig, Gig.id == GigRecommendation.gig_id)
+        .options(contains_eager(GigRecommendation.gig))
+        .filter(
+            and_(
+                GigRecommendation.freelancer_clerk_id == clerk_id,
+                Gig.status == "OPEN"
+            )
+        )
+    )
+    recommendations, next_cursor = await paginate(
+        db, query, [GigRecommendation.score, GigRecommendation.gig_id], cursor, limit
+    )
+    
+    return {"items": recommendations, "next_cursor": next_cursor}
 
 # Get a specific gig by ID
 @router.get("/{gig_id}", response_model=GigResponse)
-async def get_gig(gig_id: int, db: AsyncSession = Depends(get_db)):
+async def get_gig(gig_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Get a specific gig by its ID.
+    Served from the read-through cache; write paths invalidate it.
+    Returns 304 when If-None-Match carries the current ETag.
     """
-    result = await db.execute(select(Gig).filter(Gig.id == gig_id))
-    gig = result.scalar_one_or_none()
+    async def load():
+        result = await db.execute(select(Gig).filter(Gig.id == gig_id))
+        gig = result.scalar_one_or_none()
+        
+        if not gig:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Gig with ID {gig_id} not found"
+            )
+        
+        return serialize(GigResponse, gig)
     
-    if not gig:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Gig with ID {gig_id} not found"
-        )
+    gig = await cache.get_or_load(gig_key(gig_id), load)
+    
+    # Answer revalidations before the body is serialised
+    not_modified = conditional(request, response, weak_etag("gig", gig_id, gig.get("updated_at")))
+    if not_modified:
+        return not_modified
     
     return gig
 
 # Get gigs by employer
-@router.get("/employer/{clerk_id}", response_model=List[GigResponse])
-async def get_employer_gigs(clerk_id: str, db: AsyncSession = Depends(get_db)):
+@router.get("/employer/{clerk_id}", response_model=Page[GigResponse])
+async def get_employer_gigs(
+    clerk_id: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Get all gigs posted by a specific employer.
+    Get all gigs posted by a specific employer, newest first.
+    Supports If-None-Match / If-Modified-Since.
     """
-    result = await db.execute(select(Gig).filter(Gig.employerClerkId == clerk_id))
-    gigs = result.scalars().all()
+    not_modified = await _list_not_modified(request, response, db, Gig.updated_at, Gig.employerClerkId == clerk_id)
+    if not_modified:
+        return not_modified
+    
+    query = select(Gig).filter(Gig.employerClerkId == clerk_id)
+    gigs, next_cursor = await paginate(db, query, [Gig.created_at, Gig.id], cursor, limit)
     
-    return gigs
+    return {"items": gigs, "next_cursor": next_cursor}
 
 # Create a gig request (freelancer applies for a gig)
 @router.post("/request", response_model=GigRequestResponse, status_code=status.HTTP_201_CREATED)
-async def create_gig_request(request_data: GigRequestCreate, db: AsyncSession = Depends(get_db)):
+async def create_gig_request(
+    request_data: GigRequestCreate,
+    db: AsyncSession = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader)
+):
     """
     Create a new gig request (freelancer application).
     """
     # Verify that the gig exists and is OPEN
-    result = await db.execute(select(Gig).filter(Gig.id == request_data.gig_id))
-    gig = result.scalar_one_or_none()
+    gig = await loader.load(Gig, request_data.gig_id)
     
     if not gig:
         raise HTTPException(
@@ -190,9 +365,8 @@ async def create_gig_request(request_data: GigRequestCreate, db: AsyncSession =
             detail="This gig is not open for applications"
         )
     
-    # Verify that the user is a freelancer
-    result = await db.execute(select(User).filter(User.clerkId == request_data.freelancerClerkId))
-    user = result.scalar_one_or_none()
+    # Verify that the user is a freelancer (employer is fetched in the same query for the notification)
+    user, employer = await loader.load_many(User, [request_data.freelancerClerkId, gig.employerClerkId])
     
     if not user:
         raise HTTPException(
@@ -233,32 +407,30 @@ async def create_gig_request(request_data: GigRequestCreate, db: AsyncSession =
     )
     
     db.add(new_request)
-    await db.commit()
-    await db.refresh(new_request)
     
-    # Send Twilio notification to employer about new request
-    # Get user names for the notification
-    employer_result = await db.execute(select(User).filter(User.clerkId == gig.employerClerkId))
-    employer = employer_result.scalar_one_or_none()
-    
-    freelancer_result = await db.execute(select(User).filter(User.clerkId == request_data.freelancerClerkId))
-    freelancer = freelancer_result.scalar_one_or_none()
+    # Queue Twilio notification to employer about new request (sent by the outbox dispatcher)
+    freelancer = user
     
     if employer and freelancer:
         await notify_employer_new_gig_request(
+            db,
             employer_phone="+917009023965",
             freelancer_name=freelancer.firstName + " " + freelancer.lastName,
             gig_title=gig.title
         )
     
+    await db.commit()
+    
     return new_request
 
 # Get requests for a specific gig
-@router.get("/gig/{gig_id}/requests", response_model=List[GigRequestResponse])
+@router.get("/gig/{gig_id}/requests", response_model=Page[GigRequestResponse])
 async def get_requests_by_gig(
     gig_id: int,
     clerk_id: Optional[str] = None,
     request_status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -298,10 +470,9 @@ async def get_requests_by_gig(
     if request_status:
         query = query.filter(GigRequest.status == request_status)
     
-    result = await db.execute(query)
-    requests = result.scalars().all()
+    requests, next_cursor = await paginate(db, query, [GigRequest.created_at, GigRequest.id], cursor, limit)
     
-    return requests
+    return {"items": requests, "next_cursor": next_cursor}
 
 # Get active gig for a specific gig (if exists)
 @router.get("/gig/{gig_id}/active", response_model=Optional[ActiveGigResponse])
@@ -342,48 +513,45 @@ async def get_active_gig_by_gig_id(
     if not active_gig:
         return None
     
-    # Parse milestone_links if it's a JSON string
-    if isinstance(active_gig.milestone_links, str):
-        try:
-            active_gig.milestone_links = json.loads(active_gig.milestone_links)
-        except (ValueError, TypeError):
-            # If parsing fails, use empty dict
-            active_gig.milestone_links = {}
-    
     return active_gig
 
 # Get pending requests for a specific employer
-@router.get("/requests/employer/{clerk_id}", response_model=List[GigRequestResponse])
+@router.get("/requests/employer/{clerk_id}", response_model=Page[GigRequestResponse])
 async def get_employer_pending_requests(
     clerk_id: str, 
     status: str = "PENDING", 
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get all pending gig requests for a specific employer.
+    Get all pending gig requests for a specific employer, newest first.
     """
-    result = await db.execute(
-        select(GigRequest).filter(
-            and_(
-                GigRequest.employerClerkId == clerk_id,
-                GigRequest.status == status
-            )
+    query = select(GigRequest).filter(
+        and_(
+            GigRequest.employerClerkId == clerk_id,
+            GigRequest.status == status
         )
     )
-    requests = result.scalars().all()
+    requests, next_cursor = await paginate(db, query, [GigRequest.created_at, GigRequest.id], cursor, limit)
     
-    return requests
+    return {"items": requests, "next_cursor": next_cursor}
 
 # Get requests for a specific freelancer
-@router.get("/requests/freelancer/{clerk_id}", response_model=List[GigRequestResponse])
-async def get_freelancer_requests(clerk_id: str, db: AsyncSession = Depends(get_db)):
+@router.get("/requests/freelancer/{clerk_id}", response_model=Page[GigRequestResponse])
+async def get_freelancer_requests(
+    clerk_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Get all gig requests made by a specific freelancer.
+    Get all gig requests made by a specific freelancer, newest first.
     """
-    result = await db.execute(select(GigRequest).filter(GigRequest.freelancerClerkId == clerk_id))
-    requests = result.scalars().all()
+    query = select(GigRequest).filter(GigRequest.freelancerClerkId == clerk_id)
+    requests, next_cursor = await paginate(db, query, [GigRequest.created_at, GigRequest.id], cursor, limit)
     
-    return requests
+    return {"items": requests, "next_cursor": next_cursor}
 
 # Accept or reject a gig request
 @router.put("/request/{request_id}", response_model=GigRequestResponse)
@@ -392,10 +560,13 @@ async def update_gig_request(
     request_status: str,
     contract_address: str,
     payment_verified: bool = False,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader),
+    idempotency: Idempotency = Depends(idempotent("gigs.update_gig_request"))
 ):
     """
     Accept or reject a gig request.
+    Honours the Idempotency-Key header: a retry returns the original response.
     """
     if request_status not in ["ACCEPTED", "REJECTED"]:
         raise HTTPException(
@@ -403,9 +574,8 @@ async def update_gig_request(
             detail="Status must be ACCEPTED or REJECTED"
         )
     
-    # Get the request
-    result = await db.execute(select(GigRequest).filter(GigRequest.id == request_id))
-    request = result.scalar_one_or_none()
+    # Get the request together with its gig, employer and freelancer
+    request = await loader.load(GigRequest, request_id)
     
     if not request:
         raise HTTPException(
@@ -432,45 +602,33 @@ async def update_gig_request(
             )
         
         # Get the gig details
-        result = await db.execute(select(Gig).filter(Gig.id == request.gig_id))
-        gig = result.scalar_one_or_none()
+        gig = await loader.load(Gig, request.gig_id)
         
         # Update gig status to CLOSED
         gig.status = "CLOSED"
         
-        # Get employer's balance
-        result = await db.execute(
-            select(Balance).filter(Balance.clerkId == request.employerClerkId)
-        )
-        employer_balance = result.scalar_one_or_none()
-        
-        if not employer_balance:
-            # Create employer balance if it doesn't exist
-            employer_balance = Balance(clerkId=request.employerClerkId, amount=0)
-            db.add(employer_balance)
-            await db.commit()
-            await db.refresh(employer_balance)
-        
-        # Check if employer has enough balance for first milestone
+        # Move the first milestone payment from the employer into the gig's escrow shard,
+        # failing if the employer doesn't have enough balance
         first_milestone_payment = gig.milestone_payments[0]
-        if employer_balance.amount < first_milestone_payment:
+        try:
+            await transfer(
+                db,
+                f"gig-request:{request.id}:fund-milestone:0",
+                user_account(request.employerClerkId),
+                escrow_account(escrow_shard_for_gig(gig.id)),
+                to_minor(first_milestone_payment),
+                description=f"Escrow for milestone 1 of gig {gig.id}"
+            )
+        except InsufficientFunds:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient balance to pay for the first milestone (${first_milestone_payment})"
             )
-        
-        # Deduct amount from employer balance
-        employer_balance.amount -= first_milestone_payment
-        
-        # Add to company balance
-        result = await db.execute(select(CompanyBalance))
-        company_balance = result.scalar_one_or_none()
-        
-        if not company_balance:
-            company_balance = CompanyBalance(amount=0)
-            db.add(company_balance)
-        
-        company_balance.amount += first_milestone_payment
+        except DuplicateTransaction:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Request {request.id} has already been accepted"
+            )
         
         # Create an ActiveGig entry
         new_active_gig = ActiveGig(
@@ -478,97 +636,246 @@ async def update_gig_request(
             freelancerClerkId=request.freelancerClerkId,
             employerClerkId=request.employerClerkId,
             contract_address=contract_address,
-            milestone_status=["PENDING"] * len(gig.milestones),
             milestone_links={}
         )
         
         db.add(new_active_gig)
-    
-    # For both accept and reject, send Twilio notification
-    # Get user details
-    employer_result = await db.execute(select(User).filter(User.clerkId == request.employerClerkId))
-    employer = employer_result.scalar_one_or_none()
-    
-    freelancer_result = await db.execute(select(User).filter(User.clerkId == request.freelancerClerkId))
-    freelancer = freelancer_result.scalar_one_or_none()
-    
-    # Get gig details
-    gig_result = await db.execute(select(Gig).filter(Gig.id == request.gig_id))
-    gig = gig_result.scalar_one_or_none()
+        
+        # The gig's milestones start afresh for this active gig
+        for milestone in gig.milestone_rows:
+            milestone.active_gig = new_active_gig
+            milestone.status = "PENDING"
+            milestone.submitted_at = None
+            milestone.approved_at = None
+    
+    # For both accept and reject, queue Twilio notification in this transaction
+    # Users and gig were loaded with the request, so these are cache hits
+    employer, freelancer = await loader.load_many(User, [request.employerClerkId, request.freelancerClerkId])
+    gig = await loader.load(Gig, request.gig_id)
     
     if employer and freelancer and gig:
         if request_status == "ACCEPTED":
             await notify_freelancer_gig_request_accepted(
+                db,
                 freelancer_phone="+917009023965",
                 gig_title=gig.title,
                 employer_name=employer.firstName + " " + employer.lastName
             )
         elif request_status == "REJECTED":
             await notify_freelancer_gig_request_rejected(
+                db,
                 freelancer_phone="+917009023965",
                 gig_title=gig.title,
                 employer_name=employer.firstName + " " + employer.lastName
             )
     
+    await idempotency.save(GigRequestResponse, request)
     await db.commit()
-    await db.refresh(request)
+    if request_status == "ACCEPTED":
+        # The gig closed and the employer funded its first milestone
+        await cache.invalidate(gig_key(request.gig_id), balance_key(request.employerClerkId))
     
     return request
 
 
 # Get active gigs for an employer
-@router.get("/active/employer/{clerk_id}", response_model=List[ActiveGigResponse])
-async def get_employer_active_gigs(clerk_id: str, db: AsyncSession = Depends(get_db)):
+@router.get("/active/employer/{clerk_id}", response_model=Page[ActiveGigResponse])
+async def get_employer_active_gigs(
+    clerk_id: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Get all active gigs for a specific employer.
+    Get all active gigs for a specific employer, newest first.
+    Supports If-None-Match / If-Modified-Since.
     """
-    result = await db.execute(select(ActiveGig).filter(ActiveGig.employerClerkId == clerk_id))
-    active_gigs = result.scalars().all()
-    
-    # Process the active gigs to ensure milestone_links is properly formatted
-    processed_gigs = []
-    for gig in active_gigs:
-        # Make a copy of the gig to avoid modifying the original
-        processed_gig = gig
-        
-        # Parse milestone_links if it's a JSON string
-        milestone_links = gig.milestone_links
-        if isinstance(milestone_links, str):
-            try:
-                processed_gig.milestone_links = json.loads(milestone_links)
-            except (ValueError, TypeError):
-                processed_gig.milestone_links = {}
-        
-        processed_gigs.append(processed_gig)
+    not_modified = await _list_not_modified(
+        request, response, db, ActiveGig.updated_at, ActiveGig.employerClerkId == clerk_id
+    )
+    if not_modified:
+        return not_modified
     
-    return processed_gigs
+    query = select(ActiveGig).filter(ActiveGig.employerClerkId == clerk_id)
+    active_gigs, next_cursor = await paginate(db, query, [ActiveGig.created_at, ActiveGig.id], cursor, limit)
+    
+    return {"items": active_gigs, "next_cursor": next_cursor}
+
+# Get submitted milestones awaiting an employer's review
+@router.get("/active/employer/{clerk_id}/pending-review", response_model=Page[PendingReviewMilestone])
+async def get_employer_pending_review(
+    clerk_id: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the milestones an employer still has to approve (submitted, not yet
+    approved, on active gigs), most recently submitted first.
+    Served by the partial index on milestones awaiting review, read in
+    (submitted_at, id) order and joined to the employer's active gigs.
+    Supports If-None-Match / If-Modified-Since.
+    """
+    # Submissions and approvals touch the active gig, so its updated_at versions this list too
+    not_modified = await _list_not_modified(
+        request, response, db, ActiveGig.updated_at, ActiveGig.employerClerkId == clerk_id
+    )
+    if not_modified:
+        return not_modified
+    
+    query = (
+        select(Milestone)
+        .join(ActiveGig, Milestone.active_gig_id == ActiveGig.id)
+        .filter(
+            and_(
+                ActiveGig.employerClerkId == clerk_id,
+                ActiveGig.status == "ACTIVE",
+                Milestone.submitted_at.isnot(None),
+                Milestone.approved_at.is_(None)
+            )
+        )
+        # Only the listed rows are needed, not every milestone of their gigs
+        .options(
+            contains_eager(Milestone.active_gig).lazyload(ActiveGig.milestone_rows),
+            joinedload(Milestone.gig).lazyload(Gig.milestone_rows)
+        )
+    )
+    milestones, next_cursor = await paginate(db, query, [Milestone.submitted_at, Milestone.id], cursor, limit)
+    
+    items = [
+        {
+            "milestone_id": milestone.id,
+            "active_gig_id": milestone.active_gig_id,
+            "gig_id": milestone.gig_id,
+            "gig_title": milestone.gig.title,
+            "freelancerClerkId": milestone.active_gig.freelancerClerkId,
+            "milestone_index": milestone.index,
+            "description": milestone.description,
+            "amount": milestone.amount,
+            "links": milestone.active_gig.milestone_links.get(str(milestone.index), []),
+            "submitted_at": milestone.submitted_at
+        }
+        for milestone in milestones
+    ]
+    
+    return {"items": items, "next_cursor": next_cursor}
 
 # Get active gigs for a freelancer
-@router.get("/active/freelancer/{clerk_id}", response_model=List[ActiveGigResponse])
-async def get_freelancer_active_gigs(clerk_id: str, db: AsyncSession = Depends(get_db)):
+@router.get("/active/freelancer/{clerk_id}", response_model=Page[ActiveGigResponse])
+async def get_freelancer_active_gigs(
+    clerk_id: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Get all active gigs for a specific freelancer.
+    Get all active gigs for a specific freelancer, newest first.
+    Supports If-None-Match / If-Modified-Since.
     """
-    result = await db.execute(select(ActiveGig).filter(ActiveGig.freelancerClerkId == clerk_id))
-    active_gigs = result.scalars().all()
-    
-    # Process the active gigs to ensure milestone_links is properly formatted
-    processed_gigs = []
-    for gig in active_gigs:
-        # Make a copy of the gig to avoid modifying the original
-        processed_gig = gig
-        
-        # Parse milestone_links if it's a JSON string
-        milestone_links = gig.milestone_links
-        if isinstance(milestone_links, str):
-            try:
-                processed_gig.milestone_links = json.loads(milestone_links)
-            except (ValueError, TypeError):
-                processed_gig.milestone_links = {}
-        
-        processed_gigs.append(processed_gig)
+    not_modified = await _list_not_modified(
+        request, response, db, ActiveGig.updated_at, ActiveGig.freelancerClerkId == clerk_id
+    )
+    if not_modified:
+        return not_modified
     
-    return processed_gigs
+    query = select(ActiveGig).filter(ActiveGig.freelancerClerkId == clerk_id)
+    active_gigs, next_cursor = await paginate(db, query, [ActiveGig.created_at, ActiveGig.id], cursor, limit)
+    
+    return {"items": active_gigs, "next_cursor": next_cursor}
+
+async def _record_milestone_submission(
+    db: AsyncSession,
+    loader: BatchLoader,
+    active_gig: ActiveGig,
+    milestone_index: int,
+    submission_links: List[str]
+):
+    """
+    Store the links for a milestone, mark it PENDING, queue the employer
+    notification and commit. Shared by the multipart and presigned upload flows.
+    
+    Returns:
+        dict: The MilestoneSubmitResponse body
+    """
+    # Create submission object
+    submission = MilestoneSubmission(
+        milestone_index=milestone_index,
+        links=submission_links
+    )
+    
+    # Check milestone index is valid
+    if submission.milestone_index < 0 or submission.milestone_index >= len(active_gig.milestone_status):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid milestone index. Must be between 0 and {len(active_gig.milestone_status) - 1}"
+        )
+    
+    # Check if previous milestones are completed
+    for i in range(submission.milestone_index):
+        if active_gig.milestone_status[i] != "APPROVED":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Previous milestone (index {i}) must be approved before submitting milestone {submission.milestone_index}"
+            )
+    
+    # Mark the milestone submitted (awaiting approval); only its own row is written
+    milestone = active_gig.milestone_rows[submission.milestone_index]
+    # Rows are bound to the active gig when the request is accepted
+    if milestone.active_gig_id != active_gig.id:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Milestone {submission.milestone_index} is not assigned to active gig {active_gig.id}"
+        )
+    milestone.status = "PENDING"
+    milestone.submitted_at = datetime.utcnow()
+    
+    # Set only this milestone's links inside the JSONB document
+    result = await db.execute(
+        update(ActiveGig)
+        .where(ActiveGig.id == active_gig.id)
+        .values(
+            milestone_links=_with_milestone_links(submission.milestone_index, submission.links)
+        )
+        .returning(ActiveGig.milestone_links)
+    )
+    # Keep the loaded row in step without marking it dirty (which would rewrite the whole column)
+    set_committed_value(active_gig, "milestone_links", result.scalar_one())
+    
+    # Queue notification to employer about milestone submission
+    # Gig and users were loaded with the active gig, so these are cache hits
+    gig = await loader.load(Gig, active_gig.gig_id)
+    employer, freelancer = await loader.load_many(User, [active_gig.employerClerkId, active_gig.freelancerClerkId])
+    
+    if employer and freelancer and gig:
+        await notify_employer_milestone_submitted(
+            db,
+            employer_phone="+917009023965",
+            freelancer_name=freelancer.firstName + " " + freelancer.lastName,
+            gig_title=gig.title,
+            milestone_number=submission.milestone_index + 1  # Convert 0-index to human-readable 1-index
+        )
+    
+    await db.commit()
+    
+    # Return a consistent response with all fields
+    response = {
+        "success": True,
+        "message": f"Milestone {submission.milestone_index} submitted successfully",
+        "active_gig_id": active_gig.id,
+        "gig_id": active_gig.gig_id,
+        "milestone_index": submission.milestone_index,
+        "links": submission.links,
+        "milestone_links": active_gig.milestone_links,
+        "milestone_status": active_gig.milestone_status
+    }
+    
+    return response
 
 # Submit milestone
 @router.post("/active/{active_gig_id}/milestone", response_model=MilestoneSubmitResponse,
@@ -605,7 +912,8 @@ async def submit_milestone(
     milestone_index: int = Form(...),
     links: str = Form(...),
     files: List[UploadFile] = File([]),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader)
 ):
     """
     Submit links and/or files for a milestone.
@@ -616,9 +924,8 @@ async def submit_milestone(
         links: A JSON string containing an array of links (e.g., ["https://example.com", "https://example2.com"])
         files: Optional list of image files to upload
     """
-    # Get the active gig
-    result = await db.execute(select(ActiveGig).filter(ActiveGig.id == active_gig_id))
-    active_gig = result.scalar_one_or_none()
+    # Get the active gig together with its gig, employer and freelancer
+    active_gig = await loader.load(ActiveGig, active_gig_id)
     
     if not active_gig:
         raise HTTPException(
@@ -644,133 +951,126 @@ async def submit_milestone(
         else:
             submission_links = []
     
-    # Upload any files to S3 and add their URLs to the links
-    for file in files:
-        if file and file.filename:  # Check if file is not None and not empty
-            try:
-                file_url = upload_image_to_s3(file, folder="milestones")
-                submission_links.append(file_url)
-            except Exception as e:
-                print(f"Error uploading file {file.filename}: {str(e)}")
-                # Continue with other files even if one fails
+    # Upload any files to S3 concurrently and add their URLs to the links
+    files = [file for file in files if file and file.filename]  # Skip missing or empty files
+    uploaded = await upload_images_to_s3(files, folder="milestones", return_exceptions=True)
+    for file, file_url in zip(files, uploaded):
+        if isinstance(file_url, Exception):
+            # Continue with other files even if one fails
+            detail = getattr(file_url, "detail", str(file_url))
+            print(f"Error uploading file {file.filename}: {detail}")
+        else:
+            submission_links.append(file_url)
     
-    # Create submission object
-    submission = MilestoneSubmission(
-        milestone_index=milestone_index,
-        links=submission_links
-    )
+    return await _record_milestone_submission(db, loader, active_gig, milestone_index, submission_links)
+
+def _milestone_upload_prefix(active_gig_id: int, milestone_index: int) -> str:
+    # Presigned uploads are scoped per milestone so a confirmation can only claim its own objects
+    return f"milestones/{active_gig_id}/{milestone_index}"
+
+async def _get_uploadable_active_gig(loader: BatchLoader, active_gig_id: int, milestone_index: int) -> ActiveGig:
+    active_gig = await loader.load(ActiveGig, active_gig_id)
     
-    # Check milestone index is valid
-    if submission.milestone_index < 0 or submission.milestone_index >= len(active_gig.milestone_status):
+    if not active_gig:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid milestone index. Must be between 0 and {len(active_gig.milestone_status) - 1}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Active gig with ID {active_gig_id} not found"
         )
     
-    # Check if previous milestones are completed
-    for i in range(submission.milestone_index):
-        if active_gig.milestone_status[i] != "APPROVED":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Previous milestone (index {i}) must be approved before submitting milestone {submission.milestone_index}"
-            )
-    
-    print(f"Before update - milestone_links: {active_gig.milestone_links}")
-    print(f"Submission: {submission}")
-    
-    # Ensure milestone_links is initialized
-    if active_gig.milestone_links is None:
-        active_gig.milestone_links = {}
-    
-    # Convert milestone_links to a fresh dictionary
-    # Handle different possible formats safely
-    if isinstance(active_gig.milestone_links, dict):
-        current_links = dict(active_gig.milestone_links)
-    else:
-        try:
-            # Try to load it as JSON string
-            current_links = json.loads(active_gig.milestone_links) if active_gig.milestone_links else {}
-        except (TypeError, ValueError):
-            # If all else fails, start with empty dict
-            print("Could not parse milestone_links, initializing empty dict")
-            current_links = {}
-    
-    # Update the dictionary
-    milestone_key = str(submission.milestone_index)
-    current_links[milestone_key] = submission.links
+    if active_gig.status != "ACTIVE":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"This gig is not active (current status: {active_gig.status})"
+        )
     
-    # Assign back to the model
-    active_gig.milestone_links = current_links
-    print(f"After setting - milestone_links: {active_gig.milestone_links}")
+    if milestone_index < 0 or milestone_index >= len(active_gig.milestone_status):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid milestone index. Must be between 0 and {len(active_gig.milestone_status) - 1}"
+        )
     
-    # Update milestone status to PENDING
-    active_gig.milestone_status[submission.milestone_index] = "PENDING"
+    if active_gig.milestone_status[milestone_index] == "APPROVED":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Milestone {milestone_index} is already approved"
+        )
     
-    # Execute a direct SQL update for milestone_links to ensure it's properly stored
+    return active_gig
+
+# Get presigned URLs to upload milestone files directly to S3
+@router.post("/active/{active_gig_id}/milestone/{milestone_index}/upload-urls", response_model=MilestoneUploadUrlsResponse)
+async def create_milestone_upload_urls(
+    active_gig_id: int,
+    milestone_index: int,
+    upload_request: MilestoneUploadUrlsRequest,
+    loader: BatchLoader = Depends(get_loader)
+):
+    """
+    Issue presigned POST (default) or PUT URLs for milestone files.
     
-    milestone_links_json = json.dumps(current_links)
+    The client uploads each file straight to S3, then calls
+    /active/{active_gig_id}/milestone/{milestone_index}/confirm-uploads with
+    the returned keys to submit the milestone.
+    """
+    await _get_uploadable_active_gig(loader, active_gig_id, milestone_index)
     
-    # Use the update method from SQLAlchemy instead of direct text SQL
-    await db.execute(
-        update(ActiveGig)
-        .where(ActiveGig.id == active_gig_id)
-        .values(
-            milestone_links=milestone_links_json,
-            milestone_status=active_gig.milestone_status
+    if not upload_request.files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No files provided"
         )
-    )
     
-    await db.commit()
-    print("After commit")
+    folder = _milestone_upload_prefix(active_gig_id, milestone_index)
+    uploads = [
+        create_presigned_upload(folder, file.filename, file.content_type, method=upload_request.method)
+        for file in upload_request.files
+    ]
     
-    # Re-fetch the gig to ensure we have the latest data
-    result = await db.execute(select(ActiveGig).filter(ActiveGig.id == active_gig_id))
-    active_gig = result.scalar_one_or_none()
-    print(f"After refresh - milestone_links: {active_gig.milestone_links}")
-    
-    # Send notification to employer about milestone submission
-    # Get gig details
-    gig_result = await db.execute(select(Gig).filter(Gig.id == active_gig.gig_id))
-    gig = gig_result.scalar_one_or_none()
+    return {"uploads": uploads, "expires_in": S3_PRESIGNED_URL_EXPIRES}
+
+# Confirm presigned uploads and submit the milestone
+@router.post("/active/{active_gig_id}/milestone/{milestone_index}/confirm-uploads", response_model=MilestoneSubmitResponse)
+async def confirm_milestone_uploads(
+    active_gig_id: int,
+    milestone_index: int,
+    confirmation: MilestoneUploadConfirm,
+    db: AsyncSession = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader)
+):
+    """
+    Record objects uploaded through presigned URLs into the milestone's links
+    and submit the milestone, exactly like POST /active/{active_gig_id}/milestone.
     
-    # Get user details
-    employer_result = await db.execute(select(User).filter(User.clerkId == active_gig.employerClerkId))
-    employer = employer_result.scalar_one_or_none()
+    Every key must have been issued for this milestone and must exist in S3.
+    """
+    active_gig = await _get_uploadable_active_gig(loader, active_gig_id, milestone_index)
     
-    freelancer_result = await db.execute(select(User).filter(User.clerkId == active_gig.freelancerClerkId))
-    freelancer = freelancer_result.scalar_one_or_none()
+    prefix = _milestone_upload_prefix(active_gig_id, milestone_index) + "/"
+    keys = list(dict.fromkeys(confirmation.keys))  # Drop duplicates, keep order
     
-    if employer and freelancer and gig:
-        await notify_employer_milestone_submitted(
-            employer_phone="+917009023965",
-            freelancer_name=freelancer.firstName + " " + freelancer.lastName,
-            gig_title=gig.title,
-            milestone_number=submission.milestone_index + 1  # Convert 0-index to human-readable 1-index
-        )
+    for key in keys:
+        if not key.startswith(prefix) or ".." in key:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Key {key} was not issued for milestone {milestone_index} of this gig"
+            )
     
-    # Parse milestone_links if it's a JSON string
-    milestone_links_data = active_gig.milestone_links
-    if isinstance(milestone_links_data, str):
-        try:
-            milestone_links_data = json.loads(milestone_links_data)
-        except (ValueError, TypeError):
-            # If parsing fails, use empty dict
-            milestone_links_data = {}
+    objects = await head_objects(keys)
+    for key, head in zip(keys, objects):
+        if head is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File {key} has not been uploaded"
+            )
+        if head.get("ContentLength", 0) > S3_MAX_UPLOAD_MB * MB:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File {key} is larger than {S3_MAX_UPLOAD_MB} MB"
+            )
     
-    # Return a consistent response with all fields
-    response = {
-        "success": True,
-        "message": f"Milestone {submission.milestone_index} submitted successfully",
-        "active_gig_id": active_gig.id,
-        "gig_id": active_gig.gig_id,
-        "milestone_index": submission.milestone_index,
-        "links": submission.links,
-        "milestone_links": milestone_links_data or {milestone_key: submission.links},
-        "milestone_status": active_gig.milestone_status
-    }
+    submission_links = list(confirmation.links) + [get_object_url(key) for key in keys]
     
-    print(f"Response: {response}")
-    return response
+    return await _record_milestone_submission(db, loader, active_gig, milestone_index, submission_links)
 
 # Approve milestone
 @router.put("/active/{active_gig_id}/milestone/{milestone_index}/approve", response_model=MilestoneApproveResponse)
@@ -778,14 +1078,17 @@ async def approve_milestone(
     active_gig_id: int,
     milestone_index: int,
     payment_verified: bool = False,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader),
+    idempotency: Idempotency = Depends(idempotent("gigs.approve_milestone"))
 ):
     """
     Approve a milestone submission.
+    Honours the Idempotency-Key header: a retry returns the original response
+    without paying again.
     """
-    # Get the active gig
-    result = await db.execute(select(ActiveGig).filter(ActiveGig.id == active_gig_id))
-    active_gig = result.scalar_one_or_none()
+    # Get the active gig together with its gig, employer and freelancer
+    active_gig = await loader.load(ActiveGig, active_gig_id)
     
     if not active_gig:
         raise HTTPException(
@@ -806,27 +1109,10 @@ async def approve_milestone(
             detail=f"Invalid milestone index. Must be between 0 and {len(active_gig.milestone_status) - 1}"
         )
     
-    # Ensure milestone_links is initialized
-    if active_gig.milestone_links is None:
-        active_gig.milestone_links = {}
-    
-    # Convert milestone_links to a fresh dictionary
-    # Handle different possible formats safely
-    if isinstance(active_gig.milestone_links, dict):
-        milestone_links = dict(active_gig.milestone_links)
-    else:
-        try:
-            # Try to load it as JSON string
-            milestone_links = json.loads(active_gig.milestone_links) if active_gig.milestone_links else {}
-        except (TypeError, ValueError):
-            # If all else fails, start with empty dict
-            print("Could not parse milestone_links, initializing empty dict")
-            milestone_links = {}
-    
     milestone_key = str(milestone_index)
     
     # Check if milestone has been submitted
-    if milestone_key not in milestone_links:
+    if milestone_key not in active_gig.milestone_links:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Milestone {milestone_index} has not been submitted yet"
@@ -840,115 +1126,91 @@ async def approve_milestone(
         )
     
     # Get the gig details
-    result = await db.execute(select(Gig).filter(Gig.id == active_gig.gig_id))
-    gig = result.scalar_one_or_none()
+    gig = await loader.load(Gig, active_gig.gig_id)
     
-    # Process payment for the completed milestone
-    current_milestone_payment = gig.milestone_payments[milestone_index]
+    has_next_milestone = milestone_index < len(active_gig.milestone_status) - 1
     
-    # Get company balance
-    result = await db.execute(select(CompanyBalance))
-    company_balance = result.scalar_one_or_none()
-    
-    if not company_balance:
+    # If there are more milestones, require payment for the next one
+    if has_next_milestone and not payment_verified:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Company balance not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Payment verification for next milestone is required"
         )
     
-    # Check if company has enough balance
-    if company_balance.amount < current_milestone_payment:
+    # Release the milestone payment from the gig's escrow shard to the freelancer
+    current_milestone_payment = gig.milestone_payments[milestone_index]
+    gig_escrow = escrow_account(escrow_shard_for_gig(gig.id))
+    try:
+        await transfer(
+            db,
+            f"active-gig:{active_gig.id}:release-milestone:{milestone_index}",
+            gig_escrow,
+            user_account(active_gig.freelancerClerkId),
+            to_minor(current_milestone_payment),
+            description=f"Payment for milestone {milestone_index + 1} of gig {gig.id}"
+        )
+    except InsufficientFunds:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Insufficient company balance to pay for the milestone (${current_milestone_payment})"
         )
-    
-    # Get freelancer's balance
-    result = await db.execute(select(Balance).filter(Balance.clerkId == active_gig.freelancerClerkId))
-    freelancer_balance = result.scalar_one_or_none()
-    
-    if not freelancer_balance:
-        # Create freelancer balance if it doesn't exist
-        freelancer_balance = Balance(clerkId=active_gig.freelancerClerkId, amount=0)
-        db.add(freelancer_balance)
-        await db.commit()
-        await db.refresh(freelancer_balance)
-    
-    # Transfer amount from company to freelancer
-    company_balance.amount -= current_milestone_payment
-    freelancer_balance.amount += current_milestone_payment
+    except DuplicateTransaction:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Milestone {milestone_index} has already been paid"
+        )
     
     # Update milestone status to APPROVED
-    active_gig.milestone_status[milestone_index] = "APPROVED"
+    milestone = active_gig.milestone_rows[milestone_index]
+    milestone.status = "APPROVED"
+    milestone.approved_at = datetime.utcnow()
     
-    # If there are more milestones, require payment for the next one
-    if milestone_index < len(active_gig.milestone_status) - 1:
-        if not payment_verified:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Payment verification for next milestone is required"
-            )
-        
-        # Process payment for next milestone
+    if has_next_milestone:
+        # Transfer payment for the next milestone from the employer into escrow
         next_milestone_payment = gig.milestone_payments[milestone_index + 1]
-        
-        # Get employer's balance
-        result = await db.execute(select(Balance).filter(Balance.clerkId == active_gig.employerClerkId))
-        employer_balance = result.scalar_one_or_none()
-        
-        if not employer_balance:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Employer balance not found"
+        try:
+            await transfer(
+                db,
+                f"active-gig:{active_gig.id}:fund-milestone:{milestone_index + 1}",
+                user_account(active_gig.employerClerkId),
+                gig_escrow,
+                to_minor(next_milestone_payment),
+                description=f"Escrow for milestone {milestone_index + 2} of gig {gig.id}"
             )
-        
-        # Check if employer has enough balance
-        if employer_balance.amount < next_milestone_payment:
+        except InsufficientFunds:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient employer balance to pay for the next milestone (${next_milestone_payment})"
             )
-        
-        # Transfer from employer to company
-        employer_balance.amount -= next_milestone_payment
-        company_balance.amount += next_milestone_payment
+        except DuplicateTransaction:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Milestone {milestone_index + 1} has already been funded"
+            )
     
     # If this was the last milestone, mark the gig as completed
     if milestone_index == len(active_gig.milestone_status) - 1:
         active_gig.status = "COMPLETED"
     
-    # Execute a direct SQL update for milestone_links and status to ensure it's properly stored
+    # Execute a direct SQL update for status to ensure it's properly stored
     
     # Use the update method from SQLAlchemy instead of direct text SQL
     await db.execute(
         update(ActiveGig)
         .where(ActiveGig.id == active_gig_id)
         .values(
-            milestone_status=active_gig.milestone_status,
             status=active_gig.status
         )
     )
     
-    await db.commit()
-    
-    # Re-fetch the gig to ensure we have the latest data
-    result = await db.execute(select(ActiveGig).filter(ActiveGig.id == active_gig_id))
-    active_gig = result.scalar_one_or_none()
-    
-    print(f"After refresh - active_gig.milestone_links: {active_gig.milestone_links}")
-    
-    # Send notification to freelancer about milestone approval
-    # Get gig details
-    gig_result = await db.execute(select(Gig).filter(Gig.id == active_gig.gig_id))
-    gig = gig_result.scalar_one_or_none()
-    
-    # Get user details
-    freelancer_result = await db.execute(select(User).filter(User.clerkId == active_gig.freelancerClerkId))
-    freelancer = freelancer_result.scalar_one_or_none()
+    # Queue notification to freelancer about milestone approval
+    # Users were loaded with the active gig, so these are cache hits
+    employer, freelancer = await loader.load_many(User, [active_gig.employerClerkId, active_gig.freelancerClerkId])
     
     if freelancer and gig:
         current_milestone_payment = gig.milestone_payments[milestone_index]
         await notify_freelancer_milestone_approved(
+            db,
             freelancer_phone="+917009023965",
             gig_title=gig.title,
             milestone_number=milestone_index + 1,  # Convert 0-index to human-readable 1-index
@@ -957,13 +1219,10 @@ async def approve_milestone(
         
         # If gig is completed, send completion notifications to both parties
         if active_gig.status == "COMPLETED":
-            # Get employer details
-            employer_result = await db.execute(select(User).filter(User.clerkId == active_gig.employerClerkId))
-            employer = employer_result.scalar_one_or_none()
-            
             if employer:
                 # Notify freelancer about gig completion
                 await notify_freelancer_gig_completed(
+                    db,
                     freelancer_phone="+917009023965",
                     gig_title=gig.title,
                     total_payment=gig.total_payment
@@ -971,46 +1230,44 @@ async def approve_milestone(
                 
                 # Notify employer about gig completion
                 await notify_employer_gig_completed(
+                    db,
                     employer_phone="+917009023965",
                     gig_title=gig.title,
                     freelancer_name=freelancer.firstName + " " + freelancer.lastName
                 )
     
-    # Parse milestone_links if it's a JSON string
-    milestone_links_data = active_gig.milestone_links
-    if isinstance(milestone_links_data, str):
-        try:
-            milestone_links_data = json.loads(milestone_links_data)
-        except (ValueError, TypeError):
-            # If parsing fails, use empty dict
-            milestone_links_data = {}
-    
     # Return a response with all relevant information
-    return {
+    response = {
         "success": True,
         "message": f"Milestone {milestone_index} approved successfully",
         "active_gig_id": active_gig.id,
         "gig_id": active_gig.gig_id,
         "milestone_index": milestone_index,
-        "milestone_links": milestone_links_data,
+        "milestone_links": active_gig.milestone_links,
         "milestone_status": active_gig.milestone_status,
         "payment_amount": current_milestone_payment,
         "status": active_gig.status
     }
+    
+    await idempotency.save(MilestoneApproveResponse, response)
+    await db.commit()
+    await cache.invalidate(balance_key(active_gig.freelancerClerkId), balance_key(active_gig.employerClerkId))
+    
+    return response
 
 # Reject milestone (terminate gig)
 @router.put("/active/{active_gig_id}/milestone/{milestone_index}/reject", response_model=ActiveGigResponse)
 async def reject_milestone(
     active_gig_id: int,
     milestone_index: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader)
 ):
     """
     Reject a milestone submission and terminate the gig.
     """
-    # Get the active gig
-    result = await db.execute(select(ActiveGig).filter(ActiveGig.id == active_gig_id))
-    active_gig = result.scalar_one_or_none()
+    # Get the active gig together with its gig, employer and freelancer
+    active_gig = await loader.load(ActiveGig, active_gig_id)
     
     if not active_gig:
         raise HTTPException(
@@ -1031,26 +1288,10 @@ async def reject_milestone(
             detail=f"Invalid milestone index. Must be between 0 and {len(active_gig.milestone_status) - 1}"
         )
     
-    # Check if milestone has been submitted
-    if active_gig.milestone_links is None:
-        active_gig.milestone_links = {}
-        
-    # Convert to a fresh dictionary
-    # Handle different possible formats safely
-    if isinstance(active_gig.milestone_links, dict):
-        milestone_links = dict(active_gig.milestone_links)
-    else:
-        try:
-            # Try to load it as JSON string
-            milestone_links = json.loads(active_gig.milestone_links) if active_gig.milestone_links else {}
-        except (TypeError, ValueError):
-            # If all else fails, start with empty dict
-            print("Could not parse milestone_links, initializing empty dict")
-            milestone_links = {}
-    
     milestone_key = str(milestone_index)
     
-    if milestone_key not in milestone_links:
+    # Check if milestone has been submitted
+    if milestone_key not in active_gig.milestone_links:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Milestone {milestone_index} has not been submitted yet"
@@ -1064,12 +1305,14 @@ async def reject_milestone(
         )
     
     # Get the gig details
-    result = await db.execute(select(Gig).filter(Gig.id == active_gig.gig_id))
-    gig = result.scalar_one_or_none()
+    gig = await loader.load(Gig, active_gig.gig_id)
     
     # Update gig status back to OPEN
     gig.status = "OPEN"
     
+    # Freeze the milestone statuses: the gig's milestones are reused if it's accepted again
+    active_gig.final_milestone_status = active_gig.milestone_status
+    
     # Update active gig status to TERMINATED
     active_gig.status = "TERMINATED"
     
@@ -1087,49 +1330,35 @@ async def reject_milestone(
     # For all approved milestones, pay the freelancer
     # This is already handled in the approve_milestone endpoint
     
-    await db.commit()
-    
-    # Re-fetch the gig to ensure we have the latest data
-    result = await db.execute(select(ActiveGig).filter(ActiveGig.id == active_gig_id))
-    active_gig = result.scalar_one_or_none()
-    
-    # Send Twilio notification to freelancer about gig termination
-    # Get gig details
-    gig_result = await db.execute(select(Gig).filter(Gig.id == active_gig.gig_id))
-    gig = gig_result.scalar_one_or_none()
-    
-    # Get user details
-    freelancer_result = await db.execute(select(User).filter(User.clerkId == active_gig.freelancerClerkId))
-    freelancer = freelancer_result.scalar_one_or_none()
+    # Queue Twilio notification to freelancer about gig termination
+    # The freelancer was loaded with the active gig, so this is a cache hit
+    freelancer = await loader.load(User, active_gig.freelancerClerkId)
     
     if freelancer and gig:
         await notify_freelancer_milestone_rejected(
+            db,
             freelancer_phone="+917009023965",
             gig_title=gig.title
         )
     
-    # Parse milestone_links if it's a JSON string
-    if isinstance(active_gig.milestone_links, str):
-        try:
-            active_gig.milestone_links = json.loads(active_gig.milestone_links)
-        except (ValueError, TypeError):
-            # If parsing fails, use empty dict
-            active_gig.milestone_links = {}
+    await db.commit()
+    # The gig was reopened
+    await cache.invalidate(gig_key(active_gig.gig_id))
     
     return active_gig
 
 @router.get("/active/{active_gig_id}/milestone-links", response_model=MilestoneLinksResponse)
 async def get_milestone_links(
     active_gig_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loader: BatchLoader = Depends(get_loader)
 ):
     """
     Get milestone links for an active gig.
     This is a helper endpoint to debug and ensure milestone links are correctly stored.
     """
-    # Get the active gig
-    result = await db.execute(select(ActiveGig).filter(ActiveGig.id == active_gig_id))
-    active_gig = result.scalar_one_or_none()
+    # Get the active gig together with its gig, employer and freelancer
+    active_gig = await loader.load(ActiveGig, active_gig_id)
     
     if not active_gig:
         raise HTTPException(
@@ -1137,29 +1366,14 @@ async def get_milestone_links(
             detail=f"Active gig with ID {active_gig_id} not found"
         )
     
-    # Get the gig details
-    result = await db.execute(select(Gig).filter(Gig.id == active_gig.gig_id))
-    gig = result.scalar_one_or_none()
-    
-    # Print for debugging
-    print(f"Active Gig ID: {active_gig.id}")
-    print(f"Milestone Links: {active_gig.milestone_links}")
-    print(f"Milestone Status: {active_gig.milestone_status}")
-    
-    # Parse milestone_links if it's a JSON string
-    milestone_links_data = active_gig.milestone_links
-    if isinstance(milestone_links_data, str):
-        try:
-            milestone_links_data = json.loads(milestone_links_data)
-        except (ValueError, TypeError):
-            # If parsing fails, use empty dict
-            milestone_links_data = {}
+    # Get the gig details (loaded with the active gig)
+    gig = await loader.load(Gig, active_gig.gig_id)
     
     # Return detailed information
     return {
         "active_gig_id": active_gig.id,
         "gig_id": active_gig.gig_id,
-        "milestone_links": milestone_links_data if milestone_links_data else {},
+        "milestone_links": active_gig.milestone_links,
         "milestone_status": active_gig.milestone_status,
         "milestone_count": len(active_gig.milestone_status),
         "gig_title": gig.title,
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 
 from database import get_db
-from models import User, Review, FreelancerDetails
-from schemas import ReviewCreate, ReviewResponse
+from models import User, Review
+from schemas import ReviewCreate, ReviewResponse, RatingHistogramResponse, Page
+from utils.cache import cache, freelancer_details_key
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.ratings import record_rating, get_rating_histogram, average_rating
 
 router = APIRouter()
 
@@ -64,28 +66,65 @@ async def create_review(review_data: ReviewCreate, db: AsyncSession = Depends(ge
     )
     
     db.add(new_review)
+    
+    # Add the rating to the freelancer's running totals in the same transaction;
+    # freelancers without details pick up their reviews when the details are created
+    details_updated = await record_rating(db, review_data.freelancer_clerk_id, review_data.rating)
+    
     await db.commit()
     await db.refresh(new_review)
+    if details_updated:
+        await cache.invalidate(freelancer_details_key(review_data.freelancer_clerk_id))
     
-    # Update the freelancer's average rating
-    # First, get all reviews for this freelancer
-    result = await db.execute(
-        select(func.avg(Review.rating))
-        .filter(Review.freelancer_clerk_id == review_data.freelancer_clerk_id)
-    )
-    avg_rating = result.scalar_one_or_none()
+    return new_review 
+
+# Get reviews received by a freelancer
+@router.get("/freelancer/{clerk_id}", response_model=Page[ReviewResponse])
+async def get_freelancer_reviews(
+    clerk_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the reviews a freelancer has received, newest first.
+    Pass the returned next_cursor back as cursor to fetch the next page.
+    """
+    query = select(Review).filter(Review.freelancer_clerk_id == clerk_id)
+    reviews, next_cursor = await paginate(db, query, [Review.created_at, Review.id], cursor, limit)
     
-    # Update freelancer's average rating in the freelancer details
-    if avg_rating:
-        result = await db.execute(
-            select(FreelancerDetails)
-            .filter(FreelancerDetails.clerkId == review_data.freelancer_clerk_id)
-        )
-        freelancer_details = result.scalar_one_or_none()
-        
-        if freelancer_details:
-            # Update the average rating, rounded to 1 decimal place
-            freelancer_details.averageRating = round(avg_rating, 1)
-            await db.commit()
+    return {"items": reviews, "next_cursor": next_cursor}
+
+# Get the star histogram of a freelancer's reviews
+@router.get("/freelancer/{clerk_id}/histogram", response_model=RatingHistogramResponse)
+async def get_freelancer_rating_histogram(clerk_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Get how many reviews a freelancer received for each star rating.
+    Read from the maintained per-freelancer counts row, not the reviews table.
+    """
+    counts = await get_rating_histogram(db, clerk_id)
+    total = sum(counts.values())
+    
+    return {
+        "freelancer_clerk_id": clerk_id,
+        "counts": counts,
+        "total": total,
+        "average": average_rating(sum(stars * count for stars, count in counts.items()), total)
+    }
+
+# Get reviews left by an employer
+@router.get("/employer/{clerk_id}", response_model=Page[ReviewResponse])
+async def get_employer_reviews(
+    clerk_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the reviews an employer has left, newest first.
+    Pass the returned next_cursor back as cursor to fetch the next page.
+    """
+    query = select(Review).filter(Review.employer_clerk_id == clerk_id)
+    reviews, next_cursor = await paginate(db, query, [Review.created_at, Review.id], cursor, limit)
     
-    return new_review 
\ No newline at end of file
+    return {"items": reviews, "next_cursor": next_cursor}
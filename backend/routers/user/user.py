@@ -6,6 +6,15 @@ from typing import List
 from database import get_db
 from models import User
 from schemas import UserCreate, UserResponse
+from utils.cache import (
+    cache,
+    serialize,
+    user_key,
+    user_details_key,
+    freelancer_details_key,
+    employer_details_key,
+    balance_key
+)
 
 router = APIRouter()
 
@@ -76,6 +85,13 @@ async def delete_user(clerk_id: str, db: AsyncSession = Depends(get_db)):
     # Delete user
     await db.delete(user)
     await db.commit()
+    await cache.invalidate(
+        user_key(clerk_id),
+        user_details_key(clerk_id),
+        freelancer_details_key(clerk_id),
+        employer_details_key(clerk_id),
+        balance_key(clerk_id)
+    )
     
     return {"message": "User deleted successfully"}
 
@@ -83,17 +99,21 @@ async def delete_user(clerk_id: str, db: AsyncSession = Depends(get_db)):
 async def get_user(clerk_id: str, db: AsyncSession = Depends(get_db)):
     """
     Get a user by clerk_id.
+    Served from the read-through cache; write paths invalidate it.
     """
-    result = await db.execute(select(User).filter(User.clerkId == clerk_id))
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"User with clerkId {clerk_id} not found"
-        )
+    async def load():
+        result = await db.execute(select(User).filter(User.clerkId == clerk_id))
+        user = result.scalar_one_or_none()
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with clerkId {clerk_id} not found"
+            )
+        
+        return serialize(UserResponse, user)
     
-    return user
+    return await cache.get_or_load(user_key(clerk_id), load)
 
 @router.get("/", response_model=List[UserResponse])
 async def get_all_users(db: AsyncSession = Depends(get_db)):
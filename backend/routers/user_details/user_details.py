@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List, Optional
@@ -11,7 +11,17 @@ from schemas import (
     FreelancerDetailsCreate, FreelancerDetailsResponse, FreelancerDetailsBase,
     EmployerDetailsCreate, EmployerDetailsResponse, EmployerDetailsBase
 )
-from utils.aws import upload_image_to_s3
+from utils.aws import upload_image_to_s3_async
+from utils.recommendations import refresh_for_freelancer
+from utils.ratings import get_rating_totals, average_rating
+from utils.cache import (
+    cache,
+    serialize,
+    user_details_key,
+    freelancer_details_key,
+    employer_details_key
+)
+from utils.conditional import conditional, weak_etag
 
 router = APIRouter()
 
@@ -85,7 +95,7 @@ async def create_user_details(
     # Upload profile picture to S3 if provided
     profile_picture_url = None
     if profilePicture and profilePicture.filename:
-        profile_picture_url = upload_image_to_s3(profilePicture, folder="profiles")
+        profile_picture_url = await upload_image_to_s3_async(profilePicture, folder="profiles")
     
     # Create new user details
     new_user_details = UserDetails(
@@ -156,7 +166,7 @@ async def update_user_details(
     
     # Upload profile picture to S3 if provided
     if profilePicture and profilePicture.filename:
-        profile_picture_url = upload_image_to_s3(profilePicture, folder="profiles")
+        profile_picture_url = await upload_image_to_s3_async(profilePicture, folder="profiles")
         user_details.profilePicture = profile_picture_url
     
     # Update fields if provided
@@ -169,23 +179,36 @@ async def update_user_details(
     
     # Commit changes
     await db.commit()
+    await cache.invalidate(user_details_key(clerk_id))
     await db.refresh(user_details)
     
     return user_details
 
 @router.get("/basic/{clerk_id}", response_model=UserDetailsResponse)
-async def get_user_details(clerk_id: str, db: AsyncSession = Depends(get_db)):
+async def get_user_details(clerk_id: str, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Get basic user details for a user.
+    Served from the read-through cache; write paths invalidate it.
+    Returns 304 when If-None-Match carries the current ETag.
     """
-    result = await db.execute(select(UserDetails).filter(UserDetails.clerkId == clerk_id))
-    user_details = result.scalar_one_or_none()
-    
-    if not user_details:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"User details for clerkId {clerk_id} not found"
-        )
+    async def load():
+        result = await db.execute(select(UserDetails).filter(UserDetails.clerkId == clerk_id))
+        user_details = result.scalar_one_or_none()
+        
+        if not user_details:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User details for clerkId {clerk_id} not found"
+            )
+        
+        return serialize(UserDetailsResponse, user_details)
+    
+    user_details = await cache.get_or_load(user_details_key(clerk_id), load)
+    
+    # Answer revalidations before the body is serialised
+    not_modified = conditional(request, response, weak_etag("user-details", clerk_id, user_details.get("updated_at")))
+    if not_modified:
+        return not_modified
     
     return user_details
 
@@ -206,6 +229,7 @@ async def delete_user_details(clerk_id: str, db: AsyncSession = Depends(get_db))
     # Delete user details
     await db.delete(user_details)
     await db.commit()
+    await cache.invalidate(user_details_key(clerk_id))
     
     return {"message": "User details deleted successfully"}
 
@@ -245,16 +269,24 @@ async def create_freelancer_details(
             detail=f"Freelancer details for clerkId {freelancer_data.clerkId} already exist"
         )
     
+    # Reviews left before the details existed count towards the rating
+    rating_sum, rating_count = await get_rating_totals(db, freelancer_data.clerkId)
+    
     # Create new freelancer details
     new_freelancer_details = FreelancerDetails(
         clerkId=freelancer_data.clerkId,
         occupation=freelancer_data.occupation,
         skills=freelancer_data.skills,
-        portfolioLinks=freelancer_data.portfolioLinks or []
+        portfolioLinks=freelancer_data.portfolioLinks or [],
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        averageRating=average_rating(rating_sum, rating_count)
     )
     
-    # Add to database and commit
+    # Add to database and score open gigs for the new freelancer
     db.add(new_freelancer_details)
+    await db.flush()
+    await refresh_for_freelancer(db, new_freelancer_details.clerkId)
     await db.commit()
     await db.refresh(new_freelancer_details)
     
@@ -280,28 +312,47 @@ async def update_freelancer_details(
         )
     
     # Update fields
-    for field, value in freelancer_data.dict(exclude_unset=True).items():
+    updates = freelancer_data.dict(exclude_unset=True)
+    for field, value in updates.items():
         setattr(freelancer_details, field, value)
     
+    # Re-score open gigs if the freelancer's skills changed
+    if "skills" in updates:
+        await db.flush()
+        await refresh_for_freelancer(db, clerk_id)
+    
     # Commit changes
     await db.commit()
+    await cache.invalidate(freelancer_details_key(clerk_id))
     await db.refresh(freelancer_details)
     
     return freelancer_details
 
 @router.get("/freelancer/{clerk_id}", response_model=FreelancerDetailsResponse)
-async def get_freelancer_details(clerk_id: str, db: AsyncSession = Depends(get_db)):
+async def get_freelancer_details(clerk_id: str, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Get freelancer details for a user.
+    Served from the read-through cache; write paths invalidate it.
+    Returns 304 when If-None-Match carries the current ETag.
     """
-    result = await db.execute(select(FreelancerDetails).filter(FreelancerDetails.clerkId == clerk_id))
-    freelancer_details = result.scalar_one_or_none()
-    
-    if not freelancer_details:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Freelancer details for clerkId {clerk_id} not found"
-        )
+    async def load():
+        result = await db.execute(select(FreelancerDetails).filter(FreelancerDetails.clerkId == clerk_id))
+        freelancer_details = result.scalar_one_or_none()
+        
+        if not freelancer_details:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Freelancer details for clerkId {clerk_id} not found"
+            )
+        
+        return serialize(FreelancerDetailsResponse, freelancer_details)
+    
+    freelancer_details = await cache.get_or_load(freelancer_details_key(clerk_id), load)
+    
+    # Answer revalidations before the body is serialised
+    not_modified = conditional(request, response, weak_etag("freelancer-details", clerk_id, freelancer_details.get("updated_at")))
+    if not_modified:
+        return not_modified
     
     return freelancer_details
 
@@ -322,6 +373,7 @@ async def delete_freelancer_details(clerk_id: str, db: AsyncSession = Depends(ge
     # Delete freelancer details
     await db.delete(freelancer_details)
     await db.commit()
+    await cache.invalidate(freelancer_details_key(clerk_id))
     
     return {"message": "Freelancer details deleted successfully"}
 
@@ -399,23 +451,36 @@ async def update_employer_details(
     
     # Commit changes
     await db.commit()
+    await cache.invalidate(employer_details_key(clerk_id))
     await db.refresh(employer_details)
     
     return employer_details
 
 @router.get("/employer/{clerk_id}", response_model=EmployerDetailsResponse)
-async def get_employer_details(clerk_id: str, db: AsyncSession = Depends(get_db)):
+async def get_employer_details(clerk_id: str, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Get employer details for a user.
+    Served from the read-through cache; write paths invalidate it.
+    Returns 304 when If-None-Match carries the current ETag.
     """
-    result = await db.execute(select(EmployerDetails).filter(EmployerDetails.clerkId == clerk_id))
-    employer_details = result.scalar_one_or_none()
-    
-    if not employer_details:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Employer details for clerkId {clerk_id} not found"
-        )
+    async def load():
+        result = await db.execute(select(EmployerDetails).filter(EmployerDetails.clerkId == clerk_id))
+        employer_details = result.scalar_one_or_none()
+        
+        if not employer_details:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Employer details for clerkId {clerk_id} not found"
+            )
+        
+        return serialize(EmployerDetailsResponse, employer_details)
+    
+    employer_details = await cache.get_or_load(employer_details_key(clerk_id), load)
+    
+    # Answer revalidations before the body is serialised
+    not_modified = conditional(request, response, weak_etag("employer-details", clerk_id, employer_details.get("updated_at")))
+    if not_modified:
+        return not_modified
     
     return employer_details
 
@@ -436,5 +501,6 @@ async def delete_employer_details(clerk_id: str, db: AsyncSession = Depends(get_
     # Delete employer details
     await db.delete(employer_details)
     await db.commit()
+    await cache.invalidate(employer_details_key(clerk_id))
     
     return {"message": "Employer details deleted successfully"} 
\ No newline at end of file
@@ -1,9 +1,16 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Generic, TypeVar
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
 
 # Pydantic models for API request/response
 
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """Cursor-paginated list envelope"""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 class UserBase(BaseModel):
     email: EmailStr
     firstName: str
@@ -32,6 +39,7 @@ class UserDetailsCreate(UserDetailsBase):
 class UserDetailsResponse(UserDetailsBase):
     id: int
     clerkId: str
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -48,6 +56,7 @@ class FreelancerDetailsResponse(FreelancerDetailsBase):
     id: int
     clerkId: str
     averageRating: float
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -61,6 +70,7 @@ class EmployerDetailsCreate(EmployerDetailsBase):
 class EmployerDetailsResponse(EmployerDetailsBase):
     id: int
     clerkId: str
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -82,11 +92,23 @@ class GigResponse(GigBase):
     id: int
     status: str
     created_at: datetime
+    updated_at: Optional[datetime] = None
     employerClerkId: str
 
     class Config:
         from_attributes = True
 
+class RecommendedGigResponse(BaseModel):
+    """A gig recommended to a freelancer with its precomputed match score"""
+    gig: GigResponse
+    score: float
+    skill_score: float
+    payment_score: float
+    recency_score: float
+
+    class Config:
+        from_attributes = True
+
 class GigFilter(BaseModel):
     title: Optional[str] = None
     skills_needed: Optional[List[str]] = None
@@ -154,9 +176,10 @@ class BalanceResponse(BalanceBase):
         from_attributes = True
 
 class CompanyBalanceResponse(BaseModel):
-    id: int
+    """Total escrow held by the platform, summed over its shards"""
     amount: float
-    last_updated: datetime
+    last_updated: Optional[datetime] = None
+    shard_count: int
 
     class Config:
         from_attributes = True
@@ -211,6 +234,48 @@ class MilestoneSubmitResponse(BaseModel):
     milestone_links: Dict[str, List[str]]
     milestone_status: List[str]
 
+class MilestoneUploadFile(BaseModel):
+    """A file the client wants to upload directly to S3"""
+    filename: str
+    content_type: str
+
+class MilestoneUploadUrlsRequest(BaseModel):
+    """Request body for presigned milestone upload URLs"""
+    files: List[MilestoneUploadFile]
+    method: str = Field("post", pattern="^(post|put)$")
+
+class PresignedUpload(BaseModel):
+    """Where and how to upload one file; POST sends fields as form data, PUT sends headers"""
+    key: str
+    method: str
+    url: str
+    fields: Optional[Dict[str, str]] = None
+    headers: Optional[Dict[str, str]] = None
+    file_url: str
+
+class MilestoneUploadUrlsResponse(BaseModel):
+    """Response schema for presigned milestone upload URLs"""
+    uploads: List[PresignedUpload]
+    expires_in: int
+
+class MilestoneUploadConfirm(BaseModel):
+    """Object keys uploaded through presigned URLs, plus any plain links, to submit for a milestone"""
+    keys: List[str]
+    links: List[str] = []
+
+class PendingReviewMilestone(BaseModel):
+    """A submitted milestone waiting for the employer's approval"""
+    milestone_id: int
+    active_gig_id: int
+    gig_id: int
+    gig_title: str
+    freelancerClerkId: str
+    milestone_index: int
+    description: Optional[str] = None
+    amount: Optional[float] = None
+    links: List[str] = []
+    submitted_at: datetime
+
 class MilestoneApproveResponse(BaseModel):
     """Response schema for milestone approval"""
     success: bool
@@ -237,4 +302,11 @@ class ReviewResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class RatingHistogramResponse(BaseModel):
+    """Number of reviews a freelancer received for each star rating"""
+    freelancer_clerk_id: str
+    counts: Dict[int, int]  # Star rating (1-5) to number of reviews
+    total: int
+    average: float 
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""
+Recompute every freelancer's rating aggregate and star histogram from the
+reviews table.
+
+create_review keeps rating_sum, rating_count, averageRating and the
+freelancer_rating_counts histogram up to date incrementally; run this after
+importing reviews or editing them by hand. Only rows that changed are written.
+
+Usage:
+    python scripts/backfill_ratings.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import AsyncSessionLocal
+from utils.cache import cache, freelancer_details_key
+from utils.ratings import backfill_ratings
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        changed = await backfill_ratings(db)
+        await db.commit()
+    # Drop stale profiles from the shared cache tier
+    await cache.invalidate(*(freelancer_details_key(clerk_id) for clerk_id in changed))
+    print(f"Rating aggregates updated for {len(changed)} freelancer(s)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,26 @@
+"""
+Delete expired idempotency records.
+
+Expired keys are reclaimed when reused, so this only keeps the table small.
+Run it periodically (e.g. daily).
+
+Usage:
+    python scripts/purge_idempotency_records.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import AsyncSessionLocal
+from utils.idempotency import purge_expired
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        deleted = await purge_expired(db)
+        await db.commit()
+    print(f"Deleted {deleted} expired idempotency records")
+
+if __name__ == "__main__":
+    asyncio.run(main())
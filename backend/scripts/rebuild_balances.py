@@ -0,0 +1,42 @@
+"""
+Rebuild the balances and company_balance projections from the ledger.
+
+Balances are a cached running sum of ledger_entries, kept up to date by
+utils/ledger.py. Use --check to report accounts whose projection has
+drifted from the ledger without changing anything; without it the
+projections are recomputed (writers are blocked while it runs).
+
+Usage:
+    python scripts/rebuild_balances.py --check
+    python scripts/rebuild_balances.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import AsyncSessionLocal
+from utils.ledger import find_drift, rebuild_projections
+
+async def main(check_only: bool):
+    async with AsyncSessionLocal() as db:
+        drift = await find_drift(db)
+        for account, ledger_minor, projection_minor in drift:
+            print(f"{account}: ledger {ledger_minor}, projection {projection_minor}")
+        print(f"{len(drift)} account(s) out of sync")
+
+        if check_only:
+            return 1 if drift else 0
+
+        await rebuild_projections(db)
+        await db.commit()
+    print("Balance projections rebuilt")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild balance projections from the ledger")
+    parser.add_argument("--check", action="store_true", help="Only report drift, exit 1 if any")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.check)))
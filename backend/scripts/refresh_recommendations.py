@@ -0,0 +1,27 @@
+"""
+Rebuild the gig_recommendations score table.
+
+Incremental refreshes happen when gigs are created and when freelancer
+skills change; run this periodically (e.g. hourly) so recency scores decay
+and closed gigs drop out.
+
+Usage:
+    python scripts/refresh_recommendations.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import AsyncSessionLocal
+from utils.recommendations import refresh_all
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        await refresh_all(db)
+        await db.commit()
+    print("Gig recommendations refreshed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
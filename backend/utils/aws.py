@@ -2,9 +2,11 @@ import os
 from dotenv import load_dotenv
 load_dotenv() 
 
-import boto3
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
 from uuid import uuid4
-from botocore.exceptions import NoCredentialsError
 from fastapi import UploadFile, HTTPException, status
 
 AWS_REGION = os.getenv("AWS_REGION")
@@ -12,6 +14,32 @@ AWS_S3_BUCKET_NAME = os.getenv("AWS_S3_BUCKET_NAME")
 AWS_CLOUDFRONT_URL = os.getenv("AWS_CLOUDFRONT_URL")
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
+# Point at a local S3 stand-in (e.g. moto_server or localstack) instead of AWS
+AWS_S3_ENDPOINT_URL = os.getenv("AWS_S3_ENDPOINT_URL") or None
+
+# Upload tuning
+# S3_UPLOAD_CONCURRENCY     - uploads running at once per process (size of the upload thread pool)
+# S3_MULTIPART_THRESHOLD_MB - files larger than this are sent as multipart uploads
+# S3_MULTIPART_CHUNKSIZE_MB - size of each multipart part
+# S3_MULTIPART_CONCURRENCY  - parts of a single file uploaded in parallel
+S3_UPLOAD_CONCURRENCY = int(os.getenv("S3_UPLOAD_CONCURRENCY", "4"))
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8"))
+S3_MULTIPART_CHUNKSIZE_MB = int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "8"))
+S3_MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", "4"))
+
+# Direct-to-S3 (presigned) uploads
+# S3_PRESIGNED_URL_EXPIRES - seconds a presigned upload URL stays valid
+# S3_MAX_UPLOAD_MB         - largest object a presigned upload may create
+S3_PRESIGNED_URL_EXPIRES = int(os.getenv("S3_PRESIGNED_URL_EXPIRES", "900"))
+S3_MAX_UPLOAD_MB = int(os.getenv("S3_MAX_UPLOAD_MB", "100"))
+
+MB = 1024 * 1024
+
+# Bounded pool for the blocking boto3 calls, so uploads never run on the event loop
+_upload_executor = ThreadPoolExecutor(
+    max_workers=S3_UPLOAD_CONCURRENCY,
+    thread_name_prefix="s3-upload"
+)
 
 
 # Validate AWS environment variables
@@ -21,36 +49,62 @@ if not AWS_REGION or not AWS_S3_BUCKET_NAME:
 if not AWS_ACCESS_KEY_ID or not AWS_SECRET_ACCESS_KEY:
     print("WARNING: AWS_ACCESS_KEY_ID or AWS_SECRET_ACCESS_KEY environment variables are missing. File uploads will fail.")
 
-# Initialize S3 client only if credentials are available
-s3_client = None
-try:
-    s3_client = boto3.client(
-        "s3",
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        region_name=AWS_REGION,
-    )
-    # Test connection
-    s3_client.list_buckets()
-    print("Successfully connected to AWS S3")
-except Exception as e:
-    print(f"Failed to initialize S3 client: {str(e)}")
+# The S3 client is created on first use rather than at import: boto3 is slow
+# to import and build, and most cold starts never touch S3
+_s3_client = None
+_transfer_config = None
+_s3_client_lock = threading.Lock()
 
-def upload_image_to_s3(file: UploadFile, folder="general"):
+def get_s3_client():
     """
-    Upload an image file to AWS S3 and return its CloudFront URL.
+    Return the shared S3 client, creating it on first call.
     
-    Args:
-        file (UploadFile): The image file to upload
-        folder (str): Folder path within the S3 bucket (e.g., "profiles", "milestones")
-        
     Returns:
-        str: The CloudFront URL or S3 URL of the uploaded image
+        The boto3 S3 client, or None if it could not be created
+    """
+    global _s3_client
+    if _s3_client is None:
+        # Upload threads may race to create the client
+        with _s3_client_lock:
+            if _s3_client is None:
+                try:
+                    import boto3
+                    from botocore.config import Config
+                    
+                    _s3_client = boto3.client(
+                        "s3",
+                        aws_access_key_id=AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                        region_name=AWS_REGION,
+                        endpoint_url=AWS_S3_ENDPOINT_URL,
+                        # Enough HTTP connections for every upload thread and its multipart parts
+                        config=Config(max_pool_connections=S3_UPLOAD_CONCURRENCY * S3_MULTIPART_CONCURRENCY),
+                    )
+                except Exception as e:
+                    print(f"Failed to initialize S3 client: {str(e)}")
+    return _s3_client
+
+def get_transfer_config():
+    """Return the TransferConfig used for uploads (multipart above S3_MULTIPART_THRESHOLD_MB)."""
+    global _transfer_config
+    if _transfer_config is None:
+        from boto3.s3.transfer import TransferConfig
         
-    Raises:
-        HTTPException: If upload fails or credentials are invalid
+        _transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD_MB * MB,
+            multipart_chunksize=S3_MULTIPART_CHUNKSIZE_MB * MB,
+            max_concurrency=S3_MULTIPART_CONCURRENCY,
+            use_threads=True
+        )
+    return _transfer_config
+
+def _require_s3():
+    """
+    Return the S3 client, raising a 500 HTTPException if it or the bucket
+    settings are missing.
     """
     # Check if S3 client is initialized
+    s3_client = get_s3_client()
     if s3_client is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -64,6 +118,27 @@ def upload_image_to_s3(file: UploadFile, folder="general"):
             detail="AWS_REGION or AWS_S3_BUCKET_NAME environment variables are missing"
         )
     
+    return s3_client
+
+def _validate_image_type(content_type: Optional[str]) -> str:
+    if not content_type or not content_type.startswith('image/'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an image"
+        )
+    return content_type
+
+def _validate_upload(file: UploadFile) -> str:
+    """
+    Check that the file is a non-empty image. This only looks at the request,
+    so it is cheap enough to run on the event loop.
+
+    Returns:
+        str: The file's content type
+
+    Raises:
+        HTTPException: If the file is missing or not an image
+    """
     # Check if file is None or empty
     if file is None:
         raise HTTPException(
@@ -77,33 +152,65 @@ def upload_image_to_s3(file: UploadFile, folder="general"):
             detail="Empty file provided"
         )
     
-    try:
-        # Validate file type
-        content_type = file.content_type
-        if not content_type or not content_type.startswith('image/'):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="File must be an image"
-            )
+    # Validate file type
+    return _validate_image_type(file.content_type)
+
+def build_object_key(folder: str, filename: str) -> str:
+    """Return a unique object key under folder, keeping the file's extension."""
+    file_extension = filename.split(".")[-1]
+    return f"{folder}/{uuid4().hex}.{file_extension}"
+
+def get_object_url(key: str) -> str:
+    """Return the CloudFront URL (or direct S3 URL) for an object key."""
+    if AWS_CLOUDFRONT_URL:
+        return f"{AWS_CLOUDFRONT_URL}/{key}"
+    if AWS_S3_ENDPOINT_URL:
+        return f"{AWS_S3_ENDPOINT_URL.rstrip('/')}/{AWS_S3_BUCKET_NAME}/{key}"
+    return f"https://{AWS_S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
+
+def upload_image_to_s3(file: UploadFile, folder="general"):
+    """
+    Upload an image file to AWS S3 and return its CloudFront URL.
+    
+    This call blocks; from async handlers use upload_image_to_s3_async or
+    upload_images_to_s3 instead.
+    
+    The file is streamed from the UploadFile's spooled file in chunks, and
+    files above S3_MULTIPART_THRESHOLD_MB are sent as multipart uploads.
+    
+    Args:
+        file (UploadFile): The image file to upload
+        folder (str): Folder path within the S3 bucket (e.g., "profiles", "milestones")
         
+    Returns:
+        str: The CloudFront URL or S3 URL of the uploaded image
+        
+    Raises:
+        HTTPException: If upload fails or credentials are invalid
+    """
+    return _upload_validated(file, folder, _validate_upload(file))
+
+def _upload_validated(file: UploadFile, folder: str, content_type: str) -> str:
+    """Upload a file already checked by _validate_upload; blocks on boto3."""
+    from botocore.exceptions import NoCredentialsError
+    
+    s3_client = _require_s3()
+    
+    try:
         # Generate unique filename
-        file_extension = file.filename.split(".")[-1]
-        unique_filename = f"{folder}/{uuid4().hex}.{file_extension}"
+        unique_filename = build_object_key(folder, file.filename)
 
-        # Upload to S3
+        # Upload to S3, reading from the start of the spooled file
+        file.file.seek(0)
         s3_client.upload_fileobj(
             file.file,
             AWS_S3_BUCKET_NAME,
             unique_filename,
-            ExtraArgs={"ContentType": content_type}
+            ExtraArgs={"ContentType": content_type},
+            Config=get_transfer_config()
         )
 
-        # Generate URL
-        url = (f"{AWS_CLOUDFRONT_URL}/{unique_filename}"
-               if AWS_CLOUDFRONT_URL
-               else f"https://{AWS_S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{unique_filename}")
-        
-        return url
+        return get_object_url(unique_filename)
 
     except NoCredentialsError:
         raise HTTPException(
@@ -116,6 +223,146 @@ def upload_image_to_s3(file: UploadFile, folder="general"):
             detail=f"Error uploading image: {str(e)}"
         )
 
+async def upload_image_to_s3_async(file: UploadFile, folder="general"):
+    """
+    Upload an image file to S3 without blocking the event loop.
+    
+    The upload runs on the bounded upload thread pool; see upload_image_to_s3
+    for arguments, return value and errors.
+    """
+    # Check the file on the loop so bad input fails before a thread is used;
+    # building the S3 client can block, so that happens in the worker
+    content_type = _validate_upload(file)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_upload_executor, _upload_validated, file, folder, content_type)
+
+async def upload_images_to_s3(
+    files: List[UploadFile],
+    folder="general",
+    return_exceptions: bool = False
+) -> List[Union[str, Exception]]:
+    """
+    Upload several image files concurrently (at most S3_UPLOAD_CONCURRENCY at a time).
+    
+    Args:
+        files (List[UploadFile]): The image files to upload
+        folder (str): Folder path within the S3 bucket
+        return_exceptions (bool): If True, a failed upload yields its exception in
+            the result list instead of raising, so the other files still succeed
+        
+    Returns:
+        list: URLs (or exceptions) in the same order as files
+    """
+    return await asyncio.gather(
+        *(upload_image_to_s3_async(file, folder) for file in files),
+        return_exceptions=return_exceptions
+    )
+
+def create_presigned_upload(folder: str, filename: str, content_type: str, method: str = "post") -> Dict[str, Any]:
+    """
+    Issue a presigned URL the client can upload one image to directly, so the
+    bytes never pass through the API.
+    
+    POST uploads are limited to S3_MAX_UPLOAD_MB and the given content type by
+    the signed policy. PUT uploads must send the returned headers.
+    
+    Args:
+        folder (str): Folder path within the S3 bucket the object is created under
+        filename (str): Original file name (only its extension is kept)
+        content_type (str): Image content type the upload must use
+        method (str): "post" for a presigned POST form, "put" for a presigned PUT URL
+        
+    Returns:
+        dict: key, method, url, fields (POST form fields), headers (PUT headers)
+        and file_url (where the object will be served from)
+        
+    Raises:
+        HTTPException: If S3 is not configured, the file is not an image or signing fails
+    """
+    from botocore.exceptions import NoCredentialsError
+    
+    s3_client = _require_s3()
+    _validate_image_type(content_type)
+    if not filename:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Empty file provided"
+        )
+    
+    key = build_object_key(folder, filename)
+    try:
+        if method == "put":
+            url = s3_client.generate_presigned_url(
+                "put_object",
+                Params={"Bucket": AWS_S3_BUCKET_NAME, "Key": key, "ContentType": content_type},
+                ExpiresIn=S3_PRESIGNED_URL_EXPIRES
+            )
+            fields = None
+            headers = {"Content-Type": content_type}
+        else:
+            presigned = s3_client.generate_presigned_post(
+                AWS_S3_BUCKET_NAME,
+                key,
+                Fields={"Content-Type": content_type},
+                Conditions=[
+                    {"Content-Type": content_type},
+                    ["content-length-range", 1, S3_MAX_UPLOAD_MB * MB]
+                ],
+                ExpiresIn=S3_PRESIGNED_URL_EXPIRES
+            )
+            url = presigned["url"]
+            fields = presigned["fields"]
+            headers = None
+    except NoCredentialsError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="AWS credentials are invalid or not found. Make sure the access key ID and secret key are correct."
+        )
+    
+    return {
+        "key": key,
+        "method": method,
+        "url": url,
+        "fields": fields,
+        "headers": headers,
+        "file_url": get_object_url(key)
+    }
+
+def _head_object(key: str) -> Optional[Dict[str, Any]]:
+    s3_client = get_s3_client()
+    try:
+        return s3_client.head_object(Bucket=AWS_S3_BUCKET_NAME, Key=key)
+    except s3_client.exceptions.ClientError as e:
+        code = e.response.get("Error", {}).get("Code")
+        if code in ("404", "NoSuchKey", "NotFound"):
+            return None
+        if code in ("403", "AccessDenied", "Forbidden"):
+            # S3 also answers 403 for a missing key when the role lacks s3:ListBucket,
+            # so a missing object and a missing permission can't be told apart here
+            print(f"S3 denied HeadObject on {key}: check s3:GetObject and s3:ListBucket on {AWS_S3_BUCKET_NAME}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="The server is not permitted to check uploaded files (needs s3:GetObject and s3:ListBucket)."
+            )
+        print(f"S3 HeadObject failed on {key}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Could not check uploaded file {key}. Please retry."
+        )
+
+async def head_objects(keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Fetch object metadata for several keys concurrently on the upload thread pool.
+    
+    Returns:
+        list: head_object responses in key order, None for keys that don't exist
+    """
+    _require_s3()
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *(loop.run_in_executor(_upload_executor, _head_object, key) for key in keys)
+    )
+
 def is_url(text):
     """
     Check if a string is a URL
@@ -0,0 +1,223 @@
+"""
+Read-through cache for hot, single-row read endpoints.
+
+Two tiers:
+    local  - in-process LRU with a short TTL (CACHE_LOCAL_TTL), always on
+    shared - optional Redis (or any Redis-compatible server) at CACHE_REDIS_URL,
+             shared by every process, with a longer TTL (CACHE_SHARED_TTL)
+
+Values are the JSON-serialisable response bodies, keyed by helpers like
+user_key(clerk_id). Write paths call invalidate() after they commit; that
+deletes the key from the local tier and the shared tier. Other processes'
+local copies expire within CACHE_LOCAL_TTL, which bounds staleness.
+
+The shared tier needs the `redis` package (redis.asyncio). Without it, or
+without CACHE_REDIS_URL, only the local tier is used.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+
+load_dotenv()
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+CACHE_LOCAL_MAXSIZE = int(os.getenv("CACHE_LOCAL_MAXSIZE", "2048"))
+CACHE_LOCAL_TTL = float(os.getenv("CACHE_LOCAL_TTL", "5"))
+CACHE_SHARED_TTL = int(os.getenv("CACHE_SHARED_TTL", "60"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL") or None
+# Prefix for shared keys, so several deployments can share one Redis
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "workly:")
+
+class LocalCache:
+    """Least-recently-used cache with a per-entry time to live."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str):
+        """Return (True, value) on a fresh hit, (False, None) otherwise."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class Cache:
+    """Two-tier read-through cache with hit/miss counters."""
+
+    def __init__(self, local: LocalCache, redis_url: Optional[str] = None):
+        self.local = local
+        self.redis_url = redis_url
+        self._redis = None
+        self._redis_failed = False
+        # Concurrent misses for the same key share one load
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.metrics = {
+            "local_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "shared_errors": 0,
+        }
+
+    def _get_redis(self):
+        # Created on first use so importing the API never opens a connection
+        if self._redis is None and self.redis_url and not self._redis_failed:
+            try:
+                import redis.asyncio as redis
+
+                self._redis = redis.from_url(self.redis_url, decode_responses=True)
+            except Exception as e:
+                self._redis_failed = True
+                print(f"Shared cache disabled: {str(e)}")
+        return self._redis
+
+    async def _shared_get(self, key: str):
+        client = self._get_redis()
+        if client is None:
+            return False, None
+        try:
+            raw = await client.get(CACHE_KEY_PREFIX + key)
+        except Exception as e:
+            self.metrics["shared_errors"] += 1
+            print(f"Shared cache read failed for {key}: {str(e)}")
+            return False, None
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+
+    async def _shared_set(self, key: str, value: Any):
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            await client.set(CACHE_KEY_PREFIX + key, json.dumps(value), ex=CACHE_SHARED_TTL)
+        except Exception as e:
+            self.metrics["shared_errors"] += 1
+            print(f"Shared cache write failed for {key}: {str(e)}")
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, calling loader on a miss.
+
+        Args:
+            key: Cache key
+            loader: Coroutine function returning a JSON-serialisable value.
+                Exceptions (e.g. a 404 HTTPException) propagate and nothing is cached.
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        if not CACHE_ENABLED:
+            return await loader()
+
+        hit, value = self.local.get(key)
+        if hit:
+            self.metrics["local_hits"] += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            hit, value = await self._shared_get(key)
+            if hit:
+                self.metrics["shared_hits"] += 1
+            else:
+                self.metrics["misses"] += 1
+                value = await loader()
+                await self._shared_set(key, value)
+            self.local.set(key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def invalidate(self, *keys: str):
+        """Drop keys from both tiers. Call after the write has committed."""
+        for key in keys:
+            self.local.delete(key)
+        self.metrics["invalidations"] += len(keys)
+
+        client = self._get_redis()
+        if client is not None and keys:
+            try:
+                await client.delete(*(CACHE_KEY_PREFIX + key for key in keys))
+            except Exception as e:
+                self.metrics["shared_errors"] += 1
+                print(f"Shared cache invalidation failed for {keys}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus derived hit ratio, for the metrics endpoint."""
+        lookups = self.metrics["local_hits"] + self.metrics["shared_hits"] + self.metrics["misses"]
+        hits = self.metrics["local_hits"] + self.metrics["shared_hits"]
+        return {
+            **self.metrics,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "local_size": len(self.local),
+            "shared_enabled": self._get_redis() is not None,
+            "enabled": CACHE_ENABLED,
+        }
+
+def serialize(response_model, obj) -> Any:
+    """Convert an ORM object to the JSON body its response model produces, for caching."""
+    return jsonable_encoder(response_model.model_validate(obj))
+
+cache = Cache(LocalCache(CACHE_LOCAL_MAXSIZE, CACHE_LOCAL_TTL), CACHE_REDIS_URL)
+
+# Cache keys, one helper per cached endpoint
+def gig_key(gig_id: int) -> str:
+    return f"gig:{gig_id}"
+
+def user_key(clerk_id: str) -> str:
+    return f"user:{clerk_id}"
+
+def user_details_key(clerk_id: str) -> str:
+    return f"user-details:{clerk_id}"
+
+def freelancer_details_key(clerk_id: str) -> str:
+    return f"freelancer-details:{clerk_id}"
+
+def employer_details_key(clerk_id: str) -> str:
+    return f"employer-details:{clerk_id}"
+
+def balance_key(clerk_id: str) -> str:
+    return f"balance:{clerk_id}"
@@ -0,0 +1,96 @@
+"""
+Conditional GET support: weak ETags and Last-Modified validators.
+
+Single resources get a weak ETag derived from the row's updated_at, list
+endpoints get an ETag and Last-Modified derived from the newest updated_at
+among the rows they list. A request whose If-None-Match (or, without one,
+If-Modified-Since) still matches gets an empty 304 instead of the body, so
+handlers check it before serialising anything.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+# Let clients store responses but revalidate them on every use
+CACHE_CONTROL = "private, no-cache"
+
+def weak_etag(*parts: Any) -> str:
+    """
+    Build a weak ETag from the values identifying a representation's version,
+    e.g. weak_etag("gig", gig.id, gig.updated_at).
+    """
+    raw = ":".join("" if part is None else str(part) for part in parts)
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def not_modified_since(if_modified_since: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """True if last_modified is no later than the If-Modified-Since date (to the second)."""
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+def conditional(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> Optional[Response]:
+    """
+    Attach validators to the response and evaluate the request's preconditions.
+
+    Args:
+        request: The incoming request
+        response: The endpoint's Response parameter, which receives the headers
+        etag: Weak ETag of the current representation
+        last_modified: When the representation last changed, for list endpoints
+
+    Returns:
+        A 304 Response to return instead of the body, or None to send the body
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    response.headers.update(headers)
+
+    # If-None-Match takes precedence; If-Modified-Since is only used without it
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, etag)
+    else:
+        fresh = not_modified_since(request.headers.get("if-modified-since"), last_modified)
+
+    if fresh:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
@@ -0,0 +1,181 @@
+"""
+Idempotency-Key support for mutation endpoints.
+
+A client that may retry a request sends a unique Idempotency-Key header.
+The first request with a key inserts an IdempotencyRecord in its own
+transaction and stores its response there before committing. A retry with
+the same key replays that response without running the handler again.
+While the first request is still running, the retry's insert waits on the
+row lock and then replays. If the first request failed and rolled back, the
+retry runs normally.
+
+Usage:
+    async def handler(..., idempotency: Idempotency = Depends(idempotent("scope"))):
+        ...
+        await idempotency.save(ResponseModel, result)
+        await db.commit()
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from database import get_db
+from models import IdempotencyRecord
+
+load_dotenv()
+
+# How long a stored response can be replayed
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+MAX_KEY_LENGTH = 255
+
+class IdempotentReplay(Exception):
+    """Raised by the dependency to short-circuit a handler with a stored response."""
+
+    def __init__(self, status_code: int, body: Any):
+        self.status_code = status_code
+        self.body = body
+
+async def idempotent_replay_handler(request: Request, exc: IdempotentReplay):
+    """Exception handler returning the stored response (registered in main.py)."""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=exc.body,
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+class Idempotency:
+    """Handle to the current request's idempotency record (inactive without a key)."""
+
+    def __init__(self, db: AsyncSession, key: Optional[str] = None, scope: Optional[str] = None):
+        self.db = db
+        self.key = key
+        self.scope = scope
+
+    @property
+    def active(self) -> bool:
+        return self.key is not None
+
+    async def save(self, response_model, result, status_code: int = status.HTTP_200_OK):
+        """
+        Store the response for replay. Call after all work is done and before
+        the handler commits, so the response commits together with the work.
+
+        Args:
+            response_model: The endpoint's response model, used to serialise result
+            result: The value the handler is about to return
+            status_code: The status code the handler responds with
+        """
+        if not self.active:
+            return
+        body = jsonable_encoder(response_model.model_validate(result))
+        await self.db.execute(
+            update(IdempotencyRecord)
+            .where(IdempotencyRecord.key == self.key, IdempotencyRecord.scope == self.scope)
+            .values(status_code=status_code, response_body=body)
+        )
+
+async def _request_hash(request: Request) -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.url.path.encode())
+    digest.update(str(sorted(request.query_params.multi_items())).encode())
+    digest.update(await request.body())
+    return digest.hexdigest()
+
+def idempotent(scope: str):
+    """
+    Build a FastAPI dependency that honours the Idempotency-Key header.
+
+    Args:
+        scope: Name of the endpoint; keys are unique per scope
+
+    Returns:
+        A dependency yielding an Idempotency handle
+    """
+    async def dependency(
+        request: Request,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+        db: AsyncSession = Depends(get_db)
+    ) -> Idempotency:
+        if not idempotency_key:
+            return Idempotency(db)
+
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"
+            )
+
+        request_hash = await _request_hash(request)
+        now = datetime.utcnow()
+
+        # Claim the key, or take over a record that has expired
+        statement = insert(IdempotencyRecord).values(
+            key=idempotency_key,
+            scope=scope,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+        )
+        result = await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[IdempotencyRecord.key, IdempotencyRecord.scope],
+                set_={
+                    "request_hash": statement.excluded.request_hash,
+                    "status_code": None,
+                    "response_body": None,
+                    "created_at": statement.excluded.created_at,
+                    "expires_at": statement.excluded.expires_at
+                },
+                where=IdempotencyRecord.expires_at < now
+            ).returning(IdempotencyRecord.key)
+        )
+        if result.first() is not None:
+            return Idempotency(db, idempotency_key, scope)
+
+        # The key was already used and committed
+        result = await db.execute(
+            select(IdempotencyRecord).filter(
+                IdempotencyRecord.key == idempotency_key,
+                IdempotencyRecord.scope == scope
+            )
+        )
+        record = result.scalar_one()
+
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key has already been used with a different request"
+            )
+
+        if record.status_code is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key completed without a stored response"
+            )
+
+        raise IdempotentReplay(record.status_code, record.response_body)
+
+    return dependency
+
+async def purge_expired(db: AsyncSession) -> int:
+    """
+    Delete expired idempotency records. Does not commit.
+
+    Returns:
+        int: Number of records deleted
+    """
+    result = await db.execute(
+        delete(IdempotencyRecord).where(IdempotencyRecord.expires_at < datetime.utcnow())
+    )
+    return result.rowcount
@@ -0,0 +1,326 @@
+"""
+Double-entry ledger.
+
+Every money movement is posted as a transaction: two or more LedgerEntry rows
+that share a transaction_key and sum to zero. Balance.amount_minor and
+CompanyBalance.amount_minor are a cached running-sum projection of those
+entries, changed only by transfer() with atomic single-statement updates,
+never read-modify-write.
+
+Accounts:
+    user:<clerkId>  - a user's spendable balance (projected into balances)
+    escrow:<shard>  - one shard of the platform escrow (projected into company_balance)
+    external        - money entering or leaving the platform (not projected)
+"""
+import os
+import zlib
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models import Balance, CompanyBalance, LedgerEntry
+
+load_dotenv()
+
+# Number of company_balance rows the escrow account is spread over
+ESCROW_SHARDS = int(os.getenv("ESCROW_SHARDS", "8"))
+
+# How long a transfer waits for a locked balance row before giving up with a 409
+LEDGER_LOCK_TIMEOUT_MS = int(os.getenv("LEDGER_LOCK_TIMEOUT_MS", "2000"))
+
+EXTERNAL_ACCOUNT = "external"
+
+# lock_not_available (lock_timeout expired) and deadlock_detected
+_LOCK_FAILURE_CODES = ("55P03", "40P01")
+
+def to_minor(amount) -> int:
+    """Convert a currency amount (e.g. 12.34) to integer minor units (1234)."""
+    return int(Decimal(str(amount)).scaleb(2).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def from_minor(amount_minor: int) -> float:
+    """Convert integer minor units back to a currency amount for API responses."""
+    return (amount_minor or 0) / 100
+
+def user_account(clerk_id: str) -> str:
+    return f"user:{clerk_id}"
+
+def escrow_account(shard: int) -> str:
+    return f"escrow:{shard}"
+
+def escrow_shard_for_gig(gig_id: int) -> int:
+    """Pick the escrow shard holding a gig's funds (stable for the gig's lifetime)."""
+    return zlib.crc32(str(gig_id).encode()) % ESCROW_SHARDS + 1
+
+class LedgerError(Exception):
+    """Base class for transfers that could not be applied."""
+
+class InsufficientFunds(LedgerError):
+    """The source account doesn't hold the amount being moved."""
+
+    def __init__(self, account: str, amount_minor: int):
+        super().__init__(f"Account {account} has less than {amount_minor}")
+        self.account = account
+        self.amount_minor = amount_minor
+
+class DuplicateTransaction(LedgerError):
+    """A transaction with this key has already been posted."""
+
+    def __init__(self, transaction_key: str):
+        super().__init__(f"Ledger transaction {transaction_key} has already been posted")
+        self.transaction_key = transaction_key
+
+def _is_lock_failure(error: DBAPIError) -> bool:
+    code = getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+    return code in _LOCK_FAILURE_CODES
+
+async def _set_lock_timeout(db: AsyncSession):
+    # Fail fast instead of queueing behind a long transaction holding the row
+    await db.execute(text(f"SET LOCAL lock_timeout = '{int(LEDGER_LOCK_TIMEOUT_MS)}ms'"))
+
+async def _credit(db: AsyncSession, account: str, amount_minor: int):
+    """Add to an account's projection row, creating the row if it's missing."""
+    if account.startswith("user:"):
+        statement = insert(Balance).values(clerkId=account[len("user:"):], amount_minor=amount_minor)
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[Balance.clerkId],
+            set_={"amount_minor": Balance.amount_minor + statement.excluded.amount_minor}
+        ))
+    elif account.startswith("escrow:"):
+        statement = insert(CompanyBalance).values(
+            id=int(account[len("escrow:"):]),
+            amount_minor=amount_minor,
+            last_updated=datetime.utcnow()
+        )
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[CompanyBalance.id],
+            set_={
+                "amount_minor": CompanyBalance.amount_minor + statement.excluded.amount_minor,
+                "last_updated": statement.excluded.last_updated
+            }
+        ))
+
+async def _debit_escrow_shard(db: AsyncSession, shard: int, amount_minor: int) -> bool:
+    result = await db.execute(
+        update(CompanyBalance)
+        .where(and_(CompanyBalance.id == shard, CompanyBalance.amount_minor >= amount_minor))
+        .values(
+            amount_minor=CompanyBalance.amount_minor - amount_minor,
+            last_updated=datetime.utcnow()
+        )
+        .returning(CompanyBalance.id)
+    )
+    return result.first() is not None
+
+async def _debit(db: AsyncSession, account: str, amount_minor: int, escrow_fallback: bool) -> str:
+    """
+    Subtract from an account's projection row only if it holds enough, in a
+    single conditional UPDATE ... WHERE amount_minor >= x RETURNING.
+
+    Returns:
+        str: The account actually debited (another escrow shard on fallback)
+    """
+    if account.startswith("user:"):
+        result = await db.execute(
+            update(Balance)
+            .where(and_(Balance.clerkId == account[len("user:"):], Balance.amount_minor >= amount_minor))
+            .values(amount_minor=Balance.amount_minor - amount_minor)
+            .returning(Balance.id)
+        )
+        if result.first() is None:
+            raise InsufficientFunds(account, amount_minor)
+        return account
+
+    if account.startswith("escrow:"):
+        shard = int(account[len("escrow:"):])
+        if await _debit_escrow_shard(db, shard, amount_minor):
+            return account
+
+        if escrow_fallback:
+            # Take the funds from any other shard that holds them, skipping
+            # shards other transactions are busy with instead of waiting on them
+            result = await db.execute(
+                select(CompanyBalance.id)
+                .filter(and_(CompanyBalance.id != shard, CompanyBalance.amount_minor >= amount_minor))
+                .order_by(CompanyBalance.amount_minor.desc())
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            fallback_shard = result.scalar_one_or_none()
+            if fallback_shard is not None and await _debit_escrow_shard(db, fallback_shard, amount_minor):
+                return escrow_account(fallback_shard)
+
+        raise InsufficientFunds(account, amount_minor)
+
+    # The external account has no projection and no limit
+    return account
+
+async def transfer(
+    db: AsyncSession,
+    transaction_key: str,
+    source: str,
+    destination: str,
+    amount_minor: int,
+    description: Optional[str] = None,
+    escrow_fallback: bool = True
+) -> Tuple[str, str]:
+    """
+    Move money between two accounts: the one primitive every balance change goes
+    through. Does not commit.
+
+    The source is debited with a conditional UPDATE, so it can never go
+    negative, and the destination row is upserted, so a missing balance is
+    created in the same transaction. Rows are locked in account order and
+    waits are bounded by LEDGER_LOCK_TIMEOUT_MS. The two ledger entries are
+    written last.
+
+    Args:
+        db: The database session
+        transaction_key: Idempotency key for the transfer
+        source: Account to debit (user:<clerkId>, escrow:<shard> or external)
+        destination: Account to credit
+        amount_minor: Positive amount in minor units
+        description: Optional human-readable description stored on both entries
+        escrow_fallback: If the source escrow shard is short, debit another shard instead
+
+    Returns:
+        tuple: (source, destination) accounts as posted
+
+    Raises:
+        InsufficientFunds: If the source doesn't hold amount_minor
+        DuplicateTransaction: If transaction_key has already been posted
+        HTTPException: 409 if a balance row stayed locked past the lock timeout
+        ValueError: If the amount isn't positive or source equals destination
+    """
+    amount_minor = int(amount_minor)
+    if amount_minor <= 0:
+        raise ValueError("Transfer amount must be positive")
+    if source == destination:
+        raise ValueError("Cannot transfer to the same account")
+
+    try:
+        await _set_lock_timeout(db)
+
+        # Deterministic lock order: apply both legs sorted by account
+        # (escrow shards always sort before users, so fallback keeps the order)
+        for account, is_debit in sorted([(source, True), (destination, False)]):
+            if is_debit:
+                source = await _debit(db, account, amount_minor, escrow_fallback)
+            else:
+                await _credit(db, account, amount_minor)
+
+        now = datetime.utcnow()
+        result = await db.execute(
+            insert(LedgerEntry)
+            .values([
+                {
+                    "transaction_key": transaction_key,
+                    "account": account,
+                    "amount_minor": amount,
+                    "description": description,
+                    "created_at": now
+                }
+                for account, amount in ((source, -amount_minor), (destination, amount_minor))
+            ])
+            .on_conflict_do_nothing(constraint="uq_ledger_entries_transaction_account")
+            .returning(LedgerEntry.id)
+        )
+        if len(result.all()) != 2:
+            # The caller must roll back: the projection has already been changed
+            raise DuplicateTransaction(transaction_key)
+    except DBAPIError as e:
+        if _is_lock_failure(e):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The balance is being updated by another request. Please retry."
+            )
+        raise
+
+    return source, destination
+
+async def get_escrow_total(db: AsyncSession) -> Tuple[int, Optional[datetime]]:
+    """
+    Return the total escrow balance across all shards.
+
+    Returns:
+        tuple: (amount_minor, last_updated of the most recently updated shard)
+    """
+    result = await db.execute(
+        select(func.coalesce(func.sum(CompanyBalance.amount_minor), 0), func.max(CompanyBalance.last_updated))
+    )
+    total, last_updated = result.one()
+    return int(total), last_updated
+
+# Recompute both projections from the ledger. Rows for accounts without
+# entries are zeroed rather than deleted so foreign keys stay valid.
+_REBUILD_STATEMENTS = [
+    "LOCK TABLE ledger_entries, balances, company_balance IN SHARE ROW EXCLUSIVE MODE",
+    "UPDATE balances SET amount_minor = 0",
+    """
+    INSERT INTO balances ("clerkId", amount_minor)
+    SELECT substr(account, 6), sum(amount_minor)
+    FROM ledger_entries
+    WHERE account LIKE 'user:%'
+    GROUP BY account
+    ON CONFLICT ("clerkId") DO UPDATE SET amount_minor = EXCLUDED.amount_minor
+    """,
+    "UPDATE company_balance SET amount_minor = 0",
+    """
+    INSERT INTO company_balance (id, amount_minor, last_updated)
+    SELECT CAST(substr(account, 8) AS integer), sum(amount_minor), timezone('utc', now())
+    FROM ledger_entries
+    WHERE account LIKE 'escrow:%'
+    GROUP BY account
+    ON CONFLICT (id) DO UPDATE SET amount_minor = EXCLUDED.amount_minor, last_updated = EXCLUDED.last_updated
+    """,
+]
+
+# Projection rows that disagree with the ledger
+_DRIFT_QUERY = """
+WITH ledger AS (
+    SELECT account, sum(amount_minor) AS amount_minor
+    FROM ledger_entries
+    WHERE account LIKE 'user:%' OR account LIKE 'escrow:%'
+    GROUP BY account
+), projection AS (
+    SELECT 'user:' || "clerkId" AS account, amount_minor FROM balances
+    UNION ALL
+    SELECT 'escrow:' || id, amount_minor FROM company_balance
+)
+SELECT
+    coalesce(ledger.account, projection.account) AS account,
+    coalesce(ledger.amount_minor, 0) AS ledger_minor,
+    coalesce(projection.amount_minor, 0) AS projection_minor
+FROM ledger
+FULL OUTER JOIN projection ON projection.account = ledger.account
+WHERE coalesce(ledger.amount_minor, 0) <> coalesce(projection.amount_minor, 0)
+ORDER BY 1
+"""
+
+async def find_drift(db: AsyncSession) -> List[Tuple[str, int, int]]:
+    """
+    Compare the projection with the ledger.
+
+    Returns:
+        list: (account, ledger_minor, projection_minor) for every account that differs
+    """
+    result = await db.execute(text(_DRIFT_QUERY))
+    return [tuple(row) for row in result.all()]
+
+async def rebuild_projections(db: AsyncSession):
+    """
+    Recompute every Balance and CompanyBalance row from the ledger. Blocks
+    writers while it runs. Does not commit.
+
+    Args:
+        db: The database session
+    """
+    for statement in _REBUILD_STATEMENTS:
+        await db.execute(text(statement))
@@ -0,0 +1,127 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Depends
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
+
+from database import get_db
+from models import ActiveGig, GigRequest
+
+# Relationships fetched together with the row, so a workflow gets the gig and
+# both parties from the same query
+DEFAULT_OPTIONS = {
+    ActiveGig: [
+        joinedload(ActiveGig.gig),
+        joinedload(ActiveGig.employer),
+        joinedload(ActiveGig.freelancer),
+    ],
+    GigRequest: [
+        joinedload(GigRequest.gig),
+        joinedload(GigRequest.employer),
+        joinedload(GigRequest.freelancer),
+    ],
+}
+
+class BatchLoader:
+    """
+    Request-scoped, DataLoader-style cache of rows keyed by primary key.
+
+    load() calls made in the same event-loop tick (e.g. through asyncio.gather)
+    are collected and fetched with one SELECT ... WHERE pk IN (...) per model.
+    Every row loaded, including eagerly loaded relationships, is cached so
+    later lookups within the request cost no query.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._cache: Dict[tuple, asyncio.Future] = {}
+        self._pending: Dict[Any, List[Any]] = {}
+        self._dispatch_scheduled = False
+        self._dispatch_task = None
+
+    @staticmethod
+    def _key_column(model):
+        return inspect(model).primary_key[0]
+
+    def prime(self, *objs):
+        """Add already loaded objects (and their loaded relationships) to the cache."""
+        for obj in objs:
+            if obj is None:
+                continue
+            state = inspect(obj)
+            if not state.identity:
+                continue
+
+            key = (type(obj), state.identity[0])
+            future = self._cache.get(key)
+            if future is not None and future.done():
+                continue
+            if future is None:
+                future = asyncio.get_running_loop().create_future()
+                self._cache[key] = future
+            future.set_result(obj)
+
+            # Cache related rows that came back in the same query
+            for relationship in state.mapper.relationships:
+                if relationship.uselist or relationship.key in state.unloaded:
+                    continue
+                self.prime(getattr(obj, relationship.key))
+
+    async def load(self, model, key) -> Optional[Any]:
+        """
+        Load one row by primary key, batching with other loads in this tick.
+
+        Returns:
+            The model instance, or None if no row has that key
+        """
+        cache_key = (model, key)
+        if cache_key not in self._cache:
+            self._cache[cache_key] = asyncio.get_running_loop().create_future()
+            self._pending.setdefault(model, []).append(key)
+            if not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                asyncio.get_running_loop().call_soon(self._schedule_dispatch)
+        return await self._cache[cache_key]
+
+    async def load_many(self, model, keys: Iterable[Any]) -> List[Optional[Any]]:
+        """Load several rows by primary key with a single query; results keep key order."""
+        return list(await asyncio.gather(*(self.load(model, key) for key in keys)))
+
+    def clear(self, model, key):
+        """Drop a cached row so the next load() re-reads it."""
+        self._cache.pop((model, key), None)
+
+    def _schedule_dispatch(self):
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._dispatch_task = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self):
+        pending, self._pending = self._pending, {}
+        self._dispatch_scheduled = False
+
+        for model, keys in pending.items():
+            futures = [self._cache[(model, key)] for key in keys]
+            try:
+                column = self._key_column(model)
+                query = select(model).filter(column.in_(set(keys)))
+                for option in DEFAULT_OPTIONS.get(model, []):
+                    query = query.options(option)
+                result = await self.db.execute(query)
+                rows = result.scalars().all()
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.prime(*rows)
+            for future in futures:
+                if not future.done():
+                    future.set_result(None)
+
+async def get_loader(db: AsyncSession = Depends(get_db)) -> BatchLoader:
+    """FastAPI dependency: one BatchLoader per request, sharing the request's session."""
+    return BatchLoader(db)
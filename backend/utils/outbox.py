@@ -0,0 +1,286 @@
+"""
+Notification outbox dispatcher.
+
+Handlers write NotificationOutbox rows in the same transaction as the state
+change they notify about (see utils/twilio.py). This module delivers those
+rows in batches, off the request path, with retries and rate limiting.
+
+A batch is claimed by committing status SENDING with a lease (locked_until)
+before anything is sent, and each send's result is committed on its own.
+A dispatcher that dies mid-batch therefore leaves at most the message it
+was sending in doubt; its other claimed rows return to PENDING when the
+lease expires. Runs with a deadline (the Lambda) only claim what the rate
+limit lets them send in time and hand back anything left unsent.
+
+It runs either as a background task inside the API process (started from
+main.py) or as a scheduled Lambda (lambda_handler, see template.yaml).
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, update
+from sqlalchemy.future import select
+
+from database import AsyncSessionLocal
+from models import NotificationOutbox
+from utils.twilio import send_sms, send_sms_via_twilio
+
+load_dotenv()
+
+# console (log only, the default), twilio (real delivery) or fake (in-memory, for tests)
+SMS_TRANSPORT = os.getenv("SMS_TRANSPORT", "console").strip().lower()
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+# Messages per second across one dispatcher (Twilio long codes allow ~1/s)
+OUTBOX_RATE_LIMIT = float(os.getenv("OUTBOX_RATE_LIMIT", "1"))
+# Base delay in seconds for exponential retry backoff
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", "30"))
+# How long a claimed batch stays reserved for its dispatcher; claims are sized to fit in it
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+# Time kept back before the Lambda timeout to hand unsent rows back and exit
+OUTBOX_DEADLINE_MARGIN = float(os.getenv("OUTBOX_DEADLINE_MARGIN", "5"))
+
+class ConsoleTransport:
+    """Prints messages instead of sending them (the previous simulated SMS behaviour)."""
+
+    async def send(self, recipient, message):
+        if not await send_sms(recipient, message):
+            raise RuntimeError("Simulated SMS send failed")
+
+class TwilioTransport:
+    """Delivers through the Twilio API; the blocking client call runs in a worker thread."""
+
+    async def send(self, recipient, message):
+        await asyncio.to_thread(send_sms_via_twilio, recipient, message)
+
+class FakeTransport:
+    """Records messages in memory. Set fail_times to make the next N sends raise."""
+
+    def __init__(self, fail_times: int = 0):
+        self.sent: List[Tuple[str, str]] = []
+        self.fail_times = fail_times
+
+    async def send(self, recipient, message):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError("Fake transport failure")
+        self.sent.append((recipient, message))
+
+def get_transport(name: Optional[str] = None):
+    """Build the transport selected by SMS_TRANSPORT (or the given name)."""
+    name = (name or SMS_TRANSPORT).lower()
+    if name == "twilio":
+        return TwilioTransport()
+    if name == "fake":
+        return FakeTransport()
+    if name == "console":
+        return ConsoleTransport()
+    raise ValueError(f"Unknown SMS transport '{name}'. Use console, twilio or fake.")
+
+class RateLimiter:
+    """Token bucket limiting sends to `rate` per second, with bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=OUTBOX_RETRY_BASE_DELAY * (2 ** (attempts - 1)))
+
+def _claim_size(batch_size: int, rate: float, deadline: Optional[float]) -> int:
+    """Largest batch the rate limit can send within the lease (and before the deadline)."""
+    budget = OUTBOX_LEASE_SECONDS
+    if deadline is not None:
+        budget = min(budget, deadline - time.monotonic())
+    if budget <= 0:
+        return 0
+    if rate > 0:
+        # At least one message while time remains, however slow the rate
+        batch_size = min(batch_size, max(int(budget * rate), 1))
+    return batch_size
+
+async def _claim(session_factory, batch_size: int) -> List[NotificationOutbox]:
+    """Mark up to batch_size due messages SENDING under a lease and commit."""
+    now = datetime.utcnow()
+    async with session_factory() as db:
+        # Leases of dispatchers that died mid-batch have expired: make those rows due again
+        await db.execute(
+            update(NotificationOutbox)
+            .where(and_(NotificationOutbox.status == "SENDING", NotificationOutbox.locked_until < now))
+            .values(status="PENDING", locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        due = (
+            select(NotificationOutbox.id)
+            .filter(
+                and_(
+                    NotificationOutbox.status == "PENDING",
+                    NotificationOutbox.next_attempt_at <= now
+                )
+            )
+            .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(due.scalar_subquery()))
+            .values(status="SENDING", locked_until=now + timedelta(seconds=OUTBOX_LEASE_SECONDS))
+            .returning(NotificationOutbox)
+            .execution_options(synchronize_session=False)
+        )
+        messages = result.scalars().all()
+        await db.commit()
+    return sorted(messages, key=lambda message: (message.next_attempt_at, message.id))
+
+async def _finish(session_factory, message_id: int, **values):
+    """Record the outcome of one send in its own transaction, if the claim is still ours."""
+    async with session_factory() as db:
+        await db.execute(
+            update(NotificationOutbox)
+            .where(and_(NotificationOutbox.id == message_id, NotificationOutbox.status == "SENDING"))
+            .values(locked_until=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+async def _release(session_factory, message_ids: List[int]):
+    """Hand claimed but unsent messages back to the queue."""
+    async with session_factory() as db:
+        await db.execute(
+            update(NotificationOutbox)
+            .where(and_(NotificationOutbox.id.in_(message_ids), NotificationOutbox.status == "SENDING"))
+            .values(status="PENDING", locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+async def dispatch_pending(
+    transport=None,
+    rate_limiter: Optional[RateLimiter] = None,
+    batch_size: int = OUTBOX_BATCH_SIZE,
+    session_factory=AsyncSessionLocal,
+    deadline: Optional[float] = None
+) -> int:
+    """
+    Deliver one batch of due outbox messages.
+
+    The batch is claimed (status SENDING, FOR UPDATE SKIP LOCKED) and committed
+    before the first send, and each result is committed separately, so no
+    transaction stays open while messages are sent and several dispatchers
+    can run at once without claiming the same message.
+
+    Args:
+        transport: Object with an async send(recipient, message); defaults to SMS_TRANSPORT
+        rate_limiter: Shared RateLimiter; defaults to one at OUTBOX_RATE_LIMIT
+        batch_size: Maximum number of messages to claim
+        session_factory: Session factory to use (overridable for tests)
+        deadline: time.monotonic() by which the batch must be finished, if any
+
+    Returns:
+        int: Number of messages claimed in this batch
+    """
+    transport = transport or get_transport()
+    rate_limiter = rate_limiter or RateLimiter(OUTBOX_RATE_LIMIT)
+
+    batch_size = _claim_size(batch_size, rate_limiter.rate, deadline)
+    if batch_size <= 0:
+        return 0
+    messages = await _claim(session_factory, batch_size)
+
+    for position, outbox_message in enumerate(messages):
+        try:
+            await rate_limiter.acquire()
+        except asyncio.CancelledError:
+            # Shutting down: nothing from here on has been sent
+            await asyncio.shield(_release(session_factory, [message.id for message in messages[position:]]))
+            raise
+        if deadline is not None and time.monotonic() >= deadline:
+            await _release(session_factory, [message.id for message in messages[position:]])
+            break
+        try:
+            await transport.send(outbox_message.recipient, outbox_message.message)
+        except Exception as e:
+            attempts = (outbox_message.attempts or 0) + 1
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                print(f"Giving up on outbox message {outbox_message.id}: {str(e)}")
+                await _finish(session_factory, outbox_message.id, status="FAILED", attempts=attempts, last_error=str(e))
+            else:
+                await _finish(
+                    session_factory,
+                    outbox_message.id,
+                    status="PENDING",
+                    attempts=attempts,
+                    last_error=str(e),
+                    next_attempt_at=datetime.utcnow() + _retry_delay(attempts)
+                )
+            continue
+        await _finish(session_factory, outbox_message.id, status="SENT", sent_at=datetime.utcnow())
+
+    return len(messages)
+
+async def drain(
+    transport=None,
+    rate_limiter: Optional[RateLimiter] = None,
+    deadline: Optional[float] = None
+) -> int:
+    """
+    Dispatch batches until no due messages remain or the deadline (a
+    time.monotonic() value) is reached. Returns the number of messages processed.
+    """
+    transport = transport or get_transport()
+    rate_limiter = rate_limiter or RateLimiter(OUTBOX_RATE_LIMIT)
+    total = 0
+    while True:
+        claimed = await dispatch_pending(transport, rate_limiter, deadline=deadline)
+        total += claimed
+        if claimed < OUTBOX_BATCH_SIZE:
+            return total
+
+async def run_dispatcher(poll_interval: float = OUTBOX_POLL_INTERVAL):
+    """Poll the outbox forever. Started as a background task by the API process."""
+    transport = get_transport()
+    rate_limiter = RateLimiter(OUTBOX_RATE_LIMIT)
+    while True:
+        try:
+            await drain(transport, rate_limiter)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Outbox dispatcher error: {str(e)}")
+        await asyncio.sleep(poll_interval)
+
+# Lambda entry point for the scheduled dispatcher. A single loop is reused
+# across warm invocations because pooled connections are bound to it.
+_loop = None
+
+def lambda_handler(event, context):
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    # Stop early enough to hand unsent rows back before the function times out
+    deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - OUTBOX_DEADLINE_MARGIN
+    processed = _loop.run_until_complete(drain(deadline=deadline))
+    return {"processed": processed}
+
+if __name__ == "__main__":
+    print(f"Processed {asyncio.run(drain())} outbox messages")
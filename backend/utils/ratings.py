@@ -0,0 +1,170 @@
+"""
+Freelancer rating aggregate.
+
+FreelancerDetails keeps a running rating_sum and rating_count; averageRating
+is derived from them in the same statement. FreelancerRatingCounts keeps the
+per-star histogram. Recording a review costs two single-row writes however
+many reviews the freelancer already has. backfill_ratings() recomputes
+everything from the reviews table.
+"""
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Numeric, cast, func, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models import FreelancerDetails, FreelancerRatingCounts, Review
+
+STARS = (1, 2, 3, 4, 5)
+
+def average_rating(rating_sum: int, rating_count: int) -> float:
+    """Average rounded half up to one decimal place (as Postgres round() does), 0.0 without reviews."""
+    if not rating_count:
+        return 0.0
+    average = Decimal(rating_sum) / Decimal(rating_count)
+    return float(average.quantize(Decimal("0.1"), rounding=ROUND_HALF_UP))
+
+async def record_rating(db: AsyncSession, freelancer_clerk_id: str, rating: int) -> bool:
+    """
+    Add one rating (1-5) to a freelancer's totals with a single atomic UPDATE
+    and to their star histogram with an upsert. Does not commit.
+
+    Returns:
+        bool: False if the freelancer has no FreelancerDetails row yet
+    """
+    # Right-hand sides see the old values, so the average uses the new totals
+    new_sum = FreelancerDetails.rating_sum + rating
+    new_count = FreelancerDetails.rating_count + 1
+    result = await db.execute(
+        update(FreelancerDetails)
+        .where(FreelancerDetails.clerkId == freelancer_clerk_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            averageRating=func.round(cast(new_sum, Numeric) / new_count, 1)
+        )
+        .returning(FreelancerDetails.id)
+    )
+    details_updated = result.first() is not None
+
+    # The histogram row is keyed by user, so it exists even without details
+    column = f"stars_{int(rating)}"
+    statement = insert(FreelancerRatingCounts).values(
+        freelancer_clerk_id=freelancer_clerk_id,
+        updated_at=datetime.utcnow(),
+        **{column: 1}
+    )
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[FreelancerRatingCounts.freelancer_clerk_id],
+        set_={
+            column: getattr(FreelancerRatingCounts, column) + 1,
+            "updated_at": statement.excluded.updated_at
+        }
+    ))
+
+    return details_updated
+
+async def get_rating_histogram(db: AsyncSession, freelancer_clerk_id: str) -> Dict[int, int]:
+    """
+    Read a freelancer's star histogram: one primary key lookup.
+
+    Returns:
+        dict: Star rating (1-5) to number of reviews; all zero without reviews
+    """
+    result = await db.execute(
+        select(FreelancerRatingCounts)
+        .filter(FreelancerRatingCounts.freelancer_clerk_id == freelancer_clerk_id)
+    )
+    counts = result.scalar_one_or_none()
+    return {stars: getattr(counts, f"stars_{stars}") if counts else 0 for stars in STARS}
+
+async def get_rating_totals(db: AsyncSession, freelancer_clerk_id: str) -> Tuple[int, int]:
+    """
+    Sum and count a freelancer's reviews from the reviews table, for seeding
+    a new FreelancerDetails row.
+
+    Returns:
+        tuple: (rating_sum, rating_count)
+    """
+    result = await db.execute(
+        select(func.coalesce(func.sum(Review.rating), 0), func.count(Review.rating))
+        .filter(Review.freelancer_clerk_id == freelancer_clerk_id)
+    )
+    rating_sum, rating_count = result.one()
+    return int(rating_sum), int(rating_count)
+
+# Recompute every aggregate in one set-based statement; freelancers without
+# reviews are reset to zero. Only rows that change are written.
+_BACKFILL_STATEMENT = """
+UPDATE freelancer_details AS fd
+SET rating_sum = totals.rating_sum,
+    rating_count = totals.rating_count,
+    "averageRating" = CASE
+        WHEN totals.rating_count = 0 THEN 0
+        ELSE round(totals.rating_sum::numeric / totals.rating_count, 1)
+    END,
+    updated_at = timezone('utc', now())
+FROM (
+    SELECT fd2.id,
+           coalesce(sum(r.rating), 0) AS rating_sum,
+           count(r.rating) AS rating_count
+    FROM freelancer_details AS fd2
+    LEFT JOIN reviews AS r ON r.freelancer_clerk_id = fd2."clerkId"
+    GROUP BY fd2.id
+) AS totals
+WHERE fd.id = totals.id
+  AND (fd.rating_sum, fd.rating_count) IS DISTINCT FROM (totals.rating_sum, totals.rating_count)
+RETURNING fd."clerkId"
+"""
+
+# Rebuild the star histograms, writing only rows that changed, and drop
+# histograms of freelancers who no longer have reviews
+_HISTOGRAM_BACKFILL_STATEMENTS = [
+    """
+    INSERT INTO freelancer_rating_counts
+        (freelancer_clerk_id, stars_1, stars_2, stars_3, stars_4, stars_5, updated_at)
+    SELECT freelancer_clerk_id,
+           count(*) FILTER (WHERE rating = 1),
+           count(*) FILTER (WHERE rating = 2),
+           count(*) FILTER (WHERE rating = 3),
+           count(*) FILTER (WHERE rating = 4),
+           count(*) FILTER (WHERE rating = 5),
+           timezone('utc', now())
+    FROM reviews
+    WHERE freelancer_clerk_id IS NOT NULL
+    GROUP BY freelancer_clerk_id
+    ON CONFLICT (freelancer_clerk_id) DO UPDATE
+    SET stars_1 = EXCLUDED.stars_1,
+        stars_2 = EXCLUDED.stars_2,
+        stars_3 = EXCLUDED.stars_3,
+        stars_4 = EXCLUDED.stars_4,
+        stars_5 = EXCLUDED.stars_5,
+        updated_at = EXCLUDED.updated_at
+    WHERE (freelancer_rating_counts.stars_1, freelancer_rating_counts.stars_2, freelancer_rating_counts.stars_3,
+           freelancer_rating_counts.stars_4, freelancer_rating_counts.stars_5)
+        IS DISTINCT FROM (EXCLUDED.stars_1, EXCLUDED.stars_2, EXCLUDED.stars_3, EXCLUDED.stars_4, EXCLUDED.stars_5)
+    """,
+    """
+    DELETE FROM freelancer_rating_counts AS counts
+    WHERE NOT EXISTS (
+        SELECT 1 FROM reviews WHERE reviews.freelancer_clerk_id = counts.freelancer_clerk_id
+    )
+    """,
+]
+
+async def backfill_ratings(db: AsyncSession) -> List[str]:
+    """
+    Recompute rating_sum, rating_count and averageRating for every freelancer,
+    and every star histogram, from the reviews table. Does not commit.
+
+    Returns:
+        list: clerkIds whose FreelancerDetails aggregate changed
+    """
+    result = await db.execute(text(_BACKFILL_STATEMENT))
+    changed = [row[0] for row in result.all()]
+    for statement in _HISTOGRAM_BACKFILL_STATEMENTS:
+        await db.execute(text(statement))
+    return changed
@@ -0,0 +1,110 @@
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+load_dotenv()
+
+# Score weights (should add up to 1)
+SKILL_WEIGHT = float(os.getenv("RECOMMENDATION_SKILL_WEIGHT", "0.6"))
+PAYMENT_WEIGHT = float(os.getenv("RECOMMENDATION_PAYMENT_WEIGHT", "0.25"))
+RECENCY_WEIGHT = float(os.getenv("RECOMMENDATION_RECENCY_WEIGHT", "0.15"))
+
+# Total payment at which the payment score saturates at 1
+PAYMENT_SCALE = float(os.getenv("RECOMMENDATION_PAYMENT_SCALE", "10000"))
+# Age in days at which the recency score halves
+RECENCY_HALF_LIFE_DAYS = float(os.getenv("RECOMMENDATION_RECENCY_HALF_LIFE_DAYS", "14"))
+
+# Scores every (freelancer, open gig) pair that shares at least one skill.
+# The && join is served by the GIN indexes on both skill arrays.
+_UPSERT_SCORES = """
+INSERT INTO gig_recommendations
+    (freelancer_clerk_id, gig_id, skill_score, payment_score, recency_score, score, computed_at)
+SELECT
+    scored.freelancer_clerk_id,
+    scored.gig_id,
+    scored.skill_score,
+    scored.payment_score,
+    scored.recency_score,
+    CAST(:skill_weight AS double precision) * scored.skill_score
+        + CAST(:payment_weight AS double precision) * scored.payment_score
+        + CAST(:recency_weight AS double precision) * scored.recency_score,
+    timezone('utc', now())
+FROM (
+    SELECT
+        fd."clerkId" AS freelancer_clerk_id,
+        g.id AS gig_id,
+        cardinality(ARRAY(
+            SELECT unnest(g.skills_needed) INTERSECT SELECT unnest(fd.skills)
+        ))::float / greatest(cardinality(g.skills_needed), 1) AS skill_score,
+        least(1.0, ln(1 + greatest(coalesce(g.total_payment, 0), 0)) / ln(1 + CAST(:payment_scale AS double precision))) AS payment_score,
+        exp(
+            -ln(2) * extract(epoch FROM timezone('utc', now()) - g.created_at)
+            / (CAST(:half_life_days AS double precision) * 86400)
+        ) AS recency_score
+    FROM freelancer_details fd
+    JOIN gigs g ON g.skills_needed && fd.skills
+    WHERE g.status = 'OPEN' {scope}
+) AS scored
+ON CONFLICT (freelancer_clerk_id, gig_id) DO UPDATE SET
+    skill_score = EXCLUDED.skill_score,
+    payment_score = EXCLUDED.payment_score,
+    recency_score = EXCLUDED.recency_score,
+    score = EXCLUDED.score,
+    computed_at = EXCLUDED.computed_at
+"""
+
+async def _refresh(db: AsyncSession, scope: str = "", delete: Optional[str] = None, **params):
+    if delete:
+        await db.execute(text(f"DELETE FROM gig_recommendations WHERE {delete}"), params)
+
+    await db.execute(
+        text(_UPSERT_SCORES.format(scope=scope)),
+        {
+            "skill_weight": SKILL_WEIGHT,
+            "payment_weight": PAYMENT_WEIGHT,
+            "recency_weight": RECENCY_WEIGHT,
+            "payment_scale": PAYMENT_SCALE,
+            "half_life_days": RECENCY_HALF_LIFE_DAYS,
+            **params
+        }
+    )
+
+async def refresh_for_gig(db: AsyncSession, gig_id: int):
+    """
+    Recompute recommendation scores for one gig against every freelancer.
+    Call after a gig is created or its skills/payment change. Does not commit.
+
+    Args:
+        db: The database session
+        gig_id: ID of the gig to score
+    """
+    await _refresh(db, scope="AND g.id = :gig_id", delete="gig_id = :gig_id", gig_id=gig_id)
+
+async def refresh_for_freelancer(db: AsyncSession, clerk_id: str):
+    """
+    Recompute recommendation scores for one freelancer against every open gig.
+    Call after a freelancer's skills change. Does not commit.
+
+    Args:
+        db: The database session
+        clerk_id: Clerk ID of the freelancer to score
+    """
+    await _refresh(
+        db,
+        scope='AND fd."clerkId" = :clerk_id',
+        delete="freelancer_clerk_id = :clerk_id",
+        clerk_id=clerk_id
+    )
+
+async def refresh_all(db: AsyncSession):
+    """
+    Rebuild the whole score table. Run periodically so recency scores decay
+    and rows for closed gigs are dropped. Does not commit.
+
+    Args:
+        db: The database session
+    """
+    await _refresh(db, delete="TRUE")
@@ -11,6 +11,7 @@ import {
 } from "lucide-react";
 import { useState, useEffect } from "react";
 import { useUser } from "@clerk/nextjs";
+import { fetchAllPages } from "@/lib/pagination";
 const API_BASE = process.env.NEXT_PUBLIC_API_URL;
 
 interface UserDetails {
@@ -97,19 +98,18 @@ useEffect(() => {
     try {
       if (!API_BASE || !CLERK_ID) throw new Error('Missing environment configuration');
 
-      const [userRes, freelancerRes, gigsRes, balanceRes] = await Promise.all([
+      const [userRes, freelancerRes, gigsData, balanceRes] = await Promise.all([
         fetch(`${API_BASE}/user-details/basic/${CLERK_ID}`),
         fetch(`${API_BASE}/user-details/freelancer/${CLERK_ID}`),
-        fetch(`${API_BASE}/gigs/active/freelancer/${CLERK_ID}`),
+        fetchAllPages<ActiveGig>(`${API_BASE}/gigs/active/freelancer/${CLERK_ID}`),
         fetch(`${API_BASE}/balance/user/${CLERK_ID}`)
       ]);
 
       if (!balanceRes.ok) throw new Error(`HTTP error! status: ${balanceRes.status}`);
 
-      const [userData, freelancerData, gigsData, balanceData] = await Promise.all([
+      const [userData, freelancerData, balanceData] = await Promise.all([
         userRes.json(),
         freelancerRes.json(),
-        gigsRes.json(),
         balanceRes.json()
       ]);
 
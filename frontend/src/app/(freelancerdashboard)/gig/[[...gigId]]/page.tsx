@@ -70,7 +70,7 @@ export default function GigPage({ params }: { params: { gigId: string } }) {
           
           if (applicationResponse.ok) {
             const applications = await applicationResponse.json();
-            setHasApplied(applications.length > 0);
+            setHasApplied(applications.items.length > 0);
           }
         }
       } catch (err) {
@@ -6,6 +6,7 @@ import { useEffect, useState } from "react";
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from "@/components/ui/dialog";
 import { Label } from "@/components/ui/label";
 import { Button } from "@/components/ui/button";
+import { withCursor, type Page } from "@/lib/pagination";
 
 
 
@@ -36,13 +37,39 @@ const statusConfig: StatusConfig = {
   IN_PROGRESS: { color: "bg-yellow-100 text-yellow-800", icon: Briefcase },
 };
 
+type GigFilters = {
+  skills: string[];
+  min_payment: number;
+  max_payment: number;
+  status: string;
+};
+
+function gigsUrl(searchQuery: string, filters: GigFilters) {
+  const params = new URLSearchParams();
+
+  // Only add parameters with values
+  if (searchQuery) params.append('title', searchQuery);
+  if (filters.skills.length > 0) {
+    filters.skills.forEach(skill => params.append('skills', skill));
+  }
+  if (filters.min_payment > 0) params.append('min_payment', filters.min_payment.toString());
+  if (filters.max_payment < 10000) params.append('max_payment', filters.max_payment.toString());
+  
+  // Always send OPEN status by default unless changed
+  if (filters.status) params.append('status', filters.status);
+
+  return `${API_BASE}/gigs/?${params}`;
+}
+
 export default function GigsPage() {
   const [gigs, setGigs] = useState<Gig[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [searchQuery, setSearchQuery] = useState("");
-  const [filters, setFilters] = useState({
-    skills: [] as string[],
+  const [filters, setFilters] = useState<GigFilters>({
+    skills: [],
     min_payment: 0,
     max_payment: 10000,
     status: "OPEN"
@@ -55,20 +82,7 @@ export default function GigsPage() {
       });
 
       try {
-        const params = new URLSearchParams();
-
-        // Only add parameters with values
-        if (searchQuery) params.append('title', searchQuery);
-        if (filters.skills.length > 0) {
-          filters.skills.forEach(skill => params.append('skills', skill));
-        }
-        if (filters.min_payment > 0) params.append('min_payment', filters.min_payment.toString());
-        if (filters.max_payment < 10000) params.append('max_payment', filters.max_payment.toString());
-        
-        // Always send OPEN status by default unless changed
-        if (filters.status) params.append('status', filters.status);
-
-        const response = await fetch(`${API_BASE}/gigs/?${params}`, {
+        const response = await fetch(gigsUrl(searchQuery, filters), {
           headers,
           mode: 'cors'
         });
@@ -80,8 +94,9 @@ export default function GigsPage() {
 
         if (!response.ok) throw new Error("Failed to fetch gigs");
 
-        const data = await response.json();
-        setGigs(data);
+        const data: Page<Gig> = await response.json();
+        setGigs(data.items);
+        setNextCursor(data.next_cursor);
         setLoading(false);
       } catch (err) {
         console.error("Fetch error:", err);
@@ -96,6 +111,28 @@ export default function GigsPage() {
     setFilters(newFilters);
   };
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+
+    setLoadingMore(true);
+    try {
+      const response = await fetch(withCursor(gigsUrl(searchQuery, filters), nextCursor), {
+        headers: new Headers({ 'Content-Type': 'application/json' }),
+        mode: 'cors'
+      });
+      if (!response.ok) throw new Error("Failed to fetch gigs");
+
+      const data: Page<Gig> = await response.json();
+      setGigs((prev) => [...prev, ...data.items]);
+      setNextCursor(data.next_cursor);
+    } catch (err) {
+      console.error("Fetch error:", err);
+      setError(err instanceof Error ? err.message : "Request failed");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="p-8 max-w-7xl mx-auto">
@@ -156,6 +193,14 @@ export default function GigsPage() {
           />
         ))}
       </BentoGrid>
+
+      {nextCursor && (
+        <div className="flex justify-center mt-8">
+          <Button variant="outline" onClick={handleLoadMore} disabled={loadingMore}>
+            {loadingMore ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
     </div>
   );
 }
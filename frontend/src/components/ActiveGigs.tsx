@@ -1,10 +1,10 @@
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table";
 import { Badge } from "@/components/ui/badge";
 import Link from "next/link";
+import { fetchAllPages } from "@/lib/pagination";
 
 async function fetchActiveGigs(clerkId: string) {
-  const res = await fetch(`/api/gigs/active/freelancer/${clerkId}`);
-  return res.json();
+  return fetchAllPages<Gig>(`/api/gigs/active/freelancer/${clerkId}`);
 }
 
 // Define interface for gig
@@ -1,6 +1,7 @@
 "use client";
 
 import { useEffect, useState } from "react";
+import { fetchAllPages } from "@/lib/pagination";
 
 interface Request {
   id: number;
@@ -14,9 +15,7 @@ export default function GigRequestList({ gigId }: { gigId: number }) {
   const apiUrl = process.env.NEXT_PUBLIC_API_URL;
 
   const fetchRequests = async () => {
-    const res = await fetch(`${apiUrl}/Prod/gigs/gig/${gigId}/requests`);
-    const data = await res.json();
-    setRequests(data);
+    setRequests(await fetchAllPages<Request>(`${apiUrl}/Prod/gigs/gig/${gigId}/requests`));
   };
 
   useEffect(() => {
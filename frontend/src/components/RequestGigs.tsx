@@ -2,10 +2,10 @@
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table";
 import { Badge } from "@/components/ui/badge";
 import Link from "next/link";
+import { fetchAllPages } from "@/lib/pagination";
 
 async function fetchRequestGigs(clerkId: string) {
-  const res = await fetch(`/api/gigs/requests/freelancer/${clerkId}`);
-  return res.json();
+  return fetchAllPages<Gig>(`/api/gigs/requests/freelancer/${clerkId}`);
 }
 
 // Define interface for gig
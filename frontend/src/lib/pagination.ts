@@ -0,0 +1,25 @@
+// Shape of the backend's cursor-paginated list responses
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
+export function withCursor(url: string, cursor: string | null): string {
+  if (!cursor) return url;
+  return `${url}${url.includes("?") ? "&" : "?"}cursor=${encodeURIComponent(cursor)}`;
+}
+
+// Follows next_cursor until the last page. Only for lists that stay small
+// (one user's gigs or requests); long lists should page with "Load more".
+export async function fetchAllPages<T>(url: string, init?: RequestInit): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const res = await fetch(withCursor(url, cursor), init);
+    if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
+    const page: Page<T> = await res.json();
+    items.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor);
+  return items;
+}